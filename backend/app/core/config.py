@@ -1,4 +1,6 @@
 import os
+from urllib.parse import quote
+
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -12,17 +14,140 @@ class Settings:
     REDIS_PORT: int = int(os.getenv("REDIS_PORT", 6379))
     REDIS_DB: int = int(os.getenv("REDIS_DB", 0))
     REDIS_PASSWORD: str = os.getenv("REDIS_PASSWORD", "")
+    REDIS_MAX_CONNECTIONS: int = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+    REDIS_SOCKET_TIMEOUT: float = float(os.getenv("REDIS_SOCKET_TIMEOUT", 5.0))
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = float(
+        os.getenv("REDIS_SOCKET_CONNECT_TIMEOUT", 2.0)
+    )
+    REDIS_BATCH_SIZE: int = int(os.getenv("REDIS_BATCH_SIZE", 500))
+    # Intentos de una transacción con WATCH si otro cliente cambia las claves
+    REDIS_WATCH_RETRIES: int = int(os.getenv("REDIS_WATCH_RETRIES", 5))
+    # Mensajes pub/sub pendientes por oyente antes de descartar los más antiguos
+    REDIS_SUBSCRIBER_QUEUE_SIZE: int = int(
+        os.getenv("REDIS_SUBSCRIBER_QUEUE_SIZE", 100)
+    )
+    # Formato de los libros en Redis: "hash" (un hash por libro) o "json"
+    # (un string JSON por libro, leído con MGET). Para cambiarlo con datos
+    # existentes: `python manage.py migrate-storage <formato>`
+    BOOK_STORAGE_FORMAT: str = os.getenv("BOOK_STORAGE_FORMAT", "hash")
+
+    RESPONSE_CACHE_TTL: float = float(os.getenv("RESPONSE_CACHE_TTL", 60.0))
+    RESPONSE_CACHE_MAX_SIZE: int = int(os.getenv("RESPONSE_CACHE_MAX_SIZE", 256))
+    # Segundos que cada worker reutiliza la versión del catálogo sin leer Redis
+    CATALOG_VERSION_CACHE_TTL: float = float(
+        os.getenv("CATALOG_VERSION_CACHE_TTL", 1.0)
+    )
+    # max-age (s) de Cache-Control en las respuestas de libros y titulares
+    BOOKS_CACHE_MAX_AGE: int = int(os.getenv("BOOKS_CACHE_MAX_AGE", 60))
+    HEADLINES_CACHE_MAX_AGE: int = int(os.getenv("HEADLINES_CACHE_MAX_AGE", 60))
 
     REMOTE_DRIVER_URL = os.getenv("REMOTE_DRIVER_URL")
+    WEBDRIVER_POOL_SIZE: int = int(os.getenv("WEBDRIVER_POOL_SIZE", 5))
+    WEBDRIVER_MAX_USES: int = int(os.getenv("WEBDRIVER_MAX_USES", 50))
+    WEBDRIVER_IDLE_TIMEOUT: float = float(os.getenv("WEBDRIVER_IDLE_TIMEOUT", 300.0))
 
     HACKER_NEWS_URL: str = "https://news.ycombinator.com/"
+    # "http" (HTML estático, con Selenium como respaldo) o "selenium"
+    HEADLINES_BACKEND: str = os.getenv("HEADLINES_BACKEND", "http")
+    HEADLINES_HTTP_TIMEOUT: float = float(os.getenv("HEADLINES_HTTP_TIMEOUT", 10.0))
+    # Intervalo (s) del refresco periódico de titulares; 0 lo desactiva
+    HEADLINES_REFRESH_INTERVAL: float = float(
+        os.getenv("HEADLINES_REFRESH_INTERVAL", 300.0)
+    )
+    # Antigüedad (s) a partir de la cual una petición lanza el refresco de la
+    # instantánea; por defecto el intervalo de refresco, o 300 s si el
+    # refresco periódico está desactivado
+    HEADLINES_STALE_AFTER: float = float(
+        os.getenv("HEADLINES_STALE_AFTER", HEADLINES_REFRESH_INTERVAL or 300.0)
+    )
+    # TTL del lease del refresco de titulares; se renueva cada TTL/3 mientras
+    # dura el scraping, así que solo acota cuánto bloquea un worker caído
+    HEADLINES_REFRESH_LOCK_TTL: int = int(os.getenv("HEADLINES_REFRESH_LOCK_TTL", 30))
+    # Segundos que cada worker reutiliza la instantánea sin leer Redis
+    HEADLINES_SNAPSHOT_CACHE_TTL: float = float(
+        os.getenv("HEADLINES_SNAPSHOT_CACHE_TTL", 1.0)
+    )
     BOOK_SCRAPER_URL: str = os.getenv("BOOK_SCRAPER_URL", "http://books.toscrape.com")
+    # Directorio de los ficheros de log de los scrapers
+    LOGS_DIR: str = os.getenv("LOGS_DIR", "logs")
 
     MAX_BOOKS_TO_SCRAPE: int = int(os.getenv("MAX_BOOKS_TO_SCRAPE", 100))
     PRICE_LIMIT: float = float(os.getenv("PRICE_LIMIT", 20.0))
+    SCRAPER_MAX_CONCURRENT_REQUESTS: int = int(
+        os.getenv("SCRAPER_MAX_CONCURRENT_REQUESTS", 5)
+    )
+    SCRAPER_MIN_CONCURRENT_REQUESTS: int = int(
+        os.getenv("SCRAPER_MIN_CONCURRENT_REQUESTS", 1)
+    )
+    SCRAPER_MAX_CONCURRENT_REQUESTS_LIMIT: int = int(
+        os.getenv("SCRAPER_MAX_CONCURRENT_REQUESTS_LIMIT", 20)
+    )
+    # Workers que consumen la frontera de páginas (0 = techo de concurrencia)
+    SCRAPER_WORKERS: int = int(os.getenv("SCRAPER_WORKERS", 0))
+    # Latencia (s) a partir de la cual el scraper reduce su concurrencia
+    SCRAPER_TARGET_LATENCY: float = float(os.getenv("SCRAPER_TARGET_LATENCY", 1.0))
+    # Reintentos de una página que responde 429 o 5xx y espera base (s) entre
+    # ellos cuando el servidor no envía Retry-After
+    SCRAPER_MAX_RETRIES: int = int(os.getenv("SCRAPER_MAX_RETRIES", 3))
+    SCRAPER_RETRY_BACKOFF: float = float(os.getenv("SCRAPER_RETRY_BACKOFF", 1.0))
+    # Parseo del HTML: "process", "thread" o "inline" (en el event loop)
+    SCRAPER_PARSE_EXECUTOR: str = os.getenv("SCRAPER_PARSE_EXECUTOR", "process")
+    # 0 usa el número de CPUs / el número de workers respectivamente
+    SCRAPER_PARSE_WORKERS: int = int(os.getenv("SCRAPER_PARSE_WORKERS", 0))
+    SCRAPER_MAX_CONCURRENT_PARSES: int = int(
+        os.getenv("SCRAPER_MAX_CONCURRENT_PARSES", 0)
+    )
+    # "html.parser" o "lxml" (si está instalado)
+    SCRAPER_HTML_PARSER: str = os.getenv("SCRAPER_HTML_PARSER", "html.parser")
+    SCRAPER_WRITE_BATCH_SIZE: int = int(os.getenv("SCRAPER_WRITE_BATCH_SIZE", 100))
+    SCRAPER_WRITE_FLUSH_INTERVAL: float = float(
+        os.getenv("SCRAPER_WRITE_FLUSH_INTERVAL", 0.5)
+    )
+    # Enriquecimiento con la página de detalle de cada libro (UPC, stock...)
+    SCRAPER_ENRICH_DETAILS: bool = (
+        os.getenv("SCRAPER_ENRICH_DETAILS", "false").lower() == "true"
+    )
+    SCRAPER_DETAIL_CONCURRENCY: int = int(os.getenv("SCRAPER_DETAIL_CONCURRENCY", 2))
+    SCRAPER_DETAIL_QUEUE_SIZE: int = int(os.getenv("SCRAPER_DETAIL_QUEUE_SIZE", 1000))
+    # Duración en segundos del lease del crawl de libros; el propietario lo
+    # renueva cada tercio de este tiempo mientras el crawl sigue vivo
+    BOOK_CRAWL_LOCK_TTL: int = int(os.getenv("BOOK_CRAWL_LOCK_TTL", 60))
+    # Cada cuántos segundos se publica el progreso de un crawl
+    CRAWL_PROGRESS_INTERVAL: float = float(os.getenv("CRAWL_PROGRESS_INTERVAL", 1.0))
+    # Segundos que se conserva en Redis el estado de un job de crawl
+    CRAWL_JOB_TTL: int = int(os.getenv("CRAWL_JOB_TTL", 86400))
+    # Segundos indicados en Retry-After mientras se carga el catálogo inicial
+    STARTUP_RETRY_AFTER: int = int(os.getenv("STARTUP_RETRY_AFTER", 10))
+    # Espera inicial y máxima (s) entre reintentos del scraping inicial fallido
+    STARTUP_RETRY_BACKOFF: float = float(os.getenv("STARTUP_RETRY_BACKOFF", 5.0))
+    STARTUP_MAX_RETRY_BACKOFF: float = float(
+        os.getenv("STARTUP_MAX_RETRY_BACKOFF", 300.0)
+    )
+    # Intervalo en segundos del crawl incremental periódico (0 lo desactiva)
+    BOOK_REFRESH_INTERVAL: float = float(os.getenv("BOOK_REFRESH_INTERVAL", 0))
 
     BACKEND_CORS_ORIGINS: list = os.getenv("BACKEND_CORS_ORIGINS", "*").split(",")
-    RATE_LIMIT: str = os.getenv("RATE_LIMIT", "1/second")
+    # Límites de peticiones por cliente, compartidos por todos los workers a
+    # través de Redis. RATE_LIMIT se aplica a las rutas sin límite propio
+    RATE_LIMIT: str = os.getenv("RATE_LIMIT", "60/minute")
+    # Lecturas del catálogo, servidas casi siempre desde caché
+    RATE_LIMIT_CACHED_READS: str = os.getenv("RATE_LIMIT_CACHED_READS", "300/minute")
+    # Rutas que pueden lanzar un scraping (/init, /headlines)
+    RATE_LIMIT_SCRAPING: str = os.getenv("RATE_LIMIT_SCRAPING", "10/minute")
+    # Estrategia de `limits`: "moving-window", "sliding-window-counter" o
+    # "fixed-window"
+    RATE_LIMIT_STRATEGY: str = os.getenv("RATE_LIMIT_STRATEGY", "moving-window")
+    # Almacenamiento de los contadores (por defecto, el Redis de la aplicación)
+    RATE_LIMIT_STORAGE_URI: str = os.getenv(
+        "RATE_LIMIT_STORAGE_URI",
+        f"redis://:{quote(REDIS_PASSWORD, safe='')}@"
+        f"{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}",
+    )
+    # Timeout en segundos de cada consulta del rate limiter a Redis. La
+    # consulta es síncrona y bloquea el event loop, así que debe ser corto
+    RATE_LIMIT_STORAGE_TIMEOUT: float = float(
+        os.getenv("RATE_LIMIT_STORAGE_TIMEOUT", 0.1)
+    )
 
 
 settings = Settings()
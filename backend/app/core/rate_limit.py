@@ -0,0 +1,59 @@
+from collections import Counter
+from threading import Lock
+from typing import Dict
+
+from fastapi import Request
+from slowapi import Limiter, _rate_limit_exceeded_handler
+from slowapi.errors import RateLimitExceeded
+from slowapi.util import get_remote_address
+from starlette.routing import Match
+
+from app.core.config import settings
+
+
+# Los contadores viven en Redis para que el límite sea global entre workers y
+# réplicas; si Redis no responde se usa temporalmente un contador en memoria.
+# slowapi solo admite el almacenamiento síncrono de `limits`: cada petición
+# limitada hace un round-trip bloqueante a Redis (un script Lua, del orden de
+# 0.1-0.5 ms en la misma red) dentro del event loop. Para que una caída de
+# Redis no congele el worker, las consultas tienen un timeout corto y tras el
+# primer fallo se pasa al contador en memoria.
+limiter = Limiter(
+    key_func=get_remote_address,
+    default_limits=[settings.RATE_LIMIT],
+    strategy=settings.RATE_LIMIT_STRATEGY,
+    storage_uri=settings.RATE_LIMIT_STORAGE_URI,
+    storage_options={
+        "socket_timeout": settings.RATE_LIMIT_STORAGE_TIMEOUT,
+        "socket_connect_timeout": settings.RATE_LIMIT_STORAGE_TIMEOUT,
+    },
+    in_memory_fallback_enabled=True,
+)
+
+# Peticiones rechazadas por ruta en este worker
+_rejections: Counter = Counter()
+_rejections_lock = Lock()
+
+
+def route_path(request: Request) -> str:
+    """Plantilla de la ruta (p. ej. /api/v1/init/jobs/{job_id}) de la petición"""
+    for route in request.app.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return request.url.path
+
+
+def rate_limit_rejections() -> Dict[str, int]:
+    with _rejections_lock:
+        return dict(_rejections)
+
+
+def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
+    """
+    Cuenta el rechazo por ruta y devuelve el 429 de slowapi. Es síncrono
+    porque SlowAPIMiddleware no admite handlers asíncronos.
+    """
+    with _rejections_lock:
+        _rejections[route_path(request)] += 1
+    return _rate_limit_exceeded_handler(request, exc)
@@ -1,56 +1,309 @@
-from typing import Optional
+import json
+from typing import AsyncIterator, Awaitable, Callable, Optional
 
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
 
 from app.core.config import settings
-from app.services.redis_service import RedisService, get_redis_service
-from app.scraping.scrape_books import BookScraper
-from app.models.schemas import BookList
+from app.core.rate_limit import limiter
+from app.services.cache_service import (
+    RenderedResponse,
+    ResponseCache,
+    VersionCache,
+    get_catalog_version_cache,
+    get_response_cache,
+    not_modified_response,
+)
+from app.services.job_service import CrawlJobs, get_crawl_jobs
+from app.services.startup_service import StartupScrape, get_startup_scrape
+from app.services.redis_service import (
+    RedisService,
+    get_redis_service,
+    paginate_books,
+)
+from app.models.schemas import BookList, BookQuery, BookSort, CrawlStatus, JobStatus
 
 router = APIRouter()
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+# Última línea de un stream NDJSON que no se pudo completar
+STREAM_ERROR_DETAIL = "Error leyendo los libros de Redis; la lista está incompleta"
+
+
+def get_book_query(
+    min_price: Optional[float] = Query(None, ge=0, description="Precio mínimo"),
+    max_price: Optional[float] = Query(None, ge=0, description="Precio máximo"),
+    sort: Optional[BookSort] = Query(
+        None, description="Orden de los resultados por precio"
+    ),
+    limit: Optional[int] = Query(
+        None, ge=1, le=1000, description="Número máximo de libros por página"
+    ),
+    cursor: Optional[str] = Query(
+        None, description="Cursor devuelto en `next_cursor` por la página anterior"
+    ),
+) -> BookQuery:
+    """Agrupa los parámetros de filtrado por precio, orden y paginación"""
+    return BookQuery(
+        min_price=min_price,
+        max_price=max_price,
+        sort=sort,
+        limit=limit,
+        cursor=cursor,
+    )
+
+
+def wants_stream(request: Request, stream: bool) -> bool:
+    """Indica si el cliente pidió la respuesta en streaming (NDJSON)"""
+    return stream or NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+async def stream_books(
+    redis_service: RedisService, category: Optional[str], query: BookQuery
+) -> AsyncIterator[bytes]:
+    """
+    Emite cada libro como una línea JSON en cuanto se lee de Redis, de modo
+    que la memoria usada no depende del tamaño del catálogo.
+
+    Si Redis falla a mitad del stream se emite como última línea un registro
+    `{"error": ...}`, para que el cliente no tome una lista incompleta por el
+    catálogo entero. (Abortar la conexión no sirve: los middlewares basados
+    en BaseHTTPMiddleware cierran la respuesta con normalidad.)
+    """
+    try:
+        async for book in redis_service.iter_books(category):
+            if query.min_price is not None and book.price < query.min_price:
+                continue
+            if query.max_price is not None and book.price > query.max_price:
+                continue
+            yield book.model_dump_json().encode() + b"\n"
+    except Exception as e:
+        # Las cabeceras (200) ya se enviaron: el error va dentro del stream
+        print(f"Error streaming books from Redis: {e}")
+        yield json.dumps({"error": STREAM_ERROR_DETAIL}).encode() + b"\n"
+
+
+def raise_if_catalog_missing(startup: StartupScrape, version: Optional[int]) -> None:
+    """
+    Mientras el scraping inicial no ha terminado, responde 503 con
+    Retry-After si aún no hay libros que servir.
+    """
+    if not version:
+        raise HTTPException(
+            status_code=503,
+            detail=(
+                "La carga inicial del catálogo de libros ha fallado"
+                if startup.status == JobStatus.failed
+                else "El catálogo de libros se está cargando"
+            ),
+            headers={"Retry-After": str(settings.STARTUP_RETRY_AFTER)},
+        )
+
+
+async def serve_catalog_view(
+    request: Request,
+    cache: ResponseCache,
+    version: Optional[int],
+    build_result: Callable[[], Awaitable[BookList]],
+    endpoint: str,
+    startup: Optional[StartupScrape] = None,
+    **params,
+) -> Response:
+    """
+    Sirve una vista del catálogo identificada por `endpoint` y `params`:
+    un 304 si el cliente ya tiene la versión actual (sin leer libros ni
+    serializar), el cuerpo ya renderizado si está en caché o, si no, la
+    construye con `build_result` y la guarda.
+
+    Mientras el scraping inicial no ha terminado responde 503 con
+    Retry-After si aún no hay libros, o sirve los datos parciales sin
+    permitir que el cliente los cachee.
+    """
+    max_age = settings.BOOKS_CACHE_MAX_AGE
+    if startup is not None and not startup.is_ready:
+        raise_if_catalog_missing(startup, version)
+        max_age = 0
+    cache_key = cache.make_key(endpoint, version, **params)
+    # Sin versión (Redis no disponible) no se puede validar ni cachear; el
+    # cliente tampoco debe reutilizar la respuesta sin revalidarla
+    etag = cache.make_etag(cache_key) if version is not None else None
+    if version is None:
+        max_age = 0
+
+    if etag and (not_modified := not_modified_response(request, etag, max_age)):
+        return not_modified
+    if version is not None and (cached := cache.get(cache_key)):
+        return cached.to_response(request, max_age)
+
+    rendered = RenderedResponse.render(await build_result(), etag=etag)
+    if version is not None:
+        cache.set(cache_key, rendered)
+    return rendered.to_response(request, max_age)
+
 
 @router.post(
     "/init",
-    response_model=BookList,
-    summary="Inicializa la base de datos con libros scrapeados",
+    response_model=CrawlStatus,
+    status_code=202,
+    summary="Encola el scraping de libros para inicializar la base de datos",
 )
-async def init_books(redis_service: RedisService = Depends(get_redis_service)):
+@limiter.limit(settings.RATE_LIMIT_SCRAPING)
+async def init_books(
+    request: Request,
+    response: Response,
+    incremental: bool = Query(False, description="Hace un crawl incremental"),
+    jobs: CrawlJobs = Depends(get_crawl_jobs),
+):
     """
     Endpoint para inicializar la base de datos con libros extraídos de la web.
     Este endpoint debe ser llamado durante la inicialización del contenedor.
+
+    Responde de inmediato con el job del crawl, cuyo estado se consulta en
+    `/init/jobs/{job_id}` y cuyo progreso se sigue en
+    `/init/jobs/{job_id}/events` (Server-Sent Events). Si ya hay un crawl en
+    curso se devuelve su job en lugar de lanzar otro.
     """
-    scraper = BookScraper(
-        base_url=settings.BOOK_SCRAPER_URL,
-        redis_service=redis_service,
-        max_books=settings.MAX_BOOKS_TO_SCRAPE,
-        price_limit=settings.PRICE_LIMIT,
+    job = await jobs.submit(incremental=incremental)
+    response.headers["Location"] = str(
+        request.url_for("get_crawl_job", job_id=job.job_id)
     )
-    books = await scraper.scrape_books()
+    return job
 
-    if not books:
-        raise HTTPException(
-            status_code=500, detail="Error al inicializar la base de datos de libros"
-        )
 
-    return BookList(books=books)
+@router.get(
+    "/init/jobs/{job_id}",
+    response_model=CrawlStatus,
+    summary="Estado y progreso de un job de scraping",
+)
+async def get_crawl_job(job_id: str, jobs: CrawlJobs = Depends(get_crawl_jobs)):
+    """
+    Devuelve el estado de un job: páginas descargadas, libros guardados,
+    errores y ritmo del crawl.
+    """
+    job = await jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job no encontrado")
+    return job
+
+
+@router.get(
+    "/init/jobs/{job_id}/events",
+    summary="Progreso de un job de scraping en tiempo real",
+    responses={200: {"content": {SSE_MEDIA_TYPE: {}}}},
+)
+async def stream_crawl_job(job_id: str, jobs: CrawlJobs = Depends(get_crawl_jobs)):
+    """
+    Envía el progreso del job como Server-Sent Events: un evento `progress`
+    por cada actualización y un evento `done` o `failed` al terminar.
+    """
+    if await jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job no encontrado")
+
+    async def events() -> AsyncIterator[bytes]:
+        try:
+            async for job in jobs.redis_service.iter_job_updates(job_id):
+                event = job.status.value if job.is_finished else "progress"
+                yield f"event: {event}\ndata: {job.model_dump_json()}\n\n".encode()
+        except Exception as e:
+            # Las cabeceras ya se enviaron: solo queda cortar el stream
+            print(f"Error streaming crawl job progress from Redis: {e}")
+
+    return StreamingResponse(
+        events(),
+        media_type=SSE_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    "/init/status",
+    response_model=CrawlStatus,
+    summary="Estado del último crawl del catálogo",
+)
+async def get_crawl_status(redis_service: RedisService = Depends(get_redis_service)):
+    """
+    Devuelve el estado del crawl en curso o del último terminado, sea cual
+    sea el worker o réplica que lo ejecuta.
+    """
+    status = await redis_service.get_crawl_status()
+    if status is None:
+        raise HTTPException(status_code=404, detail="No se ha ejecutado ningún crawl")
+    return status
 
 
 @router.get(
     "/books",
     response_model=BookList,
     summary="Obtiene todos los libros o filtrados por categoría",
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}},
 )
+@limiter.limit(settings.RATE_LIMIT_CACHED_READS)
 async def get_books(
+    request: Request,
     category: Optional[str] = Query(None, description="Categoría para filtrar libros"),
+    stream: bool = Query(
+        False, description="Devuelve los libros en streaming, un JSON por línea"
+    ),
+    query: BookQuery = Depends(get_book_query),
     redis_service: RedisService = Depends(get_redis_service),
+    cache: ResponseCache = Depends(get_response_cache),
+    version_cache: VersionCache = Depends(get_catalog_version_cache),
+    startup: Optional[StartupScrape] = Depends(get_startup_scrape),
 ):
     """
     Obtiene todos los libros almacenados en Redis.
-    Opcionalmente se puede filtrar por categoría.
+    Opcionalmente se puede filtrar por categoría y rango de precio,
+    ordenar por precio y paginar con `limit` y `cursor`.
+
+    Con `stream=true` o `Accept: application/x-ndjson` los libros se envían
+    en streaming (NDJSON) a medida que se leen de Redis. Si la lectura falla
+    a mitad, la última línea es un registro `{"error": ...}`. Durante el
+    scraping inicial se aplica la misma regla que a la respuesta JSON: 503
+    si aún no hay libros y, si los hay, un stream parcial que no se cachea.
+
+    La respuesta JSON se serializa una vez por versión del catálogo y se
+    sirve después ya renderizada. El ETag depende de la versión del catálogo
+    y de los parámetros, de modo que `If-None-Match` recibe un 304 sin leer
+    ni serializar libros.
     """
-    books = await redis_service.get_books(category)
-    return BookList(books=books)
+    if wants_stream(request, stream):
+        if query.sort or query.limit or query.cursor:
+            raise HTTPException(
+                status_code=422,
+                detail="El modo streaming no admite los parámetros sort, limit ni cursor",
+            )
+        headers = {}
+        if startup is not None and not startup.is_ready:
+            raise_if_catalog_missing(
+                startup, await version_cache.get(redis_service.get_catalog_version)
+            )
+            headers["Cache-Control"] = "no-store"
+        return StreamingResponse(
+            stream_books(redis_service, category, query),
+            media_type=NDJSON_MEDIA_TYPE,
+            headers=headers,
+        )
+
+    async def build_result() -> BookList:
+        if query.is_empty:
+            return BookList(books=await redis_service.get_books(category))
+        try:
+            books, next_cursor = await redis_service.query_books(category, query)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        return BookList(books=books, next_cursor=next_cursor)
+
+    return await serve_catalog_view(
+        request,
+        cache,
+        await version_cache.get(redis_service.get_catalog_version),
+        build_result,
+        "books",
+        startup,
+        category=category,
+        **query.model_dump(),
+    )
 
 
 @router.get(
@@ -58,16 +311,23 @@ async def get_books(
     response_model=BookList,
     summary="Busca libros por título y/o categoría",
 )
+@limiter.limit(settings.RATE_LIMIT_CACHED_READS)
 async def search_books(
+    request: Request,
     title: Optional[str] = Query(
         None, description="Título o parte del título para buscar"
     ),
     category: Optional[str] = Query(None, description="Categoría para filtrar libros"),
+    query: BookQuery = Depends(get_book_query),
     redis_service: RedisService = Depends(get_redis_service),
+    cache: ResponseCache = Depends(get_response_cache),
+    version_cache: VersionCache = Depends(get_catalog_version_cache),
+    startup: Optional[StartupScrape] = Depends(get_startup_scrape),
 ):
     """
     Busca libros por título y/o categoría.
     Al menos uno de los parámetros debe estar presente.
+    Admite los mismos filtros de precio, orden y paginación que /books.
     """
     if not title and not category:
         raise HTTPException(
@@ -75,5 +335,25 @@ async def search_books(
             detail="Debe proporcionar al menos un parámetro de búsqueda (título o categoría)",
         )
 
-    books = await redis_service.search_books(title, category)
-    return BookList(books=books)
+    async def build_result() -> BookList:
+        try:
+            if not title and not query.is_empty:
+                books, next_cursor = await redis_service.query_books(category, query)
+            else:
+                books = await redis_service.search_books(title, category)
+                books, next_cursor = paginate_books(books, query)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        return BookList(books=books, next_cursor=next_cursor)
+
+    return await serve_catalog_view(
+        request,
+        cache,
+        await version_cache.get(redis_service.get_catalog_version),
+        build_result,
+        "books/search",
+        startup,
+        title=title,
+        category=category,
+        **query.model_dump(),
+    )
@@ -1,7 +1,14 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request
 
+from app.core.config import settings
+from app.core.rate_limit import limiter
 from app.models.schemas import HeadlineList
-from app.services.headlines_service import HackerNewsIntegration, get_headlines_service
+from app.services.cache_service import RenderedResponse, not_modified_response
+from app.services.headlines_service import (
+    HeadlinesStore,
+    get_headlines_store,
+    snapshot_etag,
+)
 
 router = APIRouter()
 
@@ -11,11 +18,24 @@ router = APIRouter()
     response_model=HeadlineList,
     summary="Obtiene titulares actuales de Hacker News",
 )
+@limiter.limit(settings.RATE_LIMIT_SCRAPING)
 async def get_headlines(
-    service: HackerNewsIntegration = Depends(get_headlines_service)
+    request: Request,
+    refresh: bool = Query(
+        False, description="Fuerza un scraping nuevo en lugar de usar la caché"
+    ),
+    store: HeadlinesStore = Depends(get_headlines_store),
 ):
     """
-    Endpoint en tiempo real que obtiene los titulares actuales de Hacker News.
+    Endpoint que devuelve los titulares actuales de Hacker News.
+    Sirve la última instantánea guardada (indicada en `as_of`) y la refresca
+    en segundo plano cuando caduca. El ETag identifica la instantánea, así
+    que `If-None-Match` recibe un 304 mientras no haya una nueva.
     """
-    headlines = await service.fetch_top_stories()
-    return HeadlineList(headlines=headlines)
+    snapshot = await store.get_headlines(force_refresh=refresh)
+
+    max_age = settings.HEADLINES_CACHE_MAX_AGE
+    etag = snapshot_etag(snapshot)
+    if etag and (not_modified := not_modified_response(request, etag, max_age)):
+        return not_modified
+    return RenderedResponse.render(snapshot, etag=etag).to_response(request, max_age)
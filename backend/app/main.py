@@ -1,44 +1,93 @@
-from fastapi import FastAPI, BackgroundTasks
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_swagger_ui_html
 from contextlib import asynccontextmanager
-from slowapi import Limiter, _rate_limit_exceeded_handler
+import asyncio
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
-from slowapi.util import get_remote_address
 
 from app.endpoints import books, headlines
 from app.core.config import settings
 from app.core.middlewares import ExceptionMiddleware
-from app.scraping.scrape_books import BookScraper
-from app.services.redis_service import RedisService
+from app.core.rate_limit import (
+    limiter,
+    rate_limit_exceeded_handler,
+    rate_limit_rejections,
+)
+from app.services.headlines_service import (
+    HeadlinesStore,
+    close_http_session,
+    close_webdriver_pool,
+    init_http_session,
+    init_webdriver_pool,
+)
+from app.services.redis_service import (
+    RedisService,
+    create_redis_pool,
+    get_subscriber,
+)
+from app.services.job_service import CrawlJobs
+from app.services.scrape_service import (
+    close_parse_pool,
+    init_parse_pool,
+    run_periodic_book_refresh,
+)
+from app.services.startup_service import StartupScrape
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Run scraping at startup
-    async def run_scraping():
-        if await RedisService().get_books():
-            return
-
-        # Initialize the scraper
-        scraper = BookScraper(
-            base_url=settings.BOOK_SCRAPER_URL,
-            redis_service=RedisService(),
-            max_books=settings.MAX_BOOKS_TO_SCRAPE,
-            price_limit=settings.PRICE_LIMIT,
+    # Pool de conexiones Redis compartido por todas las peticiones
+    app.state.redis_pool = create_redis_pool()
+    # Una sola conexión pub/sub por worker para esperas de locks y streams SSE
+    redis_service = RedisService(
+        pool=app.state.redis_pool, subscriber=get_subscriber(app)
+    )
+
+    # Sesión HTTP y sesiones de navegador reutilizables para los titulares
+    init_http_session()
+    init_webdriver_pool()
+    # Pool de parseo de HTML reutilizado por todos los crawls del worker
+    init_parse_pool()
+
+    # Refresco periódico de titulares en segundo plano
+    app.state.headlines_store = HeadlinesStore(redis_service)
+    headlines_task = None
+    if settings.HEADLINES_REFRESH_INTERVAL > 0:
+        headlines_task = asyncio.create_task(
+            app.state.headlines_store.run_periodic_refresh()
+        )
+
+    # Jobs de scraping lanzados desde POST /init
+    app.state.crawl_jobs = CrawlJobs(redis_service)
+
+    # Scraping inicial en segundo plano: la API arranca sin esperar al crawl
+    app.state.startup_scrape = StartupScrape(redis_service)
+    app.state.startup_scrape.start()
+
+    # Refresco incremental periódico del catálogo
+    books_refresh_task = None
+    if settings.BOOK_REFRESH_INTERVAL > 0:
+        books_refresh_task = asyncio.create_task(
+            run_periodic_book_refresh(redis_service)
         )
-        books = await scraper.scrape_books()
-        if not books:
-            raise Exception("Error al inicializar la base de datos de libros")
-        return books
-
-    # Run the scraper
-    background_tasks = BackgroundTasks()
-    background_tasks.add_task(run_scraping)
-    await background_tasks.__call__()
     yield
 
+    await app.state.startup_scrape.stop()
+    await app.state.crawl_jobs.stop()
+    # Esperar a que las tareas terminen antes de cerrar lo que usan
+    background_tasks = [t for t in (books_refresh_task, headlines_task) if t]
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await app.state.headlines_store.stop()
+    await close_http_session()
+    await close_webdriver_pool()
+    close_parse_pool()
+    await app.state.redis_subscriber.close()
+    await app.state.redis_pool.aclose()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -46,7 +95,6 @@ app = FastAPI(
     docs_url=None,
     lifespan=lifespan,
 )
-limiter = Limiter(key_func=get_remote_address, default_limits=[settings.RATE_LIMIT])
 app.state.limiter = limiter
 
 # Configurar CORS
@@ -58,7 +106,7 @@ app.add_middleware(
     allow_headers=["*"],
 )
 app.add_middleware(ExceptionMiddleware)
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
 app.add_middleware(SlowAPIMiddleware)
 
 # Incluir routers
@@ -78,8 +126,41 @@ async def custom_swagger_ui_html():
 
 
 @app.get("/health", tags=["status"])
+@limiter.exempt
 async def health():
     """
-    Ruta que verifica que la API está en funcionamiento.
+    Ruta que verifica que la API está en funcionamiento (liveness).
     """
     return {"status": "healthy"}
+
+
+@app.get("/health/ready", tags=["status"])
+@limiter.exempt
+async def readiness():
+    """
+    Ruta que verifica que el catálogo inicial de libros está cargado
+    (readiness). Responde 503 con Retry-After mientras se carga.
+    """
+    startup_scrape = getattr(app.state, "startup_scrape", None)
+    if startup_scrape is None or startup_scrape.is_ready:
+        state = startup_scrape.state().model_dump(mode="json") if startup_scrape else None
+        return {"status": "ready", "startup": state}
+
+    return JSONResponse(
+        status_code=503,
+        content={
+            "status": "warming",
+            "startup": startup_scrape.state().model_dump(mode="json"),
+        },
+        headers={"Retry-After": str(settings.STARTUP_RETRY_AFTER)},
+    )
+
+
+@app.get("/metrics", tags=["status"])
+@limiter.exempt
+async def metrics():
+    """
+    Ruta con las métricas de este worker: peticiones rechazadas por el rate
+    limiter en cada ruta.
+    """
+    return {"rate_limit_rejections": rate_limit_rejections()}
@@ -1,4 +1,6 @@
-from typing import List, Optional
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, Field
 
 
@@ -7,6 +9,13 @@ class BookBase(BaseModel):
     price: float = Field(..., gt=0)
     category: str
     image_url: Optional[str] = None
+    detail_url: Optional[str] = None
+    # Datos de la página de detalle (solo si está activado el enriquecimiento)
+    upc: Optional[str] = None
+    availability: Optional[str] = None
+    stock: Optional[int] = None
+    rating: Optional[int] = Field(None, ge=1, le=5)
+    description: Optional[str] = None
 
 
 class Book(BookBase):
@@ -18,6 +27,24 @@ class Book(BookBase):
 
 class BookList(BaseModel):
     books: List[Book]
+    next_cursor: Optional[str] = None
+
+
+class BookSort(str, Enum):
+    price_asc = "price_asc"
+    price_desc = "price_desc"
+
+
+class BookQuery(BaseModel):
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    sort: Optional[BookSort] = None
+    limit: Optional[int] = None
+    cursor: Optional[str] = None
+
+    @property
+    def is_empty(self) -> bool:
+        return all(value is None for value in self.model_dump().values())
 
 
 class BookSearch(BaseModel):
@@ -33,3 +60,50 @@ class Headline(BaseModel):
 
 class HeadlineList(BaseModel):
     headlines: List[Headline]
+    as_of: Optional[datetime] = None
+
+
+class JobStatus(str, Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+class StartupState(BaseModel):
+    status: JobStatus
+    attempts: int = 0
+    books_scraped: int = 0
+    error: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class CrawlProgress(BaseModel):
+    pages_fetched: int = 0
+    books_collected: int = 0
+    books_stored: int = 0
+    errors: int = 0
+    retries: int = 0
+    requests_avoided: int = 0
+    pages_per_second: float = 0.0
+    books_per_second: float = 0.0
+    scheduler: Dict[str, Dict[str, Any]] = {}
+    details: Optional[Dict[str, int]] = None
+
+
+class CrawlStatus(BaseModel):
+    job_id: Optional[str] = None
+    status: JobStatus
+    owner: Optional[str] = None
+    fencing_token: Optional[int] = None
+    incremental: bool = False
+    progress: CrawlProgress = CrawlProgress()
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (JobStatus.done, JobStatus.failed)
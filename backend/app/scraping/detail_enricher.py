@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Enriquecimiento de libros con los datos de su página de detalle.
+"""
+
+import asyncio
+import hashlib
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.models.schemas import Book
+from app.scraping.write_buffer import FlushCallback
+from app.services.redis_service import RedisService
+
+FetchPage = Callable[[str, Dict[str, str]], Awaitable[Optional[Dict]]]
+ParseDetail = Callable[[str], Awaitable[Dict]]
+StoreBooks = Callable[[List[Book], Optional[FlushCallback]], Awaitable[None]]
+
+
+class BookDetailEnricher:
+    """
+    Completa los libros con UPC, disponibilidad, valoración y descripción.
+
+    Los libros llegan por una cola acotada que consumen `concurrency` workers
+    propios, de modo que el crawl de listados nunca espera por esta etapa:
+    si la cola está llena, el libro se omite hasta el siguiente crawl. Los
+    validadores HTTP (ETag, Last-Modified y hash del contenido) de cada página
+    de detalle se guardan en Redis, así que los libros sin cambios no se
+    vuelven a parsear ni a escribir.
+    """
+
+    def __init__(
+        self,
+        fetch_page: FetchPage,
+        parse_detail: ParseDetail,
+        store_books: StoreBooks,
+        redis_service: Optional[RedisService] = None,
+        concurrency: int = 2,
+        queue_size: int = 1000,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """
+        Args:
+            fetch_page: Descarga una página con cabeceras condicionales
+            parse_detail: Parsea el HTML de una página de detalle
+            store_books: Guarda libros y ejecuta el callback una vez guardados
+            redis_service: Servicio donde se guardan los validadores HTTP
+            concurrency: Número de páginas de detalle descargándose a la vez
+            queue_size: Número máximo de libros pendientes de enriquecer
+            logger: Logger a usar
+        """
+        self.fetch_page = fetch_page
+        self.parse_detail = parse_detail
+        self.store_books = store_books
+        self.redis_service = redis_service
+        self.concurrency = concurrency
+        self.logger = logger or logging.getLogger(__name__)
+
+        self.enriched = 0
+        self.unchanged = 0
+        self.skipped = 0
+        self.failed = 0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._workers: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Arranca los workers de enriquecimiento"""
+        if not self._workers:
+            self._workers = [
+                asyncio.create_task(self._work()) for _ in range(self.concurrency)
+            ]
+
+    def enqueue(self, books: List[Book]) -> int:
+        """
+        Encola libros para enriquecer sin bloquear al llamador.
+
+        Returns:
+            int: Número de libros encolados
+        """
+        queued = 0
+        for book in books:
+            if not book.detail_url:
+                continue
+            try:
+                self._queue.put_nowait(book)
+                queued += 1
+            except asyncio.QueueFull:
+                self.skipped += 1
+        return queued
+
+    async def join(self) -> None:
+        """Espera a que se procesen todos los libros encolados"""
+        await self._queue.join()
+
+    async def close(self) -> None:
+        """Detiene los workers; los libros aún en cola se descartan"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "enriched": self.enriched,
+            "unchanged": self.unchanged,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "pending": self._queue.qsize(),
+        }
+
+    async def enrich(self, book: Book) -> bool:
+        """
+        Descarga y parsea la página de detalle de un libro.
+
+        Returns:
+            bool: True si el libro se actualizó, False si no cambió o falló
+        """
+        url = book.detail_url
+        state = {}
+        if self.redis_service:
+            state = await self.redis_service.get_page_state(url)
+
+        conditional_headers = {}
+        if state.get("etag"):
+            conditional_headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            conditional_headers["If-Modified-Since"] = state["last_modified"]
+
+        page = await self.fetch_page(url, conditional_headers)
+        if not page:
+            self.failed += 1
+            return False
+
+        if page["status"] == 304:
+            self.unchanged += 1
+            return False
+        content_hash = hashlib.md5(page["html"].encode()).hexdigest()
+        if content_hash == state.get("content_hash"):
+            self.unchanged += 1
+            return False
+
+        for field, value in (await self.parse_detail(page["html"])).items():
+            setattr(book, field, value)
+
+        async def on_flushed(stored: bool):
+            # Los validadores se guardan solo cuando el libro ya está en Redis
+            if stored and self.redis_service:
+                await self.redis_service.set_page_state(
+                    url,
+                    {
+                        "etag": page["etag"],
+                        "last_modified": page["last_modified"],
+                        "content_hash": content_hash,
+                    },
+                )
+
+        await self.store_books([book], on_flushed)
+        self.enriched += 1
+        return True
+
+    async def _work(self) -> None:
+        while True:
+            book = await self._queue.get()
+            try:
+                await self.enrich(book)
+            except Exception as e:
+                self.failed += 1
+                self.logger.error(f"Error al enriquecer el libro {book.id}: {e}")
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Funciones puras de parseo del sitio de libros.
+
+No dependen del estado del scraper, de modo que pueden ejecutarse en un pool
+de procesos o de hilos y devolver solo los datos extraídos.
+"""
+
+import hashlib
+import logging
+import re
+from typing import Dict, List, Optional
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from app.models.schemas import Book
+
+logger = logging.getLogger(__name__)
+
+# Valoración en estrellas: clase CSS de "p.star-rating" -> número
+STAR_RATINGS = {"One": 1, "Two": 2, "Three": 3, "Four": 4, "Five": 5}
+
+try:
+    import lxml  # noqa: F401
+
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+
+def resolve_html_parser(parser: str) -> str:
+    """
+    Devuelve el backend de BeautifulSoup a usar; si se pide lxml y no está
+    instalado se usa el parser estándar "html.parser".
+    """
+    if parser == "lxml" and not LXML_AVAILABLE:
+        logger.warning("lxml no está instalado, se usará html.parser")
+        return "html.parser"
+    return parser
+
+
+def extract_price_value(price_text: str) -> float:
+    """
+    Convierte un texto de precio a un valor flotante.
+
+    Args:
+        price_text: Texto con el precio (ej: "£12.99")
+
+    Returns:
+        float: Valor del precio
+    """
+    try:
+        # Eliminar símbolo de moneda y convertir a flotante
+        price_match = re.search(r"£(\d+\.\d+)", price_text)
+        if price_match:
+            return float(price_match.group(1))
+        return 0.0
+    except Exception as e:
+        logger.error(f"Error al convertir precio '{price_text}': {e}")
+        return 0.0
+
+
+def extract_categories(soup: BeautifulSoup, base_url: str) -> List[Dict[str, str]]:
+    """
+    Extrae el nombre y la URL de las categorías de la página principal.
+    """
+    categories = []
+    # Navega a la sección de categorías
+    nav_soup = soup.select_one("div.side_categories > ul > li > ul")
+    for category_item in nav_soup.find_all("li"):
+        link = category_item.select_one("a")
+        if link:
+            category_name = link.text.strip()
+            category_url = urljoin(base_url, link["href"])
+            categories.append({"name": category_name, "url": category_url})
+    return categories
+
+
+def extract_books(
+    soup: BeautifulSoup,
+    category: str,
+    base_url: str,
+    price_limit: float,
+    page_url: Optional[str] = None,
+) -> List[Book]:
+    """
+    Extrae la información de los libros de una página.
+
+    Args:
+        soup: Objeto BeautifulSoup con el contenido de la página
+        category: Categoría de los libros
+        base_url: URL base para construir las URLs de las imágenes
+        price_limit: Precio máximo de los libros a incluir
+        page_url: URL de la página, para resolver los enlaces a los detalles
+
+    Returns:
+        List[Book]: Lista de objetos Book
+    """
+    books = []
+    try:
+        for book_soup in soup.select("article.product_pod"):
+            # Extraer título
+            title_element = book_soup.select_one("h3 a")
+            title = title_element.get("title", title_element.text.strip())
+
+            # Extraer y convertir precio
+            price_text = book_soup.select_one(".price_color").text.strip()
+            price = extract_price_value(price_text)
+
+            # Solo incluir libros por debajo del precio límite
+            if price > price_limit:
+                continue
+
+            # Crear URL completa de la imagen
+            image_element = book_soup.select_one(".image_container img")
+            relative_image_url = image_element.get("src", "")
+            image_url = urljoin(base_url, relative_image_url)
+
+            # Los enlaces al detalle son relativos a la página de listado
+            detail_url = urljoin(page_url or base_url, title_element.get("href", ""))
+
+            book_id = hashlib.md5(title.encode()).hexdigest()
+
+            book = Book(
+                id=book_id,
+                title=title,
+                price=price,
+                category=category,
+                image_url=image_url,
+                detail_url=detail_url,
+            )
+            books.append(book)
+
+        return books
+    except Exception as e:
+        logger.error(f"Error al extraer los libros: {e}")
+        return []
+
+
+def extract_next_page_url(soup: BeautifulSoup, current_url: str) -> Optional[str]:
+    """
+    Obtiene la URL de la siguiente página si existe.
+
+    Args:
+        soup: Objeto BeautifulSoup con el contenido de la página actual
+        current_url: URL de la página actual
+
+    Returns:
+        Optional[str]: URL de la siguiente página o None si no hay más páginas
+    """
+    try:
+        next_button = soup.select_one("li.next > a")
+        if next_button:
+            next_url = next_button.get("href")
+            # Construir URL completa
+            return urljoin(current_url, next_url)
+        return None
+    except Exception as e:
+        logger.error(f"Error al obtener la URL de la siguiente página: {e}")
+        return None
+
+
+def extract_page_urls(soup: BeautifulSoup, current_url: str) -> List[str]:
+    """
+    Deduce las URLs de todas las páginas siguientes de una categoría a partir
+    del paginador ("Page 1 of 8") y del enlace "next" ("page-2.html"), para
+    poder descargarlas en paralelo sin recorrerlas una a una.
+
+    Returns:
+        List[str]: URLs de las páginas siguientes, o lista vacía si el
+            paginador no tiene el formato esperado
+    """
+    current = soup.select_one("li.current")
+    next_button = soup.select_one("li.next > a")
+    if not current or not next_button:
+        return []
+
+    pages_match = re.search(r"Page\s+(\d+)\s+of\s+(\d+)", current.get_text())
+    next_href = next_button.get("href", "")
+    if not pages_match or not re.search(r"page-\d+\.html$", next_href):
+        return []
+
+    page, total_pages = int(pages_match.group(1)), int(pages_match.group(2))
+    return [
+        urljoin(current_url, re.sub(r"page-\d+\.html$", f"page-{n}.html", next_href))
+        for n in range(page + 1, total_pages + 1)
+    ]
+
+
+def parse_categories_page(
+    html: str, base_url: str, parser: str = "html.parser"
+) -> List[Dict[str, str]]:
+    """Parsea la página principal y devuelve sus categorías"""
+    soup = BeautifulSoup(html, resolve_html_parser(parser))
+    return extract_categories(soup, base_url)
+
+
+def parse_listing_page(
+    html: str,
+    category: str,
+    page_url: str,
+    base_url: str,
+    price_limit: float,
+    parser: str = "html.parser",
+) -> Dict:
+    """
+    Parsea una página de listado de una categoría.
+
+    Returns:
+        Dict: Libros encontrados ("books"), URL de la página siguiente
+            ("next_url") y URLs de todas las páginas siguientes ("page_urls")
+    """
+    soup = BeautifulSoup(html, resolve_html_parser(parser))
+    return {
+        "books": extract_books(soup, category, base_url, price_limit, page_url),
+        "next_url": extract_next_page_url(soup, page_url),
+        "page_urls": extract_page_urls(soup, page_url),
+    }
+
+
+def parse_detail_page(html: str, parser: str = "html.parser") -> Dict:
+    """
+    Parsea la página de detalle de un libro.
+
+    Returns:
+        Dict: UPC, disponibilidad, unidades en stock, valoración (1-5) y
+            descripción; None en los campos que no aparezcan en la página
+    """
+    soup = BeautifulSoup(html, resolve_html_parser(parser))
+
+    # Tabla "Product Information": cabecera -> valor
+    product_info = {
+        row.th.get_text(strip=True): row.td.get_text(strip=True)
+        for row in soup.select("table tr")
+        if row.th and row.td
+    }
+
+    availability = product_info.get("Availability")
+    if not availability:
+        availability_element = soup.select_one(".product_main .availability")
+        if availability_element:
+            availability = availability_element.get_text(" ", strip=True)
+    stock_match = re.search(r"(\d+)\s+available", availability or "")
+
+    rating = None
+    rating_element = soup.select_one(".product_main p.star-rating, p.star-rating")
+    if rating_element:
+        rating = next(
+            (
+                STAR_RATINGS[css_class]
+                for css_class in rating_element.get("class", [])
+                if css_class in STAR_RATINGS
+            ),
+            None,
+        )
+
+    description = None
+    description_header = soup.select_one("#product_description")
+    if description_header:
+        description_element = description_header.find_next_sibling("p")
+        if description_element:
+            description = description_element.get_text(strip=True)
+
+    return {
+        "upc": product_info.get("UPC"),
+        "availability": availability,
+        "stock": int(stock_match.group(1)) if stock_match else None,
+        "rating": rating,
+        "description": description,
+    }
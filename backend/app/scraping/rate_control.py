@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Planificador adaptativo de concurrencia por host (AIMD).
+
+Aumenta poco a poco las peticiones simultáneas contra un host mientras
+responde rápido y las reduce a la mitad ante respuestas 429/5xx, errores de
+red o latencias por encima del objetivo. También respeta Retry-After.
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Deque, Dict, Optional
+from urllib.parse import urlsplit
+
+# Ventana (en segundos) usada para calcular el ritmo de peticiones
+RATE_WINDOW = 10.0
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Convierte una cabecera Retry-After (segundos o fecha HTTP) en segundos
+    de espera. Devuelve None si no hay cabecera o no es válida.
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+@dataclass
+class HostState:
+    """Estado de control de un host."""
+
+    limit: float
+    in_flight: int = 0
+    latency: Optional[float] = None
+    blocked_until: float = 0.0
+    last_decrease: float = 0.0
+    requests: int = 0
+    errors: int = 0
+    throttled: int = 0
+    completed: Deque[float] = field(default_factory=deque)
+    condition: asyncio.Condition = field(default_factory=asyncio.Condition)
+
+
+class RequestSlot:
+    """Permite registrar el resultado de una petición dentro de un slot."""
+
+    def __init__(self):
+        self.status: Optional[int] = None
+        self.retry_after: Optional[float] = None
+
+    def record(self, status: int, retry_after: Optional[str] = None) -> None:
+        self.status = status
+        self.retry_after = parse_retry_after(retry_after)
+
+
+class AdaptiveHostScheduler:
+    """
+    Limita las peticiones en curso por host con un esquema AIMD
+    (incremento aditivo, decremento multiplicativo).
+    """
+
+    def __init__(
+        self,
+        initial_concurrency: int = 5,
+        min_concurrency: int = 1,
+        max_concurrency: int = 20,
+        target_latency: float = 1.0,
+        decrease_factor: float = 0.5,
+    ):
+        """
+        Args:
+            initial_concurrency: Peticiones simultáneas iniciales por host
+            min_concurrency: Suelo de peticiones simultáneas
+            max_concurrency: Techo de peticiones simultáneas
+            target_latency: Latencia (s) por encima de la cual se reduce el ritmo
+            decrease_factor: Factor aplicado al límite al reducirlo
+        """
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max(max_concurrency, min_concurrency)
+        self.initial_concurrency = min(
+            max(initial_concurrency, min_concurrency), self.max_concurrency
+        )
+        self.target_latency = target_latency
+        self.decrease_factor = decrease_factor
+        self.hosts: Dict[str, HostState] = {}
+
+    def _host_state(self, url: str) -> HostState:
+        host = urlsplit(url).netloc
+        if host not in self.hosts:
+            self.hosts[host] = HostState(limit=float(self.initial_concurrency))
+        return self.hosts[host]
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[RequestSlot]:
+        """
+        Espera un hueco para hacer una petición a `url` y ajusta el límite del
+        host con el resultado registrado en el slot (o con la excepción).
+        """
+        state = self._host_state(url)
+        async with state.condition:
+            while True:
+                wait = state.blocked_until - time.monotonic()
+                if wait <= 0 and state.in_flight < int(state.limit):
+                    break
+                try:
+                    await asyncio.wait_for(
+                        state.condition.wait(), timeout=wait if wait > 0 else None
+                    )
+                except asyncio.TimeoutError:
+                    pass
+            state.in_flight += 1
+
+        slot = RequestSlot()
+        started = time.monotonic()
+        failed = cancelled = False
+        try:
+            yield slot
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        except Exception:
+            failed = True
+            raise
+        finally:
+            async with state.condition:
+                state.in_flight -= 1
+                # Una petición cancelada no dice nada sobre el estado del host
+                if not cancelled:
+                    self._adjust(state, slot, time.monotonic() - started, failed)
+                state.condition.notify_all()
+
+    def _adjust(
+        self, state: HostState, slot: RequestSlot, latency: float, failed: bool
+    ) -> None:
+        now = time.monotonic()
+        state.requests += 1
+        state.completed.append(now)
+        while state.completed and now - state.completed[0] > RATE_WINDOW:
+            state.completed.popleft()
+
+        throttled = slot.status == 429 or (slot.status or 0) >= 500
+        # Un error sin estado HTTP es un fallo de red o un timeout
+        if throttled or (failed and slot.status is None):
+            state.errors += 1
+            state.throttled += int(throttled)
+            if slot.retry_after:
+                state.blocked_until = max(state.blocked_until, now + slot.retry_after)
+            self._decrease(state, now)
+            return
+
+        state.latency = (
+            latency if state.latency is None else 0.7 * state.latency + 0.3 * latency
+        )
+        if state.latency > self.target_latency:
+            self._decrease(state, now)
+        else:
+            # Incremento aditivo: ~+1 por cada "ventana" de `limit` respuestas
+            state.limit = min(self.max_concurrency, state.limit + 1 / state.limit)
+
+    def _decrease(self, state: HostState, now: float) -> None:
+        # Como mucho una reducción por latencia observada, para no desplomar
+        # el límite con una ráfaga de respuestas lentas de la misma tanda
+        if now - state.last_decrease < (state.latency or self.target_latency):
+            return
+        state.last_decrease = now
+        state.limit = max(self.min_concurrency, state.limit * self.decrease_factor)
+
+    def stats(self) -> Dict[str, Dict]:
+        """Ritmo y concurrencia actuales de cada host, para monitorización"""
+        now = time.monotonic()
+        return {
+            host: {
+                "concurrency_limit": int(state.limit),
+                "in_flight": state.in_flight,
+                "latency_ms": (
+                    round(state.latency * 1000) if state.latency is not None else None
+                ),
+                "requests_per_second": round(
+                    sum(1 for t in state.completed if now - t <= RATE_WINDOW)
+                    / RATE_WINDOW,
+                    2,
+                ),
+                "requests": state.requests,
+                "errors": state.errors,
+                "throttled": state.throttled,
+                "blocked_for": round(max(state.blocked_until - now, 0.0), 2),
+            }
+            for host, state in self.hosts.items()
+        }
@@ -7,17 +7,36 @@ Script para hacer web scraping asíncrono de una página de libros y guardar los
 import aiohttp
 import asyncio
 from bs4 import BeautifulSoup
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 import logging
 import hashlib
+import itertools
+import multiprocessing
 import os
-from typing import List, Dict, Optional
-import re
-from urllib.parse import urljoin
+import time
+from typing import Awaitable, Callable, List, Dict, Optional, Set
 
+from app.scraping import parsers
+from app.scraping.detail_enricher import BookDetailEnricher
+from app.scraping.rate_control import AdaptiveHostScheduler, parse_retry_after
+from app.scraping.write_buffer import BookWriteBuffer, FlushCallback
 from app.services.redis_service import RedisService
 from app.models.schemas import Book
 
 
+def create_parse_pool(parse_executor: str, workers: int) -> Optional[Executor]:
+    """Crea el pool de parseo ("process" o "thread"); None para "inline"."""
+    if parse_executor == "process":
+        # spawn evita heredar hilos y conexiones abiertas del proceso de la API
+        return ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    if parse_executor == "thread":
+        return ThreadPoolExecutor(max_workers=workers)
+    return None
+
+
 class BookScraper:
     """Clase para hacer scraping asíncrono de libros de un sitio web de prueba."""
 
@@ -29,6 +48,24 @@ class BookScraper:
         price_limit: float = 20.0,
         logs_dir: str = "logs",
         max_concurrent_requests: int = 5,
+        min_concurrent_requests: int = 1,
+        max_concurrent_requests_limit: int = 20,
+        target_latency: float = 1.0,
+        incremental: bool = False,
+        parse_executor: str = "process",
+        parse_workers: Optional[int] = None,
+        max_concurrent_parses: Optional[int] = None,
+        parse_pool: Optional[Executor] = None,
+        html_parser: str = "html.parser",
+        write_batch_size: int = 100,
+        write_flush_interval: float = 0.5,
+        workers: Optional[int] = None,
+        enrich_details: bool = False,
+        detail_concurrency: int = 2,
+        detail_queue_size: int = 1000,
+        max_retries: int = 3,
+        retry_backoff: float = 1.0,
+        on_listing_done: Optional[Callable[[List[Book]], Awaitable[None]]] = None,
     ):
         """
         Inicializa el scraper con la URL base y configuración de Redis.
@@ -40,7 +77,34 @@ class BookScraper:
             max_books: Número máximo de libros a scrapear
             price_limit: Precio máximo de los libros a scrapear (en libras)
             logs_dir: Directorio para logs
-            max_concurrent_requests: Número máximo de solicitudes concurrentes
+            max_concurrent_requests: Número inicial de solicitudes concurrentes por
+                host; se ajusta según la latencia y los errores observados
+            min_concurrent_requests: Suelo de solicitudes concurrentes por host
+            max_concurrent_requests_limit: Techo de solicitudes concurrentes por host
+            target_latency: Latencia (s) por encima de la cual se reduce el ritmo
+            incremental: Usa peticiones condicionales y omite las páginas sin
+                cambios desde el último crawl; permite reanudar tras un fallo
+            parse_executor: Dónde se parsea el HTML: "process", "thread" o
+                "inline" (en el propio event loop)
+            parse_workers: Número de workers del pool de parseo
+            max_concurrent_parses: Número máximo de páginas parseándose a la vez
+            parse_pool: Pool de parseo compartido (p. ej. el de la aplicación);
+                si no se da, cada `scrape_books` crea y cierra el suyo
+            html_parser: Backend de BeautifulSoup ("html.parser" o "lxml")
+            write_batch_size: Número de libros por escritura en Redis
+            write_flush_interval: Segundos máximos antes de escribir el buffer
+            workers: Número de workers que consumen la frontera de páginas
+                (por defecto, el techo de solicitudes concurrentes)
+            enrich_details: Completa los libros con su página de detalle
+            detail_concurrency: Páginas de detalle descargándose a la vez; el
+                enriquecimiento tiene su propio planificador con este techo
+            detail_queue_size: Libros pendientes de enriquecer como máximo
+            max_retries: Reintentos de una página que responde 429 o 5xx
+            retry_backoff: Espera base (s) entre reintentos sin Retry-After;
+                se duplica en cada intento
+            on_listing_done: Callback con los libros recopilados que se ejecuta
+                al terminar el crawl de listados, antes de esperar a que se
+                vacíe la cola de enriquecimiento
         """
         self.base_url = base_url
         self.redis_service = redis_service
@@ -50,10 +114,60 @@ class BookScraper:
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3"
         }
         self.max_concurrent_requests = max_concurrent_requests
-        self.semaphore = asyncio.Semaphore(max_concurrent_requests)
+        self.scheduler = AdaptiveHostScheduler(
+            initial_concurrency=max_concurrent_requests,
+            min_concurrency=min_concurrent_requests,
+            max_concurrency=max_concurrent_requests_limit,
+            target_latency=target_latency,
+        )
+        # Las páginas de detalle no comparten la concurrencia de los listados
+        # ni les afectan sus 429/5xx
+        self.detail_scheduler = AdaptiveHostScheduler(
+            initial_concurrency=detail_concurrency,
+            min_concurrency=1,
+            max_concurrency=detail_concurrency,
+            target_latency=target_latency,
+        )
         self.total_books_collected = 0
         self.book_collection_lock = asyncio.Lock()
         self.logs_dir = logs_dir
+        self.incremental = incremental and redis_service is not None
+        self.parse_executor = parse_executor
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.parse_semaphore = asyncio.Semaphore(
+            max_concurrent_parses or self.parse_workers
+        )
+        self.shared_parse_pool = parse_pool
+        self.parse_pool: Optional[Executor] = None
+        self.html_parser = html_parser
+        self.write_batch_size = write_batch_size
+        self.write_flush_interval = write_flush_interval
+        self.write_buffer: Optional[BookWriteBuffer] = None
+        self.workers = workers or max_concurrent_requests_limit
+        self.frontier: Optional[asyncio.PriorityQueue] = None
+        self.frontier_counter = itertools.count()
+        self.seen_urls: Set[str] = set()
+        self.crawl_stopped = asyncio.Event()
+        self.inflight_requests: Set[asyncio.Task] = set()
+        self.requests_avoided = 0
+        # Contadores del crawl en curso que se publican con `progress`
+        self.pages_fetched = 0
+        self.fetch_errors = 0
+        self.retries = 0
+        self.books_stored = 0
+        self.books_failed = 0
+        self.started_at: Optional[float] = None
+        self.detail_stats: Optional[Dict[str, int]] = None
+        self.enrich_details = enrich_details
+        self.detail_concurrency = detail_concurrency
+        self.detail_queue_size = detail_queue_size
+        self.detail_enricher: Optional[BookDetailEnricher] = None
+        self.detail_pages_fetched = 0
+        self.detail_fetch_errors = 0
+        self.detail_retries = 0
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.on_listing_done = on_listing_done
 
         # Configuración del logger
         os.makedirs(self.logs_dir, exist_ok=True)
@@ -77,41 +191,127 @@ class BookScraper:
         Returns:
             float: Valor del precio
         """
-        try:
-            # Eliminar símbolo de moneda y convertir a flotante
-            price_match = re.search(r"£(\d+\.\d+)", price_text)
-            if price_match:
-                return float(price_match.group(1))
-            return 0.0
-        except Exception as e:
-            self.logger.error(f"Error al convertir precio '{price_text}': {e}")
-            return 0.0
+        return parsers.extract_price_value(price_text)
 
-    async def get_page_content(
-        self, url: str, session: aiohttp.ClientSession
-    ) -> Optional[BeautifulSoup]:
+    async def fetch_html(
+        self,
+        url: str,
+        session: aiohttp.ClientSession,
+        extra_headers: Optional[Dict[str, str]] = None,
+    ) -> Optional[Dict]:
         """
-        Obtiene el contenido HTML de una página y lo devuelve como un objeto BeautifulSoup.
+        Descarga una página, opcionalmente con cabeceras condicionales.
 
         Args:
-            url: URL de la página a scrapear
+            url: URL de la página a descargar
             session: Sesión aiohttp activa
+            extra_headers: Cabeceras adicionales (p. ej. If-None-Match)
 
         Returns:
-            BeautifulSoup: Objeto con el contenido de la página o None si hay error
+            Dict: Estado HTTP, HTML (None si es un 304), ETag y Last-Modified,
+                o None si hay error o el crawl se detuvo
+        """
+        if self.crawl_stopped.is_set():
+            self.requests_avoided += 1
+            return None
+
+        # Tarea propia para que `stop_crawl` pueda cancelar la petición en curso
+        request = asyncio.create_task(self.request_page(url, session, extra_headers))
+        self.inflight_requests.add(request)
+        request.add_done_callback(self.inflight_requests.discard)
+        try:
+            return await request
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling():
+                raise
+            self.requests_avoided += 1
+            return None
+
+    async def request_page(
+        self,
+        url: str,
+        session: aiohttp.ClientSession,
+        extra_headers: Optional[Dict[str, str]] = None,
+        detail: bool = False,
+    ) -> Optional[Dict]:
         """
-        async with self.semaphore:
+        Hace la petición HTTP de `fetch_html` respetando el planificador.
+
+        Una respuesta 429 o 5xx se reintenta hasta `max_retries` veces: tras
+        el Retry-After indicado (el planificador bloquea el host hasta
+        entonces) o, si no lo hay, tras una espera exponencial.
+
+        Con `detail` la petición es de una página de detalle: usa el
+        planificador del enriquecimiento y cuenta en sus propios contadores.
+        """
+        scheduler = self.detail_scheduler if detail else self.scheduler
+        for attempt in range(self.max_retries + 1):
+            delay = 0.0
             try:
-                async with session.get(
-                    url, headers=self.headers, timeout=10
-                ) as response:
-                    response.raise_for_status()
-                    html = await response.text()
-                    return BeautifulSoup(html, "html.parser")
+                async with scheduler.slot(url) as slot:
+                    async with session.get(
+                        url, headers={**self.headers, **(extra_headers or {})}, timeout=10
+                    ) as response:
+                        retry_after = response.headers.get("Retry-After")
+                        slot.record(response.status, retry_after)
+                        retryable = response.status == 429 or response.status >= 500
+                        if retryable and attempt < self.max_retries:
+                            if parse_retry_after(retry_after) is None:
+                                delay = self.retry_backoff * 2**attempt
+                        else:
+                            html = None
+                            if response.status != 304:
+                                response.raise_for_status()
+                                html = await response.text()
+                            if detail:
+                                self.detail_pages_fetched += 1
+                            else:
+                                self.pages_fetched += 1
+                            return {
+                                "status": response.status,
+                                "html": html,
+                                "etag": response.headers.get("ETag"),
+                                "last_modified": response.headers.get("Last-Modified"),
+                            }
             except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if detail:
+                    self.detail_fetch_errors += 1
+                else:
+                    self.fetch_errors += 1
                 self.logger.error(f"Error al obtener la página {url}: {e}")
                 return None
 
+            if detail:
+                self.detail_retries += 1
+            else:
+                self.retries += 1
+            self.logger.warning(
+                f"Página {url} limitada por el servidor ({response.status}); "
+                f"reintento {attempt + 1} de {self.max_retries}"
+            )
+            await asyncio.sleep(delay)
+
+    async def parse(self, parse_func: Callable, *args):
+        """
+        Ejecuta una función de parseo en el pool configurado, fuera del event loop.
+        Si no hay pool (scraper usado fuera de `scrape_books`) se ejecuta en línea.
+
+        Args:
+            parse_func: Función pura de `app.scraping.parsers`
+            args: Argumentos de la función (el HTML en primer lugar)
+        """
+        async with self.parse_semaphore:
+            if self.parse_pool is None:
+                return parse_func(*args)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.parse_pool, partial(parse_func, *args)
+            )
+
+    def create_parse_pool(self) -> Optional[Executor]:
+        """Crea el pool de parseo según `parse_executor`"""
+        return create_parse_pool(self.parse_executor, self.parse_workers)
+
     async def get_categories(
         self, session: aiohttp.ClientSession
     ) -> List[Dict[str, str]]:
@@ -124,21 +324,17 @@ class BookScraper:
         Returns:
             List[Dict[str, str]]: Lista de diccionarios con nombre y URL de categorías
         """
-        categories = []
         try:
-            soup = await self.get_page_content(self.base_url, session)
-            if not soup:
+            page = await self.fetch_html(self.base_url, session)
+            if not page:
                 return []
 
-            # Navega a la sección de categorías
-            nav_soup = soup.select_one("div.side_categories > ul > li > ul")
-            for category_item in nav_soup.find_all("li"):
-                link = category_item.select_one("a")
-                if link:
-                    category_name = link.text.strip()
-                    category_url = urljoin(self.base_url, link["href"])
-                    categories.append({"name": category_name, "url": category_url})
-
+            categories = await self.parse(
+                parsers.parse_categories_page,
+                page["html"],
+                self.base_url,
+                self.html_parser,
+            )
             self.logger.info(f"Se encontraron {len(categories)} categorías")
             return categories
         except Exception as e:
@@ -156,41 +352,7 @@ class BookScraper:
         Returns:
             List[Book]: Lista de objetos Book
         """
-        books = []
-        try:
-            for book_soup in soup.select("article.product_pod"):
-                # Extraer título
-                title_element = book_soup.select_one("h3 a")
-                title = title_element.get("title", title_element.text.strip())
-
-                # Extraer y convertir precio
-                price_text = book_soup.select_one(".price_color").text.strip()
-                price = self.extract_price_value(price_text)
-
-                # Solo incluir libros por debajo del precio límite
-                if price > self.price_limit:
-                    continue
-
-                # Crear URL completa de la imagen
-                image_element = book_soup.select_one(".image_container img")
-                relative_image_url = image_element.get("src", "")
-                image_url = urljoin(self.base_url, relative_image_url)
-
-                book_id = hashlib.md5(title.encode()).hexdigest()
-
-                book = Book(
-                    id=book_id,
-                    title=title,
-                    price=price,
-                    category=category,
-                    image_url=image_url,
-                )
-                books.append(book)
-
-            return books
-        except Exception as e:
-            self.logger.error(f"Error al extraer los libros: {e}")
-            return []
+        return parsers.extract_books(soup, category, self.base_url, self.price_limit)
 
     def get_next_page_url(self, soup: BeautifulSoup, current_url: str) -> Optional[str]:
         """
@@ -203,16 +365,24 @@ class BookScraper:
         Returns:
             Optional[str]: URL de la siguiente página o None si no hay más páginas
         """
-        try:
-            next_button = soup.select_one("li.next > a")
-            if next_button:
-                next_url = next_button.get("href")
-                # Construir URL completa
-                return urljoin(current_url, next_url)
-            return None
-        except Exception as e:
-            self.logger.error(f"Error al obtener la URL de la siguiente página: {e}")
-            return None
+        return parsers.extract_next_page_url(soup, current_url)
+
+    async def parse_listing(self, html: str, url: str, category_name: str) -> Dict:
+        """
+        Parsea una página de listado en el pool de parseo.
+
+        Returns:
+            Dict: Diccionario con libros encontrados y próxima URL
+        """
+        return await self.parse(
+            parsers.parse_listing_page,
+            html,
+            category_name,
+            url,
+            self.base_url,
+            self.price_limit,
+            self.html_parser,
+        )
 
     async def save_to_redis(self, book: Book) -> bool:
         """
@@ -252,91 +422,380 @@ class BookScraper:
             all_books: Lista de todos los libros recopilados
 
         Returns:
-            Dict: Diccionario con libros encontrados y próxima URL
+            Dict: Diccionario con libros encontrados, próxima URL y, si no se
+                pudo descargar la página, `failed`
         """
+        if self.incremental:
+            return await self.process_page_incremental(url, category_name, session)
+
         # Obtener contenido de la página
-        soup = await self.get_page_content(url, session)
-        if not soup:
-            return {"books": [], "next_url": None}
+        page = await self.fetch_html(url, session)
+        if not page or self.crawl_stopped.is_set():
+            return {"books": [], "next_url": None, "failed": True}
+
+        # Extraer libros y URL de la siguiente página fuera del event loop
+        return await self.parse_listing(page["html"], url, category_name)
 
-        # Extraer libros de la página
-        page_books = self.extract_books_from_page(soup, category_name)
+    async def process_page_incremental(
+        self, url: str, category_name: str, session: aiohttp.ClientSession
+    ) -> Dict:
+        """
+        Procesa una página usando el estado guardado del crawl anterior.
+
+        Envía If-None-Match / If-Modified-Since con los validadores guardados y
+        compara el hash del contenido, de modo que una página sin cambios no se
+        vuelve a parsear ni a guardar.
+
+        Returns:
+            Dict: Libros, próxima URL y, según el caso, `unchanged` con el número
+                de libros guardados previamente (`book_count`) o el `page_state`
+                a persistir una vez guardados los libros
+        """
+        state = await self.redis_service.get_page_state(url)
+        conditional_headers = {}
+        if state.get("etag"):
+            conditional_headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            conditional_headers["If-Modified-Since"] = state["last_modified"]
+
+        page = await self.fetch_html(url, session, conditional_headers)
+        if not page or self.crawl_stopped.is_set():
+            return {"books": [], "next_url": None, "failed": True}
+
+        unchanged_result = {
+            "books": [],
+            "next_url": state.get("next_url") or None,
+            "unchanged": True,
+            "book_count": int(state.get("books", 0)),
+        }
+        if page["status"] == 304:
+            self.logger.info(f"Página sin cambios (304): {url}")
+            return unchanged_result
+
+        content_hash = hashlib.md5(page["html"].encode()).hexdigest()
+        if content_hash == state.get("content_hash"):
+            self.logger.info(f"Página sin cambios (mismo contenido): {url}")
+            return unchanged_result
+
+        parsed = await self.parse_listing(page["html"], url, category_name)
+        page_books = parsed["books"]
+        next_url = parsed["next_url"]
+
+        return {
+            "books": page_books,
+            "next_url": next_url,
+            "page_state": {
+                "etag": page["etag"],
+                "last_modified": page["last_modified"],
+                "content_hash": content_hash,
+                "next_url": next_url or "",
+                "books": str(len(page_books)),
+            },
+        }
+
+    def enqueue_page(
+        self, depth: int, url: Optional[str], category_data: Dict[str, str]
+    ) -> bool:
+        """
+        Añade una página a la frontera del crawl si no se había visto antes.
+        Las páginas menos profundas salen antes (recorrido en anchura).
+
+        Args:
+            depth: Profundidad de la página dentro de su categoría
+            url: URL de la página
+            category_data: Diccionario con nombre y URL de la categoría
 
-        # Determinar la URL de la siguiente página
-        next_url = self.get_next_page_url(soup, url)
+        Returns:
+            bool: True si la página se encoló
+        """
+        if not url or url in self.seen_urls:
+            return False
+        self.seen_urls.add(url)
+        self.frontier.put_nowait(
+            (depth, next(self.frontier_counter), url, category_data)
+        )
+        return True
 
-        return {"books": page_books, "next_url": next_url}
+    def enqueue_next_pages(
+        self, depth: int, result: Dict, category_data: Dict[str, str]
+    ) -> None:
+        """Encola las páginas que siguen a una página ya procesada"""
+        # En modo incremental cada categoría se recorre en orden para que su
+        # checkpoint (la siguiente página pendiente) siga siendo válido
+        page_urls = [] if self.incremental else result.get("page_urls") or []
+        for offset, url in enumerate(page_urls or [result["next_url"]], start=1):
+            self.enqueue_page(depth + offset, url, category_data)
+
+    async def crawl_worker(
+        self, session: aiohttp.ClientSession, all_books: List[Book]
+    ) -> None:
+        """
+        Worker que consume páginas de la frontera hasta que se cancela.
+        Detenido el crawl, descarta las páginas pendientes sin descargarlas.
+        """
+        while True:
+            depth, _, url, category_data = await self.frontier.get()
+            try:
+                if self.crawl_stopped.is_set():
+                    self.requests_avoided += 1
+                else:
+                    await self.scrape_page(
+                        depth, url, category_data, session, all_books
+                    )
+            except Exception as e:
+                self.logger.error(f"Error al procesar la página {url}: {e}")
+            finally:
+                self.frontier.task_done()
 
-    async def scrape_category(
+    async def scrape_page(
         self,
+        depth: int,
+        url: str,
         category_data: Dict[str, str],
         session: aiohttp.ClientSession,
         all_books: List[Book],
     ) -> None:
         """
-        Realiza el scraping de una categoría, navegando por sus páginas.
+        Procesa una página de la frontera: reserva plazas en el contador
+        global, guarda sus libros y encola las páginas siguientes.
 
         Args:
+            depth: Profundidad de la página dentro de su categoría
+            url: URL de la página
             category_data: Diccionario con nombre y URL de la categoría
             session: Sesión aiohttp activa
-            redis_client: Cliente de Redis asíncrono
             all_books: Lista compartida para almacenar todos los libros
         """
         category_name = category_data["name"]
-        url = category_data["url"]
-        self.logger.info(f"Iniciando scraping de la categoría: {category_name}")
+        category_url = category_data["url"]
+        self.logger.info(f"Procesando página {url} de la categoría {category_name}")
 
-        page_num = 1
-
-        while url:
-            self.logger.info(
-                f"Procesando página {page_num} de la categoría {category_name}"
-            )
+        result = await self.process_page(url, category_name, session, all_books)
+        page_books = result["books"]
 
+        if result.get("unchanged"):
+            # Los libros de una página sin cambios ya están en Redis
             async with self.book_collection_lock:
-                # Verificar si ya alcanzamos el límite global de libros
+                remaining_slots = self.max_books - self.total_books_collected
+                self.total_books_collected += min(
+                    result["book_count"], max(remaining_slots, 0)
+                )
                 if self.total_books_collected >= self.max_books:
-                    break
-
-            # Procesar página
-            result = await self.process_page(
-                url, category_name, session, all_books
+                    self.stop_crawl()
+            await self.store_books(
+                [], self.page_done_callback(category_url, url, result)
+            )
+            self.enqueue_next_pages(depth, result, category_data)
+            return
+
+        if result.get("failed"):
+            return
+
+        # El lock solo protege la reserva de plazas en el contador global
+        async with self.book_collection_lock:
+            # Determinar cuántos libros podemos agregar sin exceder el límite
+            remaining_slots = self.max_books - self.total_books_collected
+
+            if remaining_slots <= 0:
+                return
+
+            # Tomar solo los libros necesarios
+            books_to_add = page_books[:remaining_slots]
+            self.total_books_collected += len(books_to_add)
+            all_books.extend(books_to_add)
+            if self.total_books_collected >= self.max_books:
+                self.stop_crawl()
+
+        # Si no pudimos agregar todos los libros, hemos alcanzado el límite
+        if len(books_to_add) < len(page_books):
+            await self.store_books(
+                books_to_add, self.enrichment_callback(books_to_add)
             )
-            page_books = result["books"]
+            return
+
+        # La página se marca como procesada cuando sus libros estén guardados
+        await self.store_books(
+            books_to_add,
+            self.enrichment_callback(
+                books_to_add, self.page_done_callback(category_url, url, result)
+            ),
+        )
+        self.enqueue_next_pages(depth, result, category_data)
 
-            if not page_books:
-                break
+    def stop_crawl(self, reason: Optional[str] = None) -> None:
+        """
+        Señal de parada cooperativa (al alcanzar el límite de libros o por
+        `reason`): cancela las peticiones en curso y hace que los workers
+        descarten las páginas pendientes.
+        """
+        if self.crawl_stopped.is_set():
+            return
+        self.crawl_stopped.set()
+        reason = reason or f"Límite de {self.max_books} libros alcanzado"
+        self.logger.info(
+            f"{reason}; cancelando {len(self.inflight_requests)} peticiones en curso"
+        )
+        for request in list(self.inflight_requests):
+            request.cancel()
 
-            # Actualizar contador global y libros recopilados
-            async with self.book_collection_lock:
-                # Determinar cuántos libros podemos agregar sin exceder el límite
-                remaining_slots = self.max_books - self.total_books_collected
+    async def store_books(
+        self, books: List[Book], on_flushed: Optional[FlushCallback] = None
+    ) -> None:
+        """
+        Envía libros al buffer de escritura o, si no hay buffer (scraper usado
+        fuera de `scrape_books`), los guarda directamente uno a uno.
+
+        Args:
+            books: Libros a guardar
+            on_flushed: Callback a ejecutar tras guardar los libros (recibe si se
+                guardaron)
+        """
+        if self.write_buffer:
+            await self.write_buffer.add(books, on_flushed)
+            return
+
+        stored = [await self.save_to_redis(book) for book in books]
+        if on_flushed:
+            await on_flushed(all(stored))
+
+    def enrichment_callback(
+        self, books: List[Book], on_flushed: Optional[FlushCallback] = None
+    ) -> Optional[FlushCallback]:
+        """
+        Si el enriquecimiento está activo, devuelve un callback que encola los
+        libros para completar con su página de detalle una vez guardados (y
+        después ejecuta `on_flushed`).
+        """
+        if not self.detail_enricher or not books:
+            return on_flushed
+
+        async def enqueue_for_details(stored: bool):
+            # Sin los libros en Redis no hay nada que completar
+            if stored:
+                self.detail_enricher.enqueue(books)
+            if on_flushed:
+                await on_flushed(stored)
 
-                if remaining_slots <= 0:
-                    break
+        return enqueue_for_details
 
-                # Tomar solo los libros necesarios
-                books_to_add = page_books[:remaining_slots]
+    async def parse_detail(self, html: str) -> Dict:
+        """Parsea una página de detalle en el pool de parseo"""
+        return await self.parse(parsers.parse_detail_page, html, self.html_parser)
 
-                # Guardar libros en Redis y en la lista
-                for book in books_to_add:
-                    await self.save_to_redis(book)
-                    all_books.append(book)
+    def create_detail_enricher(
+        self, session: aiohttp.ClientSession
+    ) -> BookDetailEnricher:
+        """
+        Crea la etapa de enriquecimiento. Sus peticiones pasan por su propio
+        planificador y no por la parada de `stop_crawl`, de modo que los
+        libros ya recopilados se completan aunque se alcance el límite.
+        """
 
-                self.total_books_collected += len(books_to_add)
+        async def fetch_page(url: str, headers: Dict[str, str]) -> Optional[Dict]:
+            return await self.request_page(url, session, headers, detail=True)
+
+        return BookDetailEnricher(
+            fetch_page=fetch_page,
+            parse_detail=self.parse_detail,
+            store_books=self.store_books,
+            redis_service=self.redis_service,
+            concurrency=self.detail_concurrency,
+            queue_size=self.detail_queue_size,
+            logger=self.logger,
+        )
+
+    def page_done_callback(
+        self, category_url: str, url: str, result: Dict
+    ) -> Optional[FlushCallback]:
+        """
+        En modo incremental, devuelve el callback que guarda el estado de la
+        página y avanza el checkpoint de su categoría.
+        """
+        if not self.incremental:
+            return None
+
+        async def on_flushed(stored: bool):
+            # Si los libros no se guardaron, la página no se marca como procesada
+            # para que el siguiente rastreo incremental la vuelva a descargar
+            if not stored:
+                return
+            if result.get("page_state"):
+                await self.redis_service.set_page_state(url, result["page_state"])
+            await self.save_checkpoint(category_url, result["next_url"])
+
+        return on_flushed
+
+    async def save_checkpoint(self, category_url: str, next_url: Optional[str]):
+        """
+        Guarda la siguiente página pendiente de una categoría (solo en modo
+        incremental) para poder reanudar el crawl tras un fallo.
+        """
+        if not self.incremental:
+            return
+        try:
+            await self.redis_service.set_crawl_checkpoint(category_url, next_url)
+        except Exception as e:
+            self.logger.error(f"Error al guardar el checkpoint de {category_url}: {e}")
 
-                # Si no pudimos agregar todos los libros, hemos alcanzado el límite
-                if len(books_to_add) < len(page_books):
-                    break
+    async def apply_checkpoint(
+        self, categories: List[Dict[str, str]]
+    ) -> List[Dict[str, str]]:
+        """
+        Ajusta las categorías según el checkpoint de un crawl interrumpido:
+        omite las terminadas y reanuda las demás desde su página pendiente.
+        """
+        checkpoint = await self.redis_service.get_crawl_checkpoint()
+        if not checkpoint:
+            return categories
 
-            # Avanzar a la siguiente página
-            url = result["next_url"]
-            page_num += 1
+        self.logger.info("Reanudando crawl incremental desde el checkpoint")
+        pending = []
+        for category_data in categories:
+            if category_data["url"] not in checkpoint:
+                pending.append(category_data)
+            elif checkpoint[category_data["url"]]:
+                pending.append(
+                    {**category_data, "start_url": checkpoint[category_data["url"]]}
+                )
+        return pending
 
-            # Pequeña pausa para no sobrecargar el servidor
-            await asyncio.sleep(0.2)
+    def progress(self) -> Dict:
+        """
+        Contadores del crawl en curso (o del último): páginas descargadas,
+        libros guardados, errores, ritmo y estado del planificador y del
+        enriquecimiento de detalles.
+        """
+        books_stored, books_failed = self.books_stored, self.books_failed
+        if self.write_buffer:
+            books_stored = self.write_buffer.books_stored
+            books_failed = self.write_buffer.books_failed
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+        return {
+            "pages_fetched": self.pages_fetched,
+            "books_collected": self.total_books_collected,
+            "books_stored": books_stored,
+            "errors": self.fetch_errors + books_failed,
+            "retries": self.retries,
+            "requests_avoided": self.requests_avoided,
+            "pages_per_second": round(self.pages_fetched / elapsed, 2) if elapsed else 0.0,
+            "books_per_second": round(books_stored / elapsed, 2) if elapsed else 0.0,
+            "scheduler": self.scheduler.stats(),
+            "details": self.detail_progress(),
+        }
 
-        self.logger.info(f"Scraping completo para la categoría {category_name}.")
+    def detail_progress(self) -> Optional[Dict[str, int]]:
+        """Contadores del enriquecimiento, o None si no está activo"""
+        stats = (
+            self.detail_enricher.stats() if self.detail_enricher else self.detail_stats
+        )
+        if stats is None:
+            return None
+        return {
+            **stats,
+            "pages_fetched": self.detail_pages_fetched,
+            "errors": self.detail_fetch_errors,
+            "retries": self.detail_retries,
+        }
 
     async def scrape_books(self) -> List[Book]:
         """
@@ -346,6 +805,27 @@ class BookScraper:
             List[Book]: Lista de libros scrapeados
         """
         all_books = []
+        self.crawl_stopped = asyncio.Event()
+        self.requests_avoided = 0
+        self.pages_fetched = 0
+        self.fetch_errors = 0
+        self.retries = 0
+        self.detail_pages_fetched = 0
+        self.detail_fetch_errors = 0
+        self.detail_retries = 0
+        self.books_stored = 0
+        self.books_failed = 0
+        self.started_at = time.monotonic()
+        self.detail_stats = None
+        self.parse_pool = self.shared_parse_pool or self.create_parse_pool()
+        if self.redis_service:
+            self.write_buffer = BookWriteBuffer(
+                self.redis_service,
+                flush_size=self.write_batch_size,
+                flush_interval=self.write_flush_interval,
+                logger=self.logger,
+            )
+            self.write_buffer.start()
 
         try:
             # Crear una sesión HTTP
@@ -357,23 +837,83 @@ class BookScraper:
                     self.logger.error("No se pudieron obtener las categorías")
                     return []
 
-                # Crear tareas para scraping de cada categoría
-                tasks = []
+                if self.incremental:
+                    categories = await self.apply_checkpoint(categories)
+
+                # Frontera común: la primera página de cada categoría (o la
+                # pendiente, al reanudar desde un checkpoint)
+                self.frontier = asyncio.PriorityQueue()
+                self.frontier_counter = itertools.count()
+                self.seen_urls = set()
                 for category_data in categories:
-                    task = asyncio.create_task(
-                        self.scrape_category(
-                            category_data, session, all_books
-                        )
+                    self.enqueue_page(
+                        0,
+                        category_data.get("start_url") or category_data["url"],
+                        category_data,
                     )
-                    tasks.append(task)
 
-                # Esperar a que todas las tareas terminen
-                await asyncio.gather(*tasks)
+                if self.enrich_details:
+                    self.detail_enricher = self.create_detail_enricher(session)
+                    self.detail_enricher.start()
+
+                workers = [
+                    asyncio.create_task(self.crawl_worker(session, all_books))
+                    for _ in range(self.workers)
+                ]
+                try:
+                    # Esperar a que se vacíe la frontera
+                    await self.frontier.join()
+                    # Los libros aún en el buffer se guardan (y se encolan
+                    # para enriquecer) antes de dar por terminados los listados
+                    if self.write_buffer:
+                        await self.write_buffer.flush()
+                    if self.on_listing_done:
+                        # El enriquecimiento no retrasa el final del crawl
+                        await self.on_listing_done(all_books)
+                    if self.detail_enricher:
+                        await self.detail_enricher.join()
+                        self.logger.info(
+                            f"Enriquecimiento de detalles: {self.detail_enricher.stats()}"
+                        )
+                finally:
+                    for worker in workers:
+                        worker.cancel()
+                    await asyncio.gather(*workers, return_exceptions=True)
+                    if self.detail_enricher:
+                        await self.detail_enricher.close()
+                        self.detail_stats = self.detail_enricher.stats()
+                        self.detail_enricher = None
+
+            # Guardar los libros que queden en el buffer
+            if self.write_buffer:
+                await self.write_buffer.close()
+
+            # El crawl recorrió todo el catálogo (también uno completo, que
+            # cubre cualquier incremental interrumpido): el siguiente empezará
+            # desde el principio. Si se detuvo (límite de libros o lease
+            # perdido) el checkpoint se conserva; tras perder el lease puede
+            # ser ya el del worker que lo tiene ahora
+            if self.redis_service and not self.crawl_stopped.is_set():
+                await self.redis_service.clear_crawl_checkpoint()
 
             self.logger.info(
                 f"Scraping completado. Total de libros recopilados: {len(all_books)}"
             )
+            self.logger.info(
+                f"Peticiones evitadas al alcanzar el límite: {self.requests_avoided}"
+            )
+            self.logger.info(f"Estado del planificador: {self.scheduler.stats()}")
             return all_books
         except Exception as e:
             self.logger.error(f"Error durante el proceso de scraping: {e}")
             return all_books
+        finally:
+            if self.write_buffer:
+                await self.write_buffer.close()
+                # Conservar los contadores del buffer para `progress`
+                self.books_stored = self.write_buffer.books_stored
+                self.books_failed = self.write_buffer.books_failed
+                self.write_buffer = None
+            if self.parse_pool and self.parse_pool is not self.shared_parse_pool:
+                self.parse_pool.shutdown(wait=False, cancel_futures=True)
+            self.parse_pool = None
@@ -33,6 +33,28 @@ from tenacity import (
 
 from app.core.config import settings
 from app.models.schemas import Headline
+from app.scraping.webdriver_pool import WebDriverPool
+
+
+# Collects every story of the loaded page in one round trip. Only rows
+# followed by a ".subtext" row are returned, as those are the actual stories.
+EXTRACT_STORIES_SCRIPT = """
+return Array.from(document.querySelectorAll(".athing")).map(function (row) {
+    var subtextRow = row.nextElementSibling;
+    if (!subtextRow || !subtextRow.querySelector(".subtext")) {
+        return null;
+    }
+    var link = row.querySelector(".titleline a");
+    var score = subtextRow.querySelector("[class^='score_']")
+        || subtextRow.querySelector(".score");
+    return {
+        id: row.id,
+        title: link ? link.textContent : null,
+        url: link ? link.href : null,
+        score: score ? score.textContent : null
+    };
+}).filter(function (story) { return story !== null; });
+"""
 
 
 class HackerNewsIntegration:
@@ -41,7 +63,12 @@ class HackerNewsIntegration:
     Uses Selenium for web automation with automatic WebDriver configuration.
     """
 
-    def __init__(self, driver_url: Optional[str] = None, logs_dir: str = "logs"):
+    def __init__(
+        self,
+        driver_url: Optional[str] = None,
+        logs_dir: str = "logs",
+        driver_pool: Optional[WebDriverPool] = None,
+    ):
         """
         Initialize a new HackerNewsIntegration instance.
 
@@ -49,6 +76,8 @@ class HackerNewsIntegration:
             driver_url: Optional URL of the Selenium driver to use.
                         If None, will automatically set up a local driver.
             logs_dir: Directory for log files
+            driver_pool: Optional pool of warm WebDriver sessions to borrow from.
+                         If None, a new session is created for every page.
         """
         # Configurar logger
         os.makedirs(logs_dir, exist_ok=True)
@@ -68,9 +97,48 @@ class HackerNewsIntegration:
         self.use_local_driver = driver_url is None
         self.logger.info(f"Using {'local' if self.use_local_driver else 'remote'} WebDriver")
 
+        self.driver_pool = driver_pool
+
         # Configuration for Selenium wait timeouts
         self.wait_timeout = 30  # seconds
 
+    def create_driver_pool(
+        self, max_size: int = 5, max_uses: int = 50, idle_timeout: float = 300.0
+    ) -> WebDriverPool:
+        """
+        Create a WebDriverPool whose sessions are configured like this instance's.
+        """
+        return WebDriverPool(
+            create_driver=self._create_driver,
+            max_size=max_size,
+            max_uses=max_uses,
+            idle_timeout=idle_timeout,
+            logger=self.logger,
+        )
+
+    async def _acquire_driver(self):
+        """
+        Get a WebDriver session, borrowed from the pool if there is one.
+        """
+        if self.driver_pool:
+            return await self.driver_pool.acquire()
+        return await self._create_driver()
+
+    async def _release_driver(self, driver, reusable: bool = True):
+        """
+        Return a session to the pool, or quit it when not pooled.
+
+        Args:
+            driver: Session obtained from `_acquire_driver`.
+            reusable: False if the session failed and must not be reused.
+        """
+        if self.driver_pool:
+            await self.driver_pool.release(driver, reusable=reusable)
+            return
+
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, driver.quit)
+
     async def _create_driver(self):
         """
         Create a new driver instance, either local or remote.
@@ -153,8 +221,8 @@ class HackerNewsIntegration:
         driver = None
 
         try:
-            # Create a new driver for this page
-            driver = await self._create_driver()
+            # Get a driver for this page
+            driver = await self._acquire_driver()
             if not driver:
                 raise WebDriverException("Failed to create WebDriver")
 
@@ -176,57 +244,36 @@ class HackerNewsIntegration:
             self.logger.error(f"Error loading page {url}: {e}")
             if driver:
                 try:
-                    await loop.run_in_executor(None, driver.quit)
+                    await self._release_driver(driver, reusable=False)
                 except:
                     pass
             raise
 
-    def _extract_story_data(self, story_row, subtext_row) -> Headline:
+    def _extract_story_data(self, story: Dict[str, Optional[str]]) -> Headline:
         """
-        Extract story data from Selenium elements.
+        Build a Headline from one item of the EXTRACT_STORIES_SCRIPT payload.
 
         Args:
-            story_row: The Selenium element containing story data.
-            subtext_row: The Selenium element containing subtext (score, etc).
+            story: Dict with the story id, title, url and raw score text.
 
         Returns:
-            Dict containing story title, URL, and score.
+            Headline with the story title, URL, and score.
         """
-        story_id = story_row.get_attribute("id")
-
-        # Get title and URL
-        title_element = story_row.find_element(By.CSS_SELECTOR, ".titleline")
-        title_link = title_element.find_element(By.TAG_NAME, "a")
-        title = title_link.text.strip()
-        url = title_link.get_attribute("href")
+        title = (story.get("title") or "").strip()
+        if not title:
+            raise ValueError(f"Story {story.get('id')} has no title")
 
-        # Get score
+        # Extraer solo los dígitos del texto de puntuación
         score = 0
-        try:
-            # Buscar por atributo que comienza con "score_" o la clase tradicional "score"
-            score_element = None
-            # Intenta encontrar el elemento con clase que comienza con "score_"
-            score_elements = subtext_row.find_elements(By.CSS_SELECTOR, "[class^='score_']")
-            if score_elements:
-                score_element = score_elements[0]
-            else:
-                # Intenta con la clase tradicional "score"
-                score_elements = subtext_row.find_elements(By.CSS_SELECTOR, ".score")
-                if score_elements:
-                    score_element = score_elements[0]
-                    
-            if score_element:
-                score_text = score_element.text
-                # Extraer solo los dígitos del texto de puntuación
-                score_digits = re.search(r'(\d+)', score_text)
-                if score_digits:
-                    score = int(score_digits.group(1))
-        except Exception as e:
-            self.logger.debug(f"Story {story_id} has no score: {e}")
+        score_digits = re.search(r"(\d+)", story.get("score") or "")
+        if score_digits:
+            score = int(score_digits.group(1))
+        else:
+            self.logger.debug(f"Story {story.get('id')} has no score")
 
         return Headline(
             title=title,
-            url=url,
+            url=story.get("url") or "",
             score=score
         )
 
@@ -281,6 +328,8 @@ class HackerNewsIntegration:
         page_stories = []
         loop = asyncio.get_event_loop()
         driver = None
+        # Only a session that got through the whole page goes back to the pool
+        reusable = False
 
         try:
             # Load the page with Selenium
@@ -289,49 +338,32 @@ class HackerNewsIntegration:
                 self.logger.error(f"Failed to get driver for page {page_num}")
                 return []
 
-            # Find all story rows
-            story_rows = await loop.run_in_executor(
-                None, lambda: driver.find_elements(By.CSS_SELECTOR, ".athing")
+            # Extract every story on the page with a single WebDriver call
+            payload = await loop.run_in_executor(
+                None, lambda: driver.execute_script(EXTRACT_STORIES_SCRIPT)
             )
-            self.logger.info(f"Found {len(story_rows)} stories on page {page_num}")
+            self.logger.info(f"Found {len(payload)} stories on page {page_num}")
 
-            for story_row in story_rows:
+            for story in payload:
                 try:
-                    # Find the subtext row that follows this story row
-                    story_id = await loop.run_in_executor(
-                        None, lambda: story_row.get_attribute("id")
-                    )
-
-                    # Use XPath to find the following tr that contains the subtext
-                    subtext_xpath = f"//tr[@id='{story_id}']/following-sibling::tr[1]"
-                    subtext_row = await loop.run_in_executor(
-                        None, lambda: driver.find_element(By.XPATH, subtext_xpath)
-                    )
-
-                    if await loop.run_in_executor(
-                        None,
-                        lambda: subtext_row.find_elements(By.CSS_SELECTOR, ".subtext"),
-                    ):
-                        story_data = await loop.run_in_executor(
-                            None,
-                            lambda: self._extract_story_data(story_row, subtext_row),
-                        )
-                        page_stories.append(story_data)
+                    page_stories.append(self._extract_story_data(story))
                 except Exception as e:
                     self.logger.warning(
                         f"Failed to extract story data for an item: {e}"
                     )
                     continue
+            reusable = True
 
         except Exception as e:
             self.logger.error(f"Error processing page {page_num}: {e}")
             raise
         finally:
-            # Clean up the driver
+            # Return the driver to the pool (or close it); a failed session
+            # (dead, timed out script...) is retired instead of reused
             if driver:
                 try:
-                    await loop.run_in_executor(None, driver.quit)
-                    self.logger.debug(f"Driver for page {page_num} closed successfully")
+                    await self._release_driver(driver, reusable=reusable)
+                    self.logger.debug(f"Driver for page {page_num} released successfully")
                 except Exception as e:
                     self.logger.warning(
                         f"Error closing driver for page {page_num}: {e}"
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Hacker News Integration Module - HTTP Version
+
+Hacker News pages are static HTML, so top stories can be fetched with plain
+HTTP requests and parsed without driving a browser. The Selenium integration
+is kept as a fallback for when this backend cannot extract any story.
+"""
+
+import re
+import logging
+import asyncio
+from typing import List, Optional
+from urllib.parse import urljoin
+
+import aiohttp
+from bs4 import BeautifulSoup
+
+from app.core.config import settings
+from app.models.schemas import Headline
+from app.scraping.scrape_hn import HackerNewsIntegration
+
+
+def parse_stories(
+    html: str, base_url: str = settings.HACKER_NEWS_URL
+) -> List[Headline]:
+    """
+    Parse the stories of a Hacker News listing page.
+
+    Args:
+        html: Raw HTML of the page.
+        base_url: URL used to resolve relative links (e.g. "Ask HN" items).
+
+    Returns:
+        List of headlines, in page order.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    stories = []
+
+    for story_row in soup.select("tr.athing"):
+        # The subtext row (score, author, comments) follows the story row
+        subtext_row = story_row.find_next_sibling("tr")
+        if not subtext_row or not subtext_row.select_one(".subtext"):
+            continue
+
+        title_link = story_row.select_one(".titleline > a")
+        if not title_link:
+            continue
+
+        score = 0
+        score_element = subtext_row.select_one(".score, [id^='score_']")
+        if score_element:
+            score_digits = re.search(r"(\d+)", score_element.get_text())
+            if score_digits:
+                score = int(score_digits.group(1))
+
+        stories.append(
+            Headline(
+                title=title_link.get_text().strip(),
+                url=urljoin(base_url, title_link.get("href", "")),
+                score=score,
+            )
+        )
+
+    return stories
+
+
+class HackerNewsHttpIntegration:
+    """
+    Fetches top stories from Hacker News over HTTP with a shared aiohttp session.
+    """
+
+    def __init__(
+        self,
+        session: Optional[aiohttp.ClientSession] = None,
+        fallback: Optional[HackerNewsIntegration] = None,
+        timeout: float = 10.0,
+    ):
+        """
+        Initialize a new HackerNewsHttpIntegration instance.
+
+        Args:
+            session: Shared aiohttp session. If None, a session is opened for
+                     each call to `fetch_top_stories`.
+            fallback: Integration used when no story could be extracted.
+            timeout: Timeout in seconds for each page request.
+        """
+        self.logger = logging.getLogger("http_hacker_news")
+        self.session = session
+        self.fallback = fallback
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.headers = {
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+        }
+
+    async def fetch_top_stories(self, pages: int = 5) -> List[Headline]:
+        """
+        Fetch top stories from the first `pages` pages of Hacker News.
+        Falls back to the Selenium integration if no story was found.
+        """
+        if self.session is not None:
+            stories = await self._fetch_pages(self.session, pages)
+        else:
+            async with aiohttp.ClientSession() as session:
+                stories = await self._fetch_pages(session, pages)
+
+        if not stories and self.fallback:
+            self.logger.warning(
+                "No stories fetched over HTTP, falling back to Selenium"
+            )
+            return await self.fallback.fetch_top_stories(pages)
+
+        return stories
+
+    async def _fetch_pages(
+        self, session: aiohttp.ClientSession, pages: int
+    ) -> List[Headline]:
+        urls = [
+            (
+                settings.HACKER_NEWS_URL
+                if page == 1
+                else f"{settings.HACKER_NEWS_URL}?p={page}"
+            )
+            for page in range(1, pages + 1)
+        ]
+        page_results = await asyncio.gather(
+            *(self._fetch_page(session, url) for url in urls), return_exceptions=True
+        )
+
+        stories = []
+        for url, page_result in zip(urls, page_results):
+            if isinstance(page_result, Exception):
+                self.logger.error(f"Error processing page {url}: {page_result}")
+            else:
+                stories.extend(page_result)
+        return stories
+
+    async def _fetch_page(
+        self, session: aiohttp.ClientSession, url: str
+    ) -> List[Headline]:
+        async with session.get(
+            url, headers=self.headers, timeout=self.timeout
+        ) as response:
+            response.raise_for_status()
+            html = await response.text()
+
+        stories = parse_stories(html)
+        self.logger.info(f"Found {len(stories)} stories on {url}")
+        return stories
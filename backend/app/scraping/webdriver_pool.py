@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+WebDriver session pool
+
+Keeps a bounded set of warm Selenium sessions so that pages can be loaded
+without paying the browser startup cost on every request.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+
+@dataclass
+class PooledDriver:
+    """A WebDriver session together with its pool bookkeeping."""
+
+    driver: WebDriver
+    uses: int = 0
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class WebDriverPool:
+    """
+    A bounded pool of reusable WebDriver sessions (local or remote).
+
+    Sessions are health-checked before being handed out, retired after
+    `max_uses` borrows and evicted after `idle_timeout` seconds without use.
+    """
+
+    def __init__(
+        self,
+        create_driver: Callable[[], Awaitable[WebDriver]],
+        max_size: int = 5,
+        max_uses: int = 50,
+        idle_timeout: float = 300.0,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            create_driver: Coroutine factory that starts a new WebDriver session.
+            max_size: Maximum number of sessions alive at the same time.
+            max_uses: Number of borrows after which a session is recycled.
+            idle_timeout: Seconds a session may stay idle before being closed.
+            logger: Logger to use; defaults to this module's logger.
+        """
+        self.create_driver = create_driver
+        self.max_size = max_size
+        self.max_uses = max_uses
+        self.idle_timeout = idle_timeout
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._semaphore = asyncio.Semaphore(max_size)
+        self._idle: List[PooledDriver] = []
+        self._in_use: Dict[int, PooledDriver] = {}
+        self._reaper_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    async def acquire(self) -> WebDriver:
+        """
+        Borrow a healthy WebDriver session, creating one if none is idle.
+        Waits while `max_size` sessions are already borrowed.
+        """
+        if self._closed:
+            raise RuntimeError("WebDriver pool is closed")
+
+        self._start_reaper()
+        await self._semaphore.acquire()
+        try:
+            pooled = await self._take_idle()
+            if pooled is None:
+                self.logger.info("Starting new pooled WebDriver session")
+                pooled = PooledDriver(driver=await self.create_driver())
+
+            pooled.uses += 1
+            self._in_use[id(pooled.driver)] = pooled
+            return pooled.driver
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+    async def release(self, driver: WebDriver, reusable: bool = True) -> None:
+        """
+        Return a borrowed session to the pool.
+
+        Args:
+            driver: The session obtained from `acquire`.
+            reusable: False if the session failed and must be discarded.
+        """
+        pooled = self._in_use.pop(id(driver), None)
+        if pooled is None:
+            # Not a pooled session: just close it
+            await self._quit(driver)
+            return
+
+        try:
+            if self._closed or not reusable or pooled.uses >= self.max_uses:
+                await self._quit(pooled.driver)
+            else:
+                pooled.last_used = time.monotonic()
+                self._idle.append(pooled)
+        finally:
+            self._semaphore.release()
+
+    async def evict_idle(self) -> int:
+        """Close sessions that have been idle longer than `idle_timeout`."""
+        now = time.monotonic()
+        expired = [p for p in self._idle if now - p.last_used >= self.idle_timeout]
+        for pooled in expired:
+            self._idle.remove(pooled)
+            await self._quit(pooled.driver)
+
+        if expired:
+            self.logger.info(f"Evicted {len(expired)} idle WebDriver sessions")
+        return len(expired)
+
+    async def close(self) -> None:
+        """Close every idle session; borrowed sessions are closed on release."""
+        self._closed = True
+        if self._reaper_task:
+            self._reaper_task.cancel()
+            await asyncio.gather(self._reaper_task, return_exceptions=True)
+            self._reaper_task = None
+
+        idle, self._idle = self._idle, []
+        await asyncio.gather(
+            *(self._quit(pooled.driver) for pooled in idle), return_exceptions=True
+        )
+        self.logger.info("WebDriver pool closed")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "max_size": self.max_size,
+            "idle": len(self._idle),
+            "in_use": len(self._in_use),
+        }
+
+    async def _take_idle(self) -> Optional[PooledDriver]:
+        """Pop the most recently used idle session that passes the health check."""
+        now = time.monotonic()
+        while self._idle:
+            pooled = self._idle.pop()
+            if now - pooled.last_used >= self.idle_timeout:
+                await self._quit(pooled.driver)
+                continue
+            if await self._is_healthy(pooled.driver):
+                return pooled
+
+            self.logger.warning("Discarding unhealthy WebDriver session")
+            await self._quit(pooled.driver)
+        return None
+
+    async def _is_healthy(self, driver: WebDriver) -> bool:
+        loop = asyncio.get_running_loop()
+        try:
+            # Raises if the browser or the remote session is gone
+            await loop.run_in_executor(None, lambda: driver.title)
+            return True
+        except Exception:
+            return False
+
+    async def _quit(self, driver: WebDriver) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, driver.quit)
+        except Exception as e:
+            self.logger.warning(f"Error closing WebDriver session: {e}")
+
+    def _start_reaper(self) -> None:
+        if self._reaper_task is None or self._reaper_task.done():
+            self._reaper_task = asyncio.create_task(self._reap_idle())
+
+    async def _reap_idle(self) -> None:
+        interval = max(self.idle_timeout / 2, 1.0)
+        while not self._closed:
+            await asyncio.sleep(interval)
+            try:
+                await self.evict_idle()
+            except Exception as e:
+                self.logger.error(f"Error evicting idle WebDriver sessions: {e}")
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Buffer de escritura diferida (write-behind) de libros en Redis.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from app.models.schemas import Book
+from app.services.redis_service import RedisService
+
+# Recibe True si los libros añadidos junto al callback se guardaron
+FlushCallback = Callable[[bool], Awaitable[None]]
+
+
+class BookWriteBuffer:
+    """
+    Acumula los libros de todas las tareas del scraper y los escribe en Redis
+    en transacciones pipelined cuando se alcanza `flush_size` libros o cada
+    `flush_interval` segundos.
+
+    Se pueden registrar callbacks que se ejecutan cuando los libros añadidos
+    junto a ellos ya están guardados (p. ej. marcar una página como procesada).
+
+    Si una escritura falla, el lote se reintenta una vez en la siguiente (o
+    al cerrar el buffer). Si vuelve a fallar, sus libros se descartan y sus
+    callbacks se ejecutan igualmente, indicando el fallo.
+    """
+
+    def __init__(
+        self,
+        redis_service: RedisService,
+        flush_size: int = 100,
+        flush_interval: float = 0.5,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """
+        Args:
+            redis_service: Servicio usado para escribir los libros
+            flush_size: Número de libros que dispara una escritura
+            flush_interval: Segundos máximos que un libro espera en el buffer
+            logger: Logger a usar
+        """
+        self.redis_service = redis_service
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.logger = logger or logging.getLogger(__name__)
+
+        self.books_stored = 0
+        self.books_failed = 0
+        self._books: List[Book] = []
+        self._callbacks: List[FlushCallback] = []
+        # Lote cuya primera escritura falló, pendiente de su único reintento
+        self._failed_batch: Optional[Tuple[List[Book], List[FlushCallback]]] = None
+        # Las escrituras se serializan para que los callbacks respeten el orden
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Inicia la escritura periódica en segundo plano"""
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_periodically())
+
+    async def add(
+        self, books: List[Book], on_flushed: Optional[FlushCallback] = None
+    ) -> None:
+        """
+        Añade libros al buffer.
+
+        Args:
+            books: Libros a guardar
+            on_flushed: Callback a ejecutar tras guardar estos libros (recibe si
+                se guardaron)
+        """
+        self._books.extend(books)
+        if on_flushed:
+            self._callbacks.append(on_flushed)
+        if len(self._books) >= self.flush_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Escribe en Redis todo lo acumulado hasta ahora"""
+        async with self._flush_lock:
+            failed_batch, self._failed_batch = self._failed_batch, None
+            if failed_batch:
+                await self._write(*failed_batch, retry=False)
+
+            books, self._books = self._books, []
+            callbacks, self._callbacks = self._callbacks, []
+            if books or callbacks:
+                await self._write(books, callbacks, retry=True)
+
+    async def _write(
+        self, books: List[Book], callbacks: List[FlushCallback], retry: bool
+    ) -> None:
+        stored = await self.redis_service.store_books(books)
+        self.books_stored += stored
+        ok = stored == len(books)
+        if not ok:
+            if retry:
+                self.logger.warning(
+                    f"No se pudieron guardar {len(books) - stored} libros en Redis; "
+                    "se reintentará en la siguiente escritura"
+                )
+                self._failed_batch = (books[stored:], callbacks)
+                return
+            self.books_failed += len(books) - stored
+            self.logger.error(
+                f"No se pudieron guardar {len(books) - stored} libros en Redis"
+            )
+
+        for callback in callbacks:
+            try:
+                await callback(ok)
+            except Exception as e:
+                self.logger.error(f"Error tras guardar libros en Redis: {e}")
+
+    async def close(self) -> None:
+        """Detiene la escritura periódica y guarda lo pendiente"""
+        if self._flush_task:
+            # Con el lock tomado la tarea no puede estar a mitad de una escritura
+            async with self._flush_lock:
+                self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        await self.flush()
+        if self._failed_batch:
+            # Último intento del lote que acaba de fallar
+            await self.flush()
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                self.logger.error(f"Error al escribir el buffer de libros: {e}")
@@ -0,0 +1,199 @@
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from app.core.config import settings
+
+
+# Parámetros cuyo valor no distingue mayúsculas al buscar libros
+CASE_INSENSITIVE_PARAMS = ("title", "category")
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Indica si la cabecera If-None-Match incluye el ETag dado"""
+    if not if_none_match:
+        return False
+    candidates = {
+        candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")
+    }
+    return "*" in candidates or etag in candidates
+
+
+def cache_headers(etag: Optional[str], max_age: int) -> Dict[str, str]:
+    """Cabeceras de validación (ETag) y de caché del cliente (Cache-Control)"""
+    headers = {"Cache-Control": f"public, max-age={max_age}"}
+    if etag:
+        headers["ETag"] = etag
+    return headers
+
+
+def not_modified_response(
+    request: Request, etag: str, max_age: int
+) -> Optional[Response]:
+    """Devuelve un 304 si el cliente ya tiene la representación con `etag`"""
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cache_headers(etag, max_age))
+    return None
+
+
+@dataclass(frozen=True)
+class RenderedResponse:
+    """
+    Cuerpo JSON ya serializado de una respuesta, con su ETag fuerte.
+
+    Se serializa una única vez y se sirve tal cual en las siguientes
+    peticiones, sin volver a validar el modelo con `response_model`.
+    """
+
+    body: bytes
+    etag: str
+
+    @classmethod
+    def render(
+        cls, model: BaseModel, etag: Optional[str] = None
+    ) -> "RenderedResponse":
+        """Serializa el modelo; sin `etag` se usa el hash del cuerpo"""
+        body = model.model_dump_json().encode()
+        return cls(body=body, etag=etag or f'"{hashlib.md5(body).hexdigest()}"')
+
+    def to_response(self, request: Request, max_age: int = 0) -> Response:
+        """Devuelve el cuerpo o un 304 si el cliente ya tiene esta versión"""
+        not_modified = not_modified_response(request, self.etag, max_age)
+        if not_modified:
+            return not_modified
+        return Response(
+            content=self.body,
+            media_type="application/json",
+            headers=cache_headers(self.etag, max_age),
+        )
+
+
+class ResponseCache:
+    """
+    Caché en memoria de respuestas con expiración (TTL) y desalojo LRU.
+
+    Las claves incluyen la versión del catálogo almacenada en Redis, de modo
+    que cuando el scraper escribe libros nuevos las entradas anteriores dejan
+    de coincidir en todos los workers y terminan desalojadas.
+    """
+
+    def __init__(self, max_size: int = 256, ttl: float = 60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def make_key(endpoint: str, version: Any, **params: Any) -> Tuple:
+        """
+        Construye una clave normalizada: ignora parámetros vacíos, ordena los
+        nombres y pasa a minúsculas el título y la categoría (las búsquedas no
+        distinguen mayúsculas). El resto, como el cursor, se usa tal cual.
+        """
+        normalized = tuple(
+            sorted(
+                (
+                    name,
+                    value.lower()
+                    if name in CASE_INSENSITIVE_PARAMS and isinstance(value, str)
+                    else value,
+                )
+                for name, value in params.items()
+                if value is not None
+            )
+        )
+        return endpoint, version, normalized
+
+    @staticmethod
+    def make_etag(key: Tuple) -> str:
+        """
+        ETag fuerte de una vista: depende solo de la clave, que incluye la
+        versión del catálogo, así que se calcula sin leer ni serializar datos.
+        """
+        return f'"{hashlib.md5(repr(key).encode()).hexdigest()}"'
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Devuelve el valor cacheado o None si no existe o expiró"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Guarda un valor, desalojando el menos usado si se supera el tamaño"""
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class VersionCache:
+    """
+    Guarda en memoria durante `ttl` segundos la última versión leída de
+    Redis, para que las peticiones condicionales (304) no necesiten ir a
+    Redis. A cambio, un worker puede tardar hasta `ttl` en ver un catálogo
+    nuevo.
+    """
+
+    def __init__(self, ttl: float = 1.0):
+        self.ttl = ttl
+        self._value: Optional[int] = None
+        self._expires_at = 0.0
+
+    async def get(self, load: Callable[[], Awaitable[Optional[int]]]) -> Optional[int]:
+        """Devuelve la versión en memoria o la obtiene con `load` si caducó"""
+        if self._value is not None and time.monotonic() < self._expires_at:
+            return self._value
+
+        value = await load()
+        # Los errores de Redis (None) no se cachean
+        if value is not None:
+            self._value = value
+            self._expires_at = time.monotonic() + self.ttl
+        return value
+
+    def clear(self) -> None:
+        self._value = None
+        self._expires_at = 0.0
+
+
+response_cache = ResponseCache(
+    max_size=settings.RESPONSE_CACHE_MAX_SIZE,
+    ttl=settings.RESPONSE_CACHE_TTL,
+)
+
+
+catalog_version_cache = VersionCache(ttl=settings.CATALOG_VERSION_CACHE_TTL)
+
+
+def get_response_cache() -> ResponseCache:
+    return response_cache
+
+
+def get_catalog_version_cache() -> VersionCache:
+    return catalog_version_cache
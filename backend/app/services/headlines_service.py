@@ -1,6 +1,275 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Optional, Union
+
+import aiohttp
+from fastapi import Request
+
 from app.core.config import settings
+from app.models.schemas import HeadlineList
 from app.scraping.scrape_hn import HackerNewsIntegration
+from app.scraping.scrape_hn_http import HackerNewsHttpIntegration
+from app.scraping.webdriver_pool import WebDriverPool
+from app.services.redis_service import RedisService, get_redis_pool, get_subscriber
+
+HEADLINES_REFRESH_LOCK = "headlines:refresh"
+
+logger = logging.getLogger(__name__)
+
+# Sesiones WebDriver y HTTP compartidas; las crea y cierra el lifespan
+_driver_pool: Optional[WebDriverPool] = None
+_http_session: Optional[aiohttp.ClientSession] = None
+
+
+def init_webdriver_pool() -> Optional[WebDriverPool]:
+    """Crea el pool de WebDriver si está habilitado (WEBDRIVER_POOL_SIZE > 0)"""
+    global _driver_pool
+    if settings.WEBDRIVER_POOL_SIZE > 0 and _driver_pool is None:
+        _driver_pool = HackerNewsIntegration(
+            driver_url=settings.REMOTE_DRIVER_URL, logs_dir=settings.LOGS_DIR
+        ).create_driver_pool(
+            max_size=settings.WEBDRIVER_POOL_SIZE,
+            max_uses=settings.WEBDRIVER_MAX_USES,
+            idle_timeout=settings.WEBDRIVER_IDLE_TIMEOUT,
+        )
+    return _driver_pool
+
+
+async def close_webdriver_pool() -> None:
+    global _driver_pool
+    if _driver_pool is not None:
+        await _driver_pool.close()
+        _driver_pool = None
+
+
+def init_http_session() -> Optional[aiohttp.ClientSession]:
+    """Crea la sesión aiohttp compartida si el backend de titulares es HTTP"""
+    global _http_session
+    if settings.HEADLINES_BACKEND == "http" and _http_session is None:
+        _http_session = aiohttp.ClientSession()
+    return _http_session
+
+
+async def close_http_session() -> None:
+    global _http_session
+    if _http_session is not None:
+        await _http_session.close()
+        _http_session = None
+
+
+def snapshot_etag(snapshot: HeadlineList) -> Optional[str]:
+    """ETag fuerte de una instantánea, derivado de su marca de tiempo `as_of`"""
+    if not snapshot.as_of:
+        return None
+    return f'"headlines-{int(snapshot.as_of.timestamp() * 1000)}"'
+
+
+def get_headlines_service() -> Union[
+    HackerNewsHttpIntegration, HackerNewsIntegration
+]:
+    """
+    Devuelve la integración configurada en HEADLINES_BACKEND. El backend HTTP
+    usa Selenium como respaldo si no consigue extraer titulares.
+    """
+    selenium_integration = HackerNewsIntegration(
+        driver_url=settings.REMOTE_DRIVER_URL,
+        logs_dir=settings.LOGS_DIR,
+        driver_pool=_driver_pool,
+    )
+    if settings.HEADLINES_BACKEND == "selenium":
+        return selenium_integration
+
+    return HackerNewsHttpIntegration(
+        session=_http_session,
+        fallback=selenium_integration,
+        timeout=settings.HEADLINES_HTTP_TIMEOUT,
+    )
+
+
+class HeadlinesStore:
+    """
+    Mantiene en Redis la última instantánea de titulares de Hacker News.
+
+    Las peticiones se sirven desde la instantánea guardada; si está caducada
+    se devuelve igualmente y se lanza un refresco en segundo plano
+    (stale-while-revalidate). Los refrescos concurrentes del mismo proceso
+    comparten una única tarea y un lease en Redis, renovado mientras dura el
+    scraping, evita que varios workers lo hagan a la vez.
+    """
+
+    def __init__(
+        self,
+        redis_service: RedisService,
+        refresh_interval: float = settings.HEADLINES_REFRESH_INTERVAL,
+        stale_after: float = settings.HEADLINES_STALE_AFTER,
+        lock_ttl: int = settings.HEADLINES_REFRESH_LOCK_TTL,
+        snapshot_cache_ttl: float = settings.HEADLINES_SNAPSHOT_CACHE_TTL,
+    ):
+        self.redis_service = redis_service
+        self.refresh_interval = refresh_interval
+        # Independiente del intervalo, que puede ser 0 (sin refresco periódico)
+        self.stale_after = stale_after
+        self.lock_ttl = lock_ttl
+        self.snapshot_cache_ttl = snapshot_cache_ttl
+        self._refresh_task: Optional[asyncio.Task] = None
+        # Copia en memoria de la última instantánea leída o guardada
+        self._snapshot: Optional[HeadlineList] = None
+        self._snapshot_expires_at = 0.0
+
+    def is_stale(self, snapshot: HeadlineList, max_age: Optional[float] = None) -> bool:
+        """Indica si la instantánea tiene al menos `max_age` s (`stale_after`)"""
+        if not snapshot.as_of:
+            return True
+        age = (datetime.now(timezone.utc) - snapshot.as_of).total_seconds()
+        return age >= (self.stale_after if max_age is None else max_age)
+
+    async def get_snapshot(self) -> Optional[HeadlineList]:
+        """
+        Devuelve la última instantánea, reutilizando durante
+        `snapshot_cache_ttl` segundos la copia en memoria para no leer Redis
+        en cada petición.
+        """
+        if self._snapshot is not None and time.monotonic() < self._snapshot_expires_at:
+            return self._snapshot
+
+        snapshot = await self.redis_service.get_headlines_snapshot()
+        self._remember(snapshot)
+        return snapshot
+
+    def _remember(self, snapshot: Optional[HeadlineList]) -> None:
+        if snapshot is not None:
+            self._snapshot = snapshot
+            self._snapshot_expires_at = time.monotonic() + self.snapshot_cache_ttl
+
+    async def get_headlines(self, force_refresh: bool = False) -> HeadlineList:
+        """
+        Devuelve la instantánea más reciente de titulares.
+
+        Args:
+            force_refresh: Espera a un scraping nuevo en lugar de usar la
+                instantánea guardada.
+        """
+        if force_refresh:
+            return await self.refresh()
+
+        snapshot = await self.get_snapshot()
+        if snapshot is None:
+            return await self.refresh()
+
+        if self.is_stale(snapshot):
+            self.refresh_in_background()
+        return snapshot
+
+    def refresh_in_background(self) -> asyncio.Task:
+        """Lanza un refresco sin esperar a que termine"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh())
+        return self._refresh_task
+
+    async def refresh(self) -> HeadlineList:
+        """Refresca los titulares compartiendo el scraping en curso si lo hay"""
+        # shield evita que la cancelación de una petición aborte el refresco
+        return await asyncio.shield(self.refresh_in_background())
+
+    async def _refresh(self) -> HeadlineList:
+        try:
+            token = await self.redis_service.acquire_lease(
+                HEADLINES_REFRESH_LOCK, self.lock_ttl
+            )
+        except Exception as e:
+            logger.warning(f"Could not acquire headlines refresh lock: {e}")
+            return await self._scrape()
+
+        if token is None:
+            # Otro worker está refrescando: esperar su resultado
+            return await self._wait_for_other_refresh()
+
+        # El lease se renueva mientras dure el scraping, por lento que sea
+        heartbeat = asyncio.create_task(self._keep_lease_alive(token))
+        try:
+            return await self._scrape()
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+            try:
+                await self.redis_service.release_lock(HEADLINES_REFRESH_LOCK, token)
+            except Exception as e:
+                logger.warning(f"Could not release headlines refresh lock: {e}")
+
+    async def _keep_lease_alive(self, token: int) -> None:
+        """Renueva el lease del refresco hasta que se cancela o se pierde"""
+        while True:
+            await asyncio.sleep(self.lock_ttl / 3)
+            try:
+                renewed = await self.redis_service.renew_lease(
+                    HEADLINES_REFRESH_LOCK, token, self.lock_ttl
+                )
+            except Exception as e:
+                # Un fallo puntual de Redis no detiene el refresco: el lease aún dura
+                logger.warning(f"Could not renew headlines refresh lock: {e}")
+                continue
+            if not renewed:
+                logger.warning("Headlines refresh lock was lost")
+                return
+
+    async def _wait_for_other_refresh(self) -> HeadlineList:
+        try:
+            await self.redis_service.wait_for_unlock(
+                HEADLINES_REFRESH_LOCK, timeout=self.lock_ttl
+            )
+        except Exception as e:
+            logger.warning(f"Could not wait for headlines refresh lock: {e}")
+
+        snapshot = await self.redis_service.get_headlines_snapshot()
+        return snapshot or HeadlineList(headlines=[])
+
+    async def _scrape(self) -> HeadlineList:
+        headlines = await get_headlines_service().fetch_top_stories()
+        if not headlines:
+            # No sobrescribir una instantánea válida con un scraping fallido
+            logger.error("Headlines refresh returned no stories")
+            snapshot = await self.redis_service.get_headlines_snapshot()
+            return snapshot or HeadlineList(headlines=[])
+
+        snapshot = HeadlineList(
+            headlines=headlines, as_of=datetime.now(timezone.utc)
+        )
+        await self.redis_service.store_headlines_snapshot(snapshot)
+        self._remember(snapshot)
+        return snapshot
+
+    async def stop(self) -> None:
+        """Cancela el refresco en curso de este worker"""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+            self._refresh_task = None
+
+    async def run_periodic_refresh(self) -> None:
+        """Bucle de refresco en segundo plano, pensado para el lifespan"""
+        while True:
+            try:
+                snapshot = await self.redis_service.get_headlines_snapshot()
+                if snapshot is None or self.is_stale(snapshot, self.refresh_interval):
+                    await self.refresh()
+            except Exception as e:
+                logger.error(f"Error refreshing headlines: {e}")
+            await asyncio.sleep(self.refresh_interval)
 
 
-def get_headlines_service() -> HackerNewsIntegration:
-    return HackerNewsIntegration(driver_url=settings.REMOTE_DRIVER_URL)
+def get_headlines_store(request: Request) -> HeadlinesStore:
+    """
+    Devuelve el HeadlinesStore de la aplicación, creándolo bajo demanda si el
+    lifespan no se ejecutó.
+    """
+    store = getattr(request.app.state, "headlines_store", None)
+    if store is None:
+        store = request.app.state.headlines_store = HeadlinesStore(
+            RedisService(
+                pool=get_redis_pool(request.app),
+                subscriber=get_subscriber(request.app),
+            )
+        )
+    return store
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Optional, Set
+
+from fastapi import Request
+
+from app.core.config import settings
+from app.models.schemas import CrawlStatus, JobStatus
+from app.services.redis_service import RedisService, get_redis_pool, get_subscriber
+from app.services.scrape_service import BOOK_CRAWL_LOCK, run_book_crawl
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlJobs:
+    """
+    Ejecuta crawls del catálogo como jobs en segundo plano.
+
+    Cada job tiene un ID con el que consultar su estado y progreso en Redis
+    desde cualquier worker. Si ya hay un crawl en curso en el clúster, se
+    devuelve su job en lugar de encolar otro.
+    """
+
+    def __init__(self, redis_service: RedisService):
+        self.redis_service = redis_service
+        # Referencias a las tareas para que no se recolecten antes de acabar
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, incremental: bool = False) -> CrawlStatus:
+        """
+        Encola un crawl y devuelve su job sin esperar a que termine.
+
+        El lease del crawl se adquiere aquí mismo, de forma atómica en Redis:
+        de dos peticiones simultáneas solo una lanza el crawl y la otra
+        recibe el job en curso.
+        """
+        token = await self.redis_service.acquire_lease(
+            BOOK_CRAWL_LOCK, settings.BOOK_CRAWL_LOCK_TTL
+        )
+        if token is None:
+            current = await self.redis_service.get_crawl_status()
+            if current is not None and not current.is_finished:
+                return current
+
+        # Sin lease, el job espera al crawl en curso y refleja su resultado
+        job = CrawlStatus(
+            job_id=uuid.uuid4().hex,
+            status=JobStatus.pending,
+            incremental=incremental,
+            created_at=datetime.now(timezone.utc),
+        )
+        try:
+            await self.redis_service.save_job(job)
+        except BaseException:
+            if token is not None:
+                await self.redis_service.release_lock(BOOK_CRAWL_LOCK, token)
+            raise
+
+        task = asyncio.create_task(self._run(job, token))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def get(self, job_id: str) -> Optional[CrawlStatus]:
+        return await self.redis_service.get_job(job_id)
+
+    async def _run(self, job: CrawlStatus, token: Optional[int] = None) -> None:
+        try:
+            books = await run_book_crawl(
+                self.redis_service,
+                incremental=job.incremental,
+                job_id=job.job_id,
+                token=token,
+            )
+            if books is None:
+                # Otro worker hizo el crawl: el job refleja su resultado
+                crawl = await self.redis_service.get_crawl_status()
+                if crawl is not None:
+                    job = crawl.model_copy(update={"job_id": job.job_id})
+                else:
+                    job.status = JobStatus.done
+                    job.finished_at = datetime.now(timezone.utc)
+                await self.redis_service.save_job(job)
+        except Exception as e:
+            logger.error(f"Crawl job {job.job_id} failed: {e}")
+            stored = await self.get(job.job_id)
+            if stored is None or not stored.is_finished:
+                # Falló antes de que el crawl registrase su propio estado
+                job.status = JobStatus.failed
+                job.error = str(e)
+                job.finished_at = datetime.now(timezone.utc)
+                await self.redis_service.save_job(job)
+
+    async def stop(self) -> None:
+        """Cancela los jobs en curso de este worker"""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+def get_crawl_jobs(request: Request) -> CrawlJobs:
+    """
+    Devuelve los jobs de la aplicación. Normalmente los crea el lifespan; si
+    no se ejecutó (por ejemplo en tests) se crean bajo demanda.
+    """
+    jobs = getattr(request.app.state, "crawl_jobs", None)
+    if jobs is None:
+        jobs = request.app.state.crawl_jobs = CrawlJobs(
+            RedisService(
+                pool=get_redis_pool(request.app),
+                subscriber=get_subscriber(request.app),
+            )
+        )
+    return jobs
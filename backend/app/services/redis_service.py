@@ -1,86 +1,942 @@
-from typing import List, Optional
+import base64
+import binascii
+import hashlib
+import json
+import asyncio
+import copy
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
 
-import redis
+import redis.asyncio as redis
+from fastapi import Request
 
 from app.core.config import settings
-from app.models.schemas import Book
+from app.models.schemas import Book, BookQuery, BookSort, CrawlStatus, HeadlineList
 
 
-class RedisService:
-    def __init__(self):
-        self.redis_client = redis.Redis(
-            host=settings.REDIS_HOST,
-            port=settings.REDIS_PORT,
-            db=settings.REDIS_DB,
-            password=settings.REDIS_PASSWORD,
-            decode_responses=True,
+ALL_BOOKS_KEY = "books:all"
+PRICE_INDEX_KEY = "books:by_price"
+# Contador que se incrementa con cada escritura del catálogo
+CATALOG_VERSION_KEY = "books:version"
+HEADLINES_SNAPSHOT_KEY = "headlines:snapshot"
+# Checkpoint único para todos los crawls incrementales (refresco periódico y
+# `manage.py refresh-books`): se ejecutan bajo el mismo lease, así que nunca a
+# la vez, y el siguiente que arranque continúa el que se interrumpió
+CRAWL_CHECKPOINT_KEY = "crawl:checkpoint"
+CRAWL_STATUS_KEY = "crawl:status"
+
+# Libera un lock solo si sigue perteneciendo a quien lo adquirió
+RELEASE_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+# Adquiere un lease solo si está libre; el token de fencing sale de un
+# contador que nunca decrece, así que cada nuevo propietario tiene uno mayor
+ACQUIRE_LEASE_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 1 then
+    return false
+end
+local token = redis.call("INCR", KEYS[2])
+redis.call("SET", KEYS[1], token, "EX", ARGV[1])
+return token
+"""
+
+# Renueva un lease solo si sigue perteneciendo a quien lo adquirió
+RENEW_LEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("EXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Formatos de almacenamiento de un libro: hash de Redis o JSON en un string
+BOOK_STORAGE_FORMATS = ("hash", "json")
+
+# Longitud máxima de los n-gramas del índice de búsqueda por título
+SEARCH_NGRAM_SIZE = 3
+
+
+def category_key(category: str) -> str:
+    """Clave del set de IDs de una categoría"""
+    return f"category:{category.lower().replace(' ', '-')}"
+
+
+def book_key(book_id: str, storage_format: str = "hash") -> str:
+    """Clave de un libro según el formato de almacenamiento"""
+    if storage_format == "json":
+        return f"book_json:{book_id}"
+    return f"book:{book_id}"
+
+
+def lock_key(name: str) -> str:
+    return f"lock:{name}"
+
+
+def lock_channel(name: str) -> str:
+    """Canal pub/sub en el que se notifica la liberación de un lock"""
+    return f"lock:{name}:released"
+
+
+def job_key(job_id: str) -> str:
+    return f"job:{job_id}"
+
+
+def job_channel(job_id: str) -> str:
+    """Canal pub/sub en el que se publica el progreso de un job"""
+    return f"job:{job_id}:progress"
+
+
+def price_key(category: Optional[str] = None) -> str:
+    """Clave del sorted set por precio, global o de una categoría"""
+    if category:
+        return f"{category_key(category)}:by_price"
+    return PRICE_INDEX_KEY
+
+
+def encode_cursor(score: float, book_id: str) -> str:
+    """
+    Codifica como cursor opaco la posición (precio, ID) del último libro de
+    una página: la siguiente empieza justo después, aunque entretanto se
+    añadan o eliminen libros.
+    """
+    return base64.urlsafe_b64encode(json.dumps([score, book_id]).encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[float, str]]:
+    """Decodifica un cursor de paginación; lanza ValueError si no es válido"""
+    if not cursor:
+        return None
+    try:
+        score, book_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(score), str(book_id)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError(f"Cursor inválido: {cursor}")
+
+
+def after_cursor(
+    score: float, book_id: str, cursor: Tuple[float, str], descending: bool
+) -> bool:
+    """Indica si (score, book_id) va después del cursor en el orden pedido"""
+    if descending:
+        return (score, book_id) < cursor
+    return (score, book_id) > cursor
+
+
+def paginate_books(
+    books: List[Book], query: BookQuery
+) -> Tuple[List[Book], Optional[str]]:
+    """
+    Aplica en memoria los filtros de precio, el orden y la paginación de
+    `query` sobre una lista de libros ya acotada (p. ej. resultados de búsqueda).
+    Para paginar se ordena por (precio, ID), igual que en el sorted set.
+    """
+    cursor = decode_cursor(query.cursor)
+    descending = query.sort == BookSort.price_desc
+    if query.min_price is not None:
+        books = [book for book in books if book.price >= query.min_price]
+    if query.max_price is not None:
+        books = [book for book in books if book.price <= query.max_price]
+    if query.sort or query.limit is not None or cursor:
+        books = sorted(
+            books, key=lambda book: (book.price, book.id), reverse=descending
         )
+    if cursor:
+        books = [
+            book
+            for book in books
+            if after_cursor(book.price, book.id, cursor, descending)
+        ]
+
+    if query.limit is None or len(books) <= query.limit:
+        return books, None
+    books = books[: query.limit]
+    return books, encode_cursor(books[-1].price, books[-1].id)
+
+
+def page_state_key(url: str) -> str:
+    """Clave del estado de crawl (ETag, Last-Modified, hash) de una página"""
+    return f"crawl:page:{hashlib.md5(url.encode()).hexdigest()}"
+
+
+def search_key(gram: str) -> str:
+    """Clave del set de IDs de libros cuyo título contiene el n-grama"""
+    return f"search:gram:{gram}"
+
+
+def title_ngrams(
+    text: str, sizes: Iterable[int] = range(1, SEARCH_NGRAM_SIZE + 1)
+) -> Set[str]:
+    """
+    Obtiene los n-gramas (en minúsculas) de un texto para los tamaños dados.
+
+    Indexar todos los n-gramas de hasta SEARCH_NGRAM_SIZE caracteres permite
+    resolver cualquier búsqueda por subcadena: las consultas cortas son en sí
+    mismas un n-grama y las largas se resuelven intersectando sus trigramas.
+    """
+    text = text.lower()
+    return {
+        text[start : start + size]
+        for size in sizes
+        for start in range(len(text) - size + 1)
+    }
+
+
+def create_redis_pool() -> redis.ConnectionPool:
+    """Crea el pool de conexiones compartido por todos los RedisService"""
+    return redis.ConnectionPool(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        db=settings.REDIS_DB,
+        password=settings.REDIS_PASSWORD,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+        decode_responses=True,
+    )
+
+
+def merge_stored_fields(
+    books: List[Book], stored: List[Optional[str]]
+) -> List[Book]:
+    """
+    Conserva los campos ya guardados (JSON en `stored`, en el mismo orden que
+    `books`) que el libro nuevo no trae, p. ej. los datos de detalle al volver
+    a guardar un libro desde su listado, igual que hace HSET en el formato
+    "hash". Los valores guardados se validan aquí, al escribir; uno
+    corrupto se sustituye por el libro nuevo.
+    """
+    merged = []
+    for book, value in zip(books, stored):
+        try:
+            stored_book = Book.model_validate_json(value) if value else None
+        except ValueError:
+            stored_book = None
+        merged.append(
+            stored_book.model_copy(update=book.model_dump(exclude_none=True))
+            if stored_book
+            else book
+        )
+    return merged
+
+
+class Subscriber:
+    """
+    Conexión pub/sub compartida por todo un worker.
+
+    Una única tarea lee los mensajes y los reparte en colas asyncio entre
+    los oyentes de cada canal, de modo que los streams SSE y las esperas de
+    locks no ocupan cada uno una conexión del pool. Si un oyente se queda
+    atrás se descartan sus mensajes más antiguos.
+    """
+
+    def __init__(self, redis_client: redis.Redis):
+        self.redis_client = redis_client
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+        self._listeners: Dict[str, Set[asyncio.Queue]] = {}
+        self._lock = asyncio.Lock()
+
+    @asynccontextmanager
+    async def listen(self, channel: str) -> AsyncIterator[asyncio.Queue]:
+        """Se suscribe a `channel` y devuelve la cola donde llegan sus mensajes"""
+        queue: asyncio.Queue = asyncio.Queue(
+            maxsize=settings.REDIS_SUBSCRIBER_QUEUE_SIZE
+        )
+        async with self._lock:
+            if self._pubsub is None:
+                self._pubsub = self.redis_client.pubsub()
+            listeners = self._listeners.setdefault(channel, set())
+            if not listeners:
+                await self._pubsub.subscribe(channel)
+            listeners.add(queue)
+            if self._reader is None:
+                self._reader = asyncio.create_task(self._read())
+        try:
+            yield queue
+        finally:
+            async with self._lock:
+                listeners = self._listeners.get(channel, set())
+                listeners.discard(queue)
+                if not listeners and channel in self._listeners:
+                    del self._listeners[channel]
+                    try:
+                        await self._pubsub.unsubscribe(channel)
+                    except Exception as e:
+                        print(f"Error unsubscribing from {channel}: {e}")
+
+    def listener_count(self) -> int:
+        return sum(len(listeners) for listeners in self._listeners.values())
+
+    async def _read(self) -> None:
+        while True:
+            try:
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # redis-py reconecta y renueva las suscripciones al reintentar
+                print(f"Error reading pub/sub messages from Redis: {e}")
+                await asyncio.sleep(1.0)
+                continue
+            if message is None or message.get("type") != "message":
+                continue
+            for queue in list(self._listeners.get(message["channel"], ())):
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(message["data"])
+
+    async def close(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            await asyncio.gather(self._reader, return_exceptions=True)
+            self._reader = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+
+
+class LeaseLostError(Exception):
+    """El lease usado para escribir ya no pertenece a este cliente"""
+
+
+class RedisService:
+    def __init__(
+        self,
+        pool: Optional[redis.ConnectionPool] = None,
+        storage_format: Optional[str] = None,
+        subscriber: Optional[Subscriber] = None,
+    ):
+        # Si no se recibe un pool compartido, se crea uno propio
+        self._owns_pool = pool is None
+        self.pool = pool or create_redis_pool()
+        self.redis_client = redis.Redis(connection_pool=self.pool)
+        # Igual con la conexión pub/sub, que solo se abre al primer uso
+        self._owns_subscriber = subscriber is None
+        self.subscriber = subscriber or Subscriber(self.redis_client)
+        self.storage_format = storage_format or settings.BOOK_STORAGE_FORMAT
+        if self.storage_format not in BOOK_STORAGE_FORMATS:
+            raise ValueError(
+                f"Formato de almacenamiento desconocido: {self.storage_format}"
+            )
+        # Lock (clave, token) que debe seguir siendo nuestro para escribir libros
+        self.fence: Optional[Tuple[str, str]] = None
+
+    def fenced(self, name: str, token: int) -> "RedisService":
+        """
+        Devuelve un servicio que comparte la conexión pero cuyas escrituras de
+        libros solo se aplican mientras el lock `name` conserve `token`.
+        """
+        service = copy.copy(self)
+        service._owns_pool = False
+        service._owns_subscriber = False
+        service.fence = (lock_key(name), str(token))
+        return service
+
+    async def close(self) -> None:
+        """Cierra el cliente y, si son propios, el suscriptor y el pool"""
+        if self._owns_subscriber:
+            await self.subscriber.close()
+        await self.redis_client.aclose()
+        if self._owns_pool:
+            await self.pool.aclose()
 
     async def store_book(self, book: Book) -> bool:
         """Almacena un libro en Redis"""
+        return await self.store_books([book]) == 1
+
+    async def store_books(self, books: List[Book]) -> int:
+        """
+        Almacena varios libros y sus índices en una única transacción pipelined.
+
+        Si el servicio tiene `fence`, la transacción vigila (WATCH) el lock y
+        no se aplica si otro cliente lo ha adquirido entretanto. En formato
+        "json" vigila también los libros, cuyos campos guardados se combinan
+        con los nuevos: si otro cliente escribe uno de ellos a la vez, la
+        transacción se repite con los datos actualizados.
+
+        Returns:
+            int: Número de libros guardados (0 si la transacción falla)
+        """
+        if not books:
+            return 0
         try:
-            book_data = book.model_dump()
-            self.redis_client.hset(f"book:{book.id}", mapping=book_data)
-            self.redis_client.sadd(f"category:{book.category.lower().replace(' ', '-')}", book.id)
-            return True
+            for _ in range(settings.REDIS_WATCH_RETRIES):
+                try:
+                    return await self._store_books_once(books)
+                except redis.WatchError:
+                    continue
+            print("Error storing books in Redis: too many concurrent updates")
+            return 0
         except Exception as e:
-            print(f"Error storing book in Redis: {e}")
-            return False
+            print(f"Error storing books in Redis: {e}")
+            return 0
+
+    async def _store_books_once(self, books: List[Book]) -> int:
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            if self.storage_format == "json":
+                keys = [book_key(book.id, "json") for book in books]
+                await self._watch(pipe, *keys)
+                books = merge_stored_fields(books, await pipe.mget(keys))
+            else:
+                await self._watch(pipe)
+            pipe.multi()
+            for book in books:
+                self._write_book(pipe, book, self.storage_format)
+                pipe.sadd(category_key(book.category), book.id)
+                pipe.sadd(ALL_BOOKS_KEY, book.id)
+                pipe.zadd(price_key(), {book.id: book.price})
+                pipe.zadd(price_key(book.category), {book.id: book.price})
+                for gram in title_ngrams(book.title):
+                    pipe.sadd(search_key(gram), book.id)
+            pipe.incr(CATALOG_VERSION_KEY)
+            await pipe.execute()
+        return len(books)
+
+    async def _watch(self, pipe, *keys: str) -> None:
+        """
+        Vigila (WATCH) en una transacción las claves `keys` y el lock de
+        `fence`, comprobando que éste sigue siendo nuestro; si alguna cambia
+        antes de EXEC la transacción se aborta con WatchError.
+        """
+        watched = list(keys)
+        if self.fence:
+            watched.append(self.fence[0])
+        if not watched:
+            return
+        await pipe.watch(*watched)
+        if self.fence:
+            key, token = self.fence
+            if await pipe.get(key) != token:
+                raise LeaseLostError(f"El lock {key} ya no es nuestro")
+
+    async def count_books(self) -> int:
+        """Número de libros del catálogo (SCARD del índice global)"""
+        return await self.redis_client.scard(ALL_BOOKS_KEY)
+
+    async def get_catalog_version(self) -> Optional[int]:
+        """Obtiene la versión actual del catálogo o None si Redis falla"""
+        try:
+            return int(await self.redis_client.get(CATALOG_VERSION_KEY) or 0)
+        except Exception as e:
+            print(f"Error getting catalog version from Redis: {e}")
+            return None
 
     async def get_books(self, category: Optional[str] = None) -> List[Book]:
         """Obtiene todos los libros o filtrados por categoría"""
         try:
             if category:
                 # Obtener IDs de libros de la categoría específica
-                book_ids = self.redis_client.smembers(f"category:{category.lower()}")
+                book_ids = await self.redis_client.smembers(category_key(category))
 
                 # Si no hay libros en esa categoría, retornar lista vacía
                 if not book_ids:
                     return []
             else:
-                # Obtener todos los libros (buscar claves con patrón "book:*")
-                keys = self.redis_client.keys("book:*")
-                book_ids = [key.split(":")[1] for key in keys]
+                # Obtener todos los libros desde el índice global del catálogo
+                book_ids = await self.redis_client.smembers(ALL_BOOKS_KEY)
 
-            books = []
-            for book_id in book_ids:
-                book_data = self.redis_client.hgetall(f"book:{book_id}")
-                if book_data:
-                    # Convertir tipos de datos
-                    book_data["price"] = float(book_data["price"])
-                    book_data["id"] = book_id
-                    books.append(Book(**book_data))
-
-            return books
+            return await self.get_books_by_ids(book_ids)
         except Exception as e:
             print(f"Error getting books from Redis: {e}")
             return []
 
+    async def query_books(
+        self, category: Optional[str], query: BookQuery
+    ) -> Tuple[List[Book], Optional[str]]:
+        """
+        Obtiene una página de libros filtrada por rango de precio y ordenada,
+        usando el sorted set por precio (global o de la categoría).
+
+        Returns:
+            Tupla con los libros de la página y el cursor de la siguiente
+            página (None si no hay más resultados).
+        """
+        cursor = decode_cursor(query.cursor)
+        low = "-inf" if query.min_price is None else query.min_price
+        high = "+inf" if query.max_price is None else query.max_price
+        descending = query.sort == BookSort.price_desc
+        # Se pide un elemento extra para saber si hay una página siguiente
+        wanted = None if query.limit is None else query.limit + 1
+
+        try:
+            entries: List[Tuple[str, float]] = []
+            if cursor:
+                score, _ = cursor
+                # Libros con el mismo precio que el último de la página anterior
+                # (normalmente pocos): se siguen por ID
+                ties = await self.redis_client.zrange(
+                    price_key(category), score, score, byscore=True, withscores=True
+                )
+                entries = [
+                    (book_id, tie_score)
+                    for book_id, tie_score in sorted(ties, reverse=descending)
+                    if after_cursor(tie_score, book_id, cursor, descending)
+                ][:wanted]
+                # El resto empieza estrictamente después de ese precio
+                if descending:
+                    high = f"({score}"
+                else:
+                    low = f"({score}"
+
+            if wanted is None:
+                entries += await self.redis_client.zrange(
+                    price_key(category),
+                    high if descending else low,
+                    low if descending else high,
+                    desc=descending,
+                    byscore=True,
+                    withscores=True,
+                )
+            elif len(entries) < wanted:
+                entries += await self.redis_client.zrange(
+                    price_key(category),
+                    high if descending else low,
+                    low if descending else high,
+                    desc=descending,
+                    byscore=True,
+                    offset=0,
+                    num=wanted - len(entries),
+                    withscores=True,
+                )
+
+            next_cursor = None
+            if query.limit is not None and len(entries) > query.limit:
+                entries = entries[: query.limit]
+                next_cursor = encode_cursor(entries[-1][1], entries[-1][0])
+
+            book_ids = [book_id for book_id, _ in entries]
+            return await self.get_books_by_ids(book_ids), next_cursor
+        except Exception as e:
+            print(f"Error querying books from Redis: {e}")
+            return [], None
+
+    async def get_books_by_ids(
+        self, book_ids: Iterable[str], batch_size: Optional[int] = None
+    ) -> List[Book]:
+        """
+        Obtiene varios libros por ID usando pipelines, en lotes de `batch_size`
+        para no enviar un único pipeline gigante con catálogos grandes.
+        """
+        batch_size = batch_size or settings.REDIS_BATCH_SIZE
+        book_ids = list(book_ids)
+        books = []
+
+        for start in range(0, len(book_ids), batch_size):
+            batch = book_ids[start : start + batch_size]
+            books.extend(await self._read_books(batch, self.storage_format))
+
+        return books
+
+    def _write_book(self, pipe, book: Book, storage_format: str) -> None:
+        """Añade al pipeline la escritura de un libro en el formato dado"""
+        if storage_format == "json":
+            pipe.set(
+                book_key(book.id, storage_format),
+                book.model_dump_json(exclude_none=True),
+            )
+        else:
+            # Redis no admite None: los campos vacíos no se guardan
+            pipe.hset(book_key(book.id), mapping=book.model_dump(exclude_none=True))
+
+    async def _read_books(self, book_ids: List[str], storage_format: str) -> List[Book]:
+        """Lee un lote de libros en el formato dado; omite los que no existen"""
+        if not book_ids:
+            return []
+
+        if storage_format == "json":
+            # Un único MGET. Los valores los escribe este servicio a partir de
+            # libros ya validados, así que se construyen sin validar; un valor
+            # ilegible se omite en lugar de hacer fallar toda la lectura
+            values = await self.redis_client.mget(
+                [book_key(book_id, storage_format) for book_id in book_ids]
+            )
+            books = []
+            for book_id, value in zip(book_ids, values):
+                if not value:
+                    continue
+                try:
+                    books.append(Book.model_construct(**json.loads(value)))
+                except (ValueError, TypeError) as e:
+                    print(f"Skipping unreadable book {book_id} in Redis: {e}")
+            return books
+
+        pipe = self.redis_client.pipeline(transaction=False)
+        for book_id in book_ids:
+            pipe.hgetall(book_key(book_id))
+
+        books = []
+        for book_id, book_data in zip(book_ids, await pipe.execute()):
+            if book_data:
+                # Convertir tipos de datos
+                book_data["price"] = float(book_data["price"])
+                book_data["id"] = book_id
+                books.append(Book(**book_data))
+        return books
+
+    async def iter_books(
+        self, category: Optional[str] = None, batch_size: Optional[int] = None
+    ) -> AsyncIterator[Book]:
+        """
+        Recorre los libros (todos o de una categoría) sin cargar el catálogo
+        en memoria: los IDs se leen con SSCAN y los hashes en lotes pipelined
+        de `batch_size`. Como SSCAN, puede repetir algún libro si el set
+        cambia durante el recorrido.
+        """
+        batch_size = batch_size or settings.REDIS_BATCH_SIZE
+        key = category_key(category) if category else ALL_BOOKS_KEY
+        batch = []
+        async for book_id in self.redis_client.sscan_iter(key, count=batch_size):
+            batch.append(book_id)
+            if len(batch) >= batch_size:
+                for book in await self.get_books_by_ids(batch, batch_size):
+                    yield book
+                batch = []
+
+        for book in await self.get_books_by_ids(batch, batch_size):
+            yield book
+
     async def search_books(
         self, title: Optional[str] = None, category: Optional[str] = None
     ) -> List[Book]:
         """Busca libros por título y/o categoría"""
         try:
-            # Primero obtenemos los libros (todos o por categoría)
-            books = await self.get_books(category)
+            if not title:
+                return await self.get_books(category)
 
-            # Si hay un título para filtrar, lo aplicamos
-            if title:
-                title_lower = title.lower()
-                books = [book for book in books if title_lower in book.title.lower()]
+            # Obtener candidatos intersectando los sets del índice de n-gramas
+            title_lower = title.lower()
+            if len(title_lower) <= SEARCH_NGRAM_SIZE:
+                grams = {title_lower}
+            else:
+                grams = title_ngrams(title_lower, sizes=[SEARCH_NGRAM_SIZE])
+            keys = [search_key(gram) for gram in grams]
+            if category:
+                keys.append(category_key(category))
 
-            return books
+            book_ids = await self.redis_client.sinter(keys)
+            books = await self.get_books_by_ids(book_ids)
+
+            # Los n-gramas solo acotan candidatos: se confirma la subcadena
+            return [book for book in books if title_lower in book.title.lower()]
         except Exception as e:
             print(f"Error searching books in Redis: {e}")
             return []
-    
+
+    async def rebuild_indexes(self) -> int:
+        """
+        Reconstruye los índices del catálogo a partir de las claves de libros
+        existentes (`book:*` o `book_json:*` según el formato). Usa SCAN para
+        no bloquear Redis y sirve como migración para datos almacenados antes
+        de que existieran los índices.
+        """
+        book_ids = []
+        async for key in self.redis_client.scan_iter(
+            match=book_key("*", self.storage_format), count=1000
+        ):
+            book_ids.append(key.split(":", 1)[1])
+
+        batch_size = settings.REDIS_BATCH_SIZE
+        for start in range(0, len(book_ids), batch_size):
+            batch = book_ids[start : start + batch_size]
+            if self.storage_format == "json":
+                books = {
+                    book.id: book
+                    for book in await self._read_books(batch, self.storage_format)
+                }
+                fields = [
+                    (book.category, book.title, book.price)
+                    if (book := books.get(book_id))
+                    else (None, None, None)
+                    for book_id in batch
+                ]
+            else:
+                pipe = self.redis_client.pipeline(transaction=False)
+                for book_id in batch:
+                    pipe.hmget(book_key(book_id), "category", "title", "price")
+                fields = await pipe.execute()
+
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.sadd(ALL_BOOKS_KEY, *batch)
+            for book_id, (category, title, price) in zip(batch, fields):
+                if price:
+                    pipe.zadd(price_key(), {book_id: float(price)})
+                if category:
+                    pipe.sadd(category_key(category), book_id)
+                    if price:
+                        pipe.zadd(price_key(category), {book_id: float(price)})
+                for gram in title_ngrams(title or ""):
+                    pipe.sadd(search_key(gram), book_id)
+            await pipe.execute()
+
+        await self.redis_client.incr(CATALOG_VERSION_KEY)
+        return len(book_ids)
+
+    async def migrate_book_storage(self, target_format: str) -> int:
+        """
+        Convierte todos los libros al formato `target_format` ("hash" o
+        "json") y borra las claves del formato anterior. Se procesa por lotes
+        con SCAN; cada lote se escribe en una transacción.
+
+        Returns:
+            int: Número de libros migrados
+        """
+        if target_format not in BOOK_STORAGE_FORMATS:
+            raise ValueError(f"Formato de almacenamiento desconocido: {target_format}")
+        source_format = next(f for f in BOOK_STORAGE_FORMATS if f != target_format)
+
+        migrated = 0
+        batch = []
+        async for key in self.redis_client.scan_iter(
+            match=book_key("*", source_format), count=1000
+        ):
+            batch.append(key.split(":", 1)[1])
+            if len(batch) >= settings.REDIS_BATCH_SIZE:
+                migrated += await self._migrate_batch(
+                    batch, source_format, target_format
+                )
+                batch = []
+        migrated += await self._migrate_batch(batch, source_format, target_format)
+
+        self.storage_format = target_format
+        await self.redis_client.incr(CATALOG_VERSION_KEY)
+        return migrated
+
+    async def _migrate_batch(
+        self, book_ids: List[str], source_format: str, target_format: str
+    ) -> int:
+        # La migración no confía en los datos: valida cada libro y deja en su
+        # formato original los que no son válidos
+        books = []
+        for book in await self._read_books(book_ids, source_format):
+            try:
+                books.append(Book.model_validate(book.model_dump()))
+            except ValueError as e:
+                print(f"Skipping invalid book {book.id} during migration: {e}")
+        if not books:
+            return 0
+        pipe = self.redis_client.pipeline(transaction=True)
+        for book in books:
+            self._write_book(pipe, book, target_format)
+            pipe.delete(book_key(book.id, source_format))
+        await pipe.execute()
+        return len(books)
+
+    async def get_headlines_snapshot(self) -> Optional[HeadlineList]:
+        """Obtiene la última instantánea de titulares guardada"""
+        try:
+            data = await self.redis_client.get(HEADLINES_SNAPSHOT_KEY)
+            return HeadlineList.model_validate_json(data) if data else None
+        except Exception as e:
+            print(f"Error getting headlines snapshot from Redis: {e}")
+            return None
+
+    async def store_headlines_snapshot(self, snapshot: HeadlineList) -> bool:
+        """Guarda la instantánea de titulares más reciente"""
+        try:
+            await self.redis_client.set(
+                HEADLINES_SNAPSHOT_KEY, snapshot.model_dump_json()
+            )
+            return True
+        except Exception as e:
+            print(f"Error storing headlines snapshot in Redis: {e}")
+            return False
+
+    async def acquire_lease(self, name: str, ttl: int) -> Optional[int]:
+        """
+        Intenta adquirir un lock con expiración que se mantiene renovándolo
+        (heartbeat) con `renew_lease`.
+
+        Returns:
+            El token de fencing del lease, None si otro cliente lo tiene.
+        """
+        token = await self.redis_client.eval(
+            ACQUIRE_LEASE_SCRIPT, 2, lock_key(name), f"{lock_key(name)}:fence", ttl
+        )
+        return int(token) if token is not None else None
+
+    async def renew_lease(self, name: str, token: int, ttl: int) -> bool:
+        """Extiende el lease si sigue siendo nuestro; False si se perdió"""
+        renewed = await self.redis_client.eval(
+            RENEW_LEASE_SCRIPT, 1, lock_key(name), str(token), ttl
+        )
+        return bool(renewed)
+
+    async def is_locked(self, name: str) -> bool:
+        return bool(await self.redis_client.exists(lock_key(name)))
+
+    async def release_lock(self, name: str, token: int) -> bool:
+        """
+        Libera un lock si el token coincide con el del propietario y avisa a
+        quienes esperan en `wait_for_unlock`.
+        """
+        released = await self.redis_client.eval(
+            RELEASE_LOCK_SCRIPT, 1, lock_key(name), str(token)
+        )
+        if released:
+            await self.redis_client.publish(lock_channel(name), str(token))
+        return bool(released)
+
+    async def wait_for_unlock(self, name: str, timeout: Optional[float] = None) -> bool:
+        """
+        Espera a que se libere el lock `name`. Se despierta con la
+        notificación de `release_lock` y comprueba el lock al menos una vez
+        por segundo, por si el propietario murió y el lease expiró.
+
+        Returns:
+            True si el lock quedó libre, False si se agotó `timeout`.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout is not None else None
+        # Suscribirse antes de comprobar el lock para no perder la notificación
+        async with self.subscriber.listen(lock_channel(name)) as released:
+            while await self.is_locked(name):
+                wait = 1.0
+                if deadline is not None:
+                    wait = min(wait, deadline - loop.time())
+                    if wait <= 0:
+                        return False
+                try:
+                    await asyncio.wait_for(released.get(), wait)
+                except asyncio.TimeoutError:
+                    pass
+            return True
+
+    async def get_crawl_status(self) -> Optional[CrawlStatus]:
+        """Obtiene el estado del último crawl del catálogo"""
+        data = await self.redis_client.get(CRAWL_STATUS_KEY)
+        return CrawlStatus.model_validate_json(data) if data else None
+
+    async def set_crawl_status(self, status: CrawlStatus) -> None:
+        """
+        Guarda el estado del crawl en curso (respetando `fence` si lo hay) y
+        lo publica como progreso de su job.
+
+        Renovar el lease (EXPIRE del lock) invalida el WATCH de `fence` aunque
+        el lock siga siendo nuestro, así que la escritura se repite hasta
+        REDIS_WATCH_RETRIES veces antes de fallar con WatchError.
+        """
+        data = status.model_dump_json()
+        for _ in range(settings.REDIS_WATCH_RETRIES):
+            try:
+                return await self._set_crawl_status_once(status.job_id, data)
+            except redis.WatchError:
+                continue
+        raise redis.WatchError("too many concurrent updates of the crawl status")
+
+    async def _set_crawl_status_once(self, job_id: Optional[str], data: str) -> None:
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            await self._watch(pipe)
+            pipe.multi()
+            pipe.set(CRAWL_STATUS_KEY, data)
+            if job_id:
+                self._write_job(pipe, job_id, data)
+            await pipe.execute()
+
+    async def get_job(self, job_id: str) -> Optional[CrawlStatus]:
+        """Obtiene el estado de un job de crawl"""
+        data = await self.redis_client.get(job_key(job_id))
+        return CrawlStatus.model_validate_json(data) if data else None
+
+    async def save_job(self, job: CrawlStatus) -> None:
+        """Guarda y publica el estado de un job que no es el crawl en curso"""
+        pipe = self.redis_client.pipeline(transaction=True)
+        self._write_job(pipe, job.job_id, job.model_dump_json())
+        await pipe.execute()
+
+    def _write_job(self, pipe, job_id: str, data: str) -> None:
+        pipe.set(job_key(job_id), data, ex=settings.CRAWL_JOB_TTL)
+        pipe.publish(job_channel(job_id), data)
+
+    async def iter_job_updates(
+        self, job_id: str, keepalive: float = 15.0
+    ) -> AsyncIterator[CrawlStatus]:
+        """
+        Emite el estado actual de un job y después cada actualización
+        publicada, hasta que termina. Tras `keepalive` segundos sin
+        novedades vuelve a leer y emitir el estado guardado, lo que mantiene
+        viva la conexión y cubre actualizaciones perdidas.
+        """
+        # Suscribirse antes de leer el estado para no perder actualizaciones
+        async with self.subscriber.listen(job_channel(job_id)) as updates:
+            job = await self.get_job(job_id)
+            while job is not None:
+                yield job
+                if job.is_finished:
+                    return
+                try:
+                    data = await asyncio.wait_for(updates.get(), keepalive)
+                except asyncio.TimeoutError:
+                    job = await self.get_job(job_id)
+                else:
+                    job = CrawlStatus.model_validate_json(data)
+
+    async def get_page_state(self, url: str) -> Dict[str, str]:
+        """Obtiene el estado guardado del último crawl de una página"""
+        return await self.redis_client.hgetall(page_state_key(url))
+
+    async def set_page_state(self, url: str, state: Dict[str, str]) -> None:
+        """Guarda el estado de crawl de una página (sustituye al anterior)"""
+        key = page_state_key(url)
+        pipe = self.redis_client.pipeline()
+        pipe.delete(key)
+        pipe.hset(key, mapping={k: v for k, v in state.items() if v is not None})
+        await pipe.execute()
+
+    async def get_crawl_checkpoint(self) -> Dict[str, str]:
+        """
+        Obtiene el checkpoint del crawl en curso: URL de cada categoría ->
+        URL de la siguiente página a procesar ("" si la categoría terminó).
+        """
+        return await self.redis_client.hgetall(CRAWL_CHECKPOINT_KEY)
+
+    async def set_crawl_checkpoint(
+        self, category_url: str, next_url: Optional[str]
+    ) -> None:
+        await self.redis_client.hset(
+            CRAWL_CHECKPOINT_KEY, category_url, next_url or ""
+        )
+
+    async def clear_crawl_checkpoint(self) -> None:
+        await self.redis_client.delete(CRAWL_CHECKPOINT_KEY)
+
     async def ping(self) -> bool:
         """Verifica la conexión a Redis"""
         try:
-            return self.redis_client.ping()
-        except redis.ConnectionError:
+            return await self.redis_client.ping()
+        except (redis.ConnectionError, redis.TimeoutError):
             return False
 
 
-def get_redis_service() -> RedisService:
-    return RedisService()
+def get_redis_pool(app) -> redis.ConnectionPool:
+    """
+    Devuelve el pool compartido de la aplicación. Normalmente lo crea el
+    lifespan; si no se ejecutó (por ejemplo en tests) se crea bajo demanda.
+    """
+    pool = getattr(app.state, "redis_pool", None)
+    if pool is None:
+        pool = app.state.redis_pool = create_redis_pool()
+    return pool
+
+
+def get_subscriber(app) -> Subscriber:
+    """
+    Devuelve el suscriptor pub/sub compartido de la aplicación, creándolo
+    bajo demanda igual que el pool.
+    """
+    subscriber = getattr(app.state, "redis_subscriber", None)
+    if subscriber is None:
+        subscriber = app.state.redis_subscriber = Subscriber(
+            redis.Redis(connection_pool=get_redis_pool(app))
+        )
+    return subscriber
+
+
+def get_redis_service(request: Request) -> RedisService:
+    return RedisService(
+        pool=get_redis_pool(request.app), subscriber=get_subscriber(request.app)
+    )
@@ -0,0 +1,252 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timezone
+from concurrent.futures import Executor
+from typing import List, Optional
+
+from app.core.config import settings
+from app.models.schemas import Book, CrawlProgress, CrawlStatus, JobStatus
+from app.scraping.scrape_books import BookScraper, create_parse_pool
+from app.services.redis_service import LeaseLostError, RedisService
+
+logger = logging.getLogger(__name__)
+
+# Lock que garantiza un único crawl del catálogo en todo el clúster
+BOOK_CRAWL_LOCK = "books:crawl"
+
+
+# Pool de parseo compartido por todos los crawls del worker; lo crea y cierra
+# el lifespan
+_parse_pool: Optional[Executor] = None
+
+
+def init_parse_pool() -> Optional[Executor]:
+    """Crea el pool de parseo de la aplicación según SCRAPER_PARSE_EXECUTOR"""
+    global _parse_pool
+    if _parse_pool is None:
+        _parse_pool = create_parse_pool(
+            settings.SCRAPER_PARSE_EXECUTOR,
+            settings.SCRAPER_PARSE_WORKERS or os.cpu_count() or 1,
+        )
+    return _parse_pool
+
+
+def get_parse_pool() -> Optional[Executor]:
+    """
+    Devuelve el pool compartido, sustituyéndolo si quedó inservible (p. ej.
+    porque murió un proceso worker).
+    """
+    global _parse_pool
+    if _parse_pool is not None and getattr(_parse_pool, "_broken", False):
+        logger.warning("Parse pool is broken; creating a new one")
+        _parse_pool.shutdown(wait=False, cancel_futures=True)
+        _parse_pool = None
+        init_parse_pool()
+    return _parse_pool
+
+
+def close_parse_pool() -> None:
+    global _parse_pool
+    if _parse_pool is not None:
+        _parse_pool.shutdown(wait=False, cancel_futures=True)
+        _parse_pool = None
+
+
+def build_book_scraper(
+    redis_service: RedisService, incremental: bool = False
+) -> BookScraper:
+    """Crea un BookScraper con la configuración de la aplicación"""
+    return BookScraper(
+        base_url=settings.BOOK_SCRAPER_URL,
+        redis_service=redis_service,
+        logs_dir=settings.LOGS_DIR,
+        max_books=settings.MAX_BOOKS_TO_SCRAPE,
+        price_limit=settings.PRICE_LIMIT,
+        max_concurrent_requests=settings.SCRAPER_MAX_CONCURRENT_REQUESTS,
+        min_concurrent_requests=settings.SCRAPER_MIN_CONCURRENT_REQUESTS,
+        max_concurrent_requests_limit=settings.SCRAPER_MAX_CONCURRENT_REQUESTS_LIMIT,
+        target_latency=settings.SCRAPER_TARGET_LATENCY,
+        max_retries=settings.SCRAPER_MAX_RETRIES,
+        retry_backoff=settings.SCRAPER_RETRY_BACKOFF,
+        workers=settings.SCRAPER_WORKERS or None,
+        enrich_details=settings.SCRAPER_ENRICH_DETAILS,
+        detail_concurrency=settings.SCRAPER_DETAIL_CONCURRENCY,
+        detail_queue_size=settings.SCRAPER_DETAIL_QUEUE_SIZE,
+        incremental=incremental,
+        parse_executor=settings.SCRAPER_PARSE_EXECUTOR,
+        parse_workers=settings.SCRAPER_PARSE_WORKERS or None,
+        max_concurrent_parses=settings.SCRAPER_MAX_CONCURRENT_PARSES or None,
+        parse_pool=get_parse_pool(),
+        html_parser=settings.SCRAPER_HTML_PARSER,
+        write_batch_size=settings.SCRAPER_WRITE_BATCH_SIZE,
+        write_flush_interval=settings.SCRAPER_WRITE_FLUSH_INTERVAL,
+    )
+
+
+async def run_book_crawl(
+    redis_service: RedisService,
+    incremental: bool = False,
+    wait: bool = True,
+    lock_ttl: int = settings.BOOK_CRAWL_LOCK_TTL,
+    job_id: Optional[str] = None,
+    token: Optional[int] = None,
+) -> Optional[List[Book]]:
+    """
+    Ejecuta un crawl del catálogo si ningún otro worker o réplica lo está
+    haciendo.
+
+    El crawl se protege con un lease en Redis que se renueva periódicamente
+    y cuyo token de fencing acompaña a las escrituras de libros: si el lease
+    se pierde (p. ej. por una pausa larga) el crawl se detiene y sus
+    escrituras dejan de aplicarse. El estado y el progreso se publican en
+    Redis cada CRAWL_PROGRESS_INTERVAL segundos para que cualquier worker
+    pueda consultarlos.
+
+    Args:
+        incremental: Hace un crawl incremental
+        wait: Si otro cliente tiene el lock, espera a que termine su crawl
+        job_id: Job al que se asocia el crawl (por defecto, uno nuevo)
+        token: Lease del crawl ya adquirido por quien llama (por defecto se
+            intenta adquirir aquí)
+
+    Returns:
+        Los libros obtenidos, o None si el crawl lo hizo otro cliente.
+    """
+    if token is None:
+        token = await redis_service.acquire_lease(BOOK_CRAWL_LOCK, lock_ttl)
+    if token is None:
+        if wait:
+            logger.info("Otro worker está haciendo el crawl de libros; esperando")
+            await redis_service.wait_for_unlock(BOOK_CRAWL_LOCK)
+        return None
+
+    fenced_service = redis_service.fenced(BOOK_CRAWL_LOCK, token)
+    now = datetime.now(timezone.utc)
+    status = CrawlStatus(
+        job_id=job_id or uuid.uuid4().hex,
+        status=JobStatus.running,
+        owner=f"{socket.gethostname()}:{os.getpid()}",
+        fencing_token=token,
+        incremental=incremental,
+        created_at=now,
+        started_at=now,
+    )
+    await fenced_service.set_crawl_status(status)
+
+    async def finish_listing(books: List[Book]) -> None:
+        # El catálogo ya está guardado: el job se da por terminado aunque el
+        # enriquecimiento de detalles siga en curso (con el lease, para que
+        # sus escrituras sigan protegidas)
+        if heartbeat.done():
+            return
+        reporter.cancel()
+        await asyncio.gather(reporter, return_exceptions=True)
+        status.status = JobStatus.done
+        status.progress = CrawlProgress(**scraper.progress())
+        # Si los listados ya terminaron, su hora de fin es la del crawl
+        status.finished_at = status.finished_at or datetime.now(timezone.utc)
+        try:
+            await fenced_service.set_crawl_status(status)
+        except LeaseLostError:
+            pass
+        except Exception as e:
+            logger.warning(f"Could not save book crawl status: {e}")
+
+    scraper = build_book_scraper(fenced_service, incremental=incremental)
+    scraper.on_listing_done = finish_listing
+    heartbeat = asyncio.create_task(
+        keep_lease_alive(redis_service, scraper, token, lock_ttl)
+    )
+    reporter = asyncio.create_task(publish_progress(fenced_service, scraper, status))
+    try:
+        books = await scraper.scrape_books()
+        if heartbeat.done() and heartbeat.result():
+            raise LeaseLostError("Se perdió el lock del crawl de libros")
+        status.status = JobStatus.done
+        return books
+    except BaseException as e:
+        # Un fallo tras terminar los listados no cambia el resultado del crawl
+        if status.status != JobStatus.done:
+            status.status = JobStatus.failed
+            status.error = str(e) or type(e).__name__
+        raise
+    finally:
+        # Detener el heartbeat y el progreso antes de la escritura final para
+        # que no compitan con ella
+        heartbeat.cancel()
+        reporter.cancel()
+        await asyncio.gather(heartbeat, reporter, return_exceptions=True)
+        status.progress = CrawlProgress(**scraper.progress())
+        status.finished_at = datetime.now(timezone.utc)
+        try:
+            await fenced_service.set_crawl_status(status)
+        except LeaseLostError:
+            # Si el lease se perdió, el estado ya pertenece al nuevo propietario
+            pass
+        except Exception as e:
+            logger.warning(f"Could not save final book crawl status: {e}")
+        finally:
+            # Aunque falle el estado, el lease nunca debe quedarse tomado
+            try:
+                await redis_service.release_lock(BOOK_CRAWL_LOCK, token)
+            except Exception as e:
+                logger.warning(f"Could not release book crawl lock: {e}")
+
+
+async def keep_lease_alive(
+    redis_service: RedisService, scraper: BookScraper, token: int, ttl: int
+) -> bool:
+    """Renueva el lease del crawl; si se pierde detiene el crawl y devuelve True"""
+    while True:
+        await asyncio.sleep(ttl / 3)
+        try:
+            renewed = await redis_service.renew_lease(BOOK_CRAWL_LOCK, token, ttl)
+        except Exception as e:
+            # Un fallo puntual de Redis no detiene el crawl: el lease aún dura
+            logger.warning(f"Could not renew book crawl lock: {e}")
+            continue
+        if not renewed:
+            scraper.stop_crawl("Se perdió el lock del crawl de libros")
+            return True
+
+
+async def publish_progress(
+    redis_service: RedisService,
+    scraper: BookScraper,
+    status: CrawlStatus,
+    interval: float = settings.CRAWL_PROGRESS_INTERVAL,
+) -> None:
+    """Publica periódicamente los contadores del scraper en el estado del crawl"""
+    while True:
+        await asyncio.sleep(interval)
+        status.progress = CrawlProgress(**scraper.progress())
+        try:
+            await redis_service.set_crawl_status(status)
+        except LeaseLostError:
+            return
+        except Exception as e:
+            logger.warning(f"Could not publish book crawl progress: {e}")
+
+
+async def run_periodic_book_refresh(
+    redis_service: RedisService, interval: float = settings.BOOK_REFRESH_INTERVAL
+) -> None:
+    """
+    Refresca el catálogo con un crawl incremental cada `interval` segundos.
+    Pensado para ejecutarse como tarea en segundo plano desde el lifespan.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            books = await run_book_crawl(redis_service, incremental=True, wait=False)
+            if books is None:
+                logger.info("Refresco omitido: otro worker está haciendo el crawl")
+                continue
+            logger.info(
+                f"Refresco incremental completado: {len(books)} libros nuevos o modificados"
+            )
+        except Exception as e:
+            logger.error(f"Error en el refresco incremental de libros: {e}")
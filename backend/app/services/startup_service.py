@@ -0,0 +1,114 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import Request
+
+from app.core.config import settings
+from app.models.schemas import JobStatus, StartupState
+from app.services.redis_service import RedisService
+from app.services.scrape_service import run_book_crawl
+
+logger = logging.getLogger(__name__)
+
+
+class StartupScrape:
+    """
+    Scraping inicial del catálogo como tarea independiente del arranque.
+
+    La API empieza a servir peticiones de inmediato; el estado de la carga
+    (pending, running, done o failed) se consulta en /health/ready y los
+    endpoints de libros lo usan para responder 503 mientras no haya datos.
+
+    Un fallo no es definitivo: se reintenta con espera exponencial hasta que
+    el catálogo tenga libros, ya sea por este scraping o por otro (POST /init,
+    el refresco periódico u otro worker).
+    """
+
+    def __init__(
+        self,
+        redis_service: RedisService,
+        retry_backoff: float = settings.STARTUP_RETRY_BACKOFF,
+        max_retry_backoff: float = settings.STARTUP_MAX_RETRY_BACKOFF,
+    ):
+        self.redis_service = redis_service
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+        self.status = JobStatus.pending
+        self.attempts = 0
+        self.books_scraped = 0
+        self.error: Optional[str] = None
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_ready(self) -> bool:
+        return self.status == JobStatus.done
+
+    def state(self) -> StartupState:
+        return StartupState(
+            status=self.status,
+            attempts=self.attempts,
+            books_scraped=self.books_scraped,
+            error=self.error,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+        )
+
+    def start(self) -> asyncio.Task:
+        """Lanza el scraping inicial sin esperar a que termine"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def run(self) -> None:
+        """Intenta cargar el catálogo hasta conseguirlo"""
+        while not await self.attempt():
+            backoff = min(
+                self.retry_backoff * 2 ** (self.attempts - 1), self.max_retry_backoff
+            )
+            logger.info(f"Retrying initial book scrape in {backoff:.0f}s")
+            await asyncio.sleep(backoff)
+
+    async def attempt(self) -> bool:
+        """Un intento de carga; devuelve True si el catálogo quedó listo"""
+        self.attempts += 1
+        self.status = JobStatus.running
+        self.error = None
+        self.started_at = datetime.now(timezone.utc)
+        self.finished_at = None
+        try:
+            # Si el catálogo ya tiene libros no hace falta el scraping inicial
+            if await self.redis_service.count_books():
+                self.status = JobStatus.done
+                return True
+
+            # Si otro worker ya está haciendo el crawl se espera a que termine
+            books = await run_book_crawl(self.redis_service)
+            if books is None and await self.redis_service.count_books():
+                self.status = JobStatus.done
+                return True
+            if not books:
+                raise RuntimeError("Error al inicializar la base de datos de libros")
+
+            self.books_scraped = len(books)
+            self.status = JobStatus.done
+        except Exception as e:
+            logger.error(f"Initial book scrape failed: {e}")
+            self.error = str(e)
+            self.status = JobStatus.failed
+        finally:
+            self.finished_at = datetime.now(timezone.utc)
+        return self.is_ready
+
+
+def get_startup_scrape(request: Request) -> Optional[StartupScrape]:
+    """Devuelve el scraping inicial de la aplicación (None sin lifespan)"""
+    return getattr(request.app.state, "startup_scrape", None)
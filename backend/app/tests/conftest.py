@@ -1,5 +1,8 @@
 import pytest_asyncio
+from aiohttp.test_utils import TestServer
+from unittest.mock import AsyncMock, MagicMock
 from httpx import AsyncClient, ASGITransport
+from app.core.config import settings
 from app.main import app
 
 
@@ -14,6 +17,12 @@ def disable_rate_limit():
     app.state.limiter.enabled = True
 
 
+@pytest_asyncio.fixture(autouse=True)
+def logs_to_tmp_path(tmp_path, monkeypatch):
+    """Los scrapers creados en los tests escriben sus logs en `tmp_path`"""
+    monkeypatch.setattr(settings, "LOGS_DIR", str(tmp_path / "logs"))
+
+
 @pytest_asyncio.fixture
 async def async_client():
     """Create an async client for testing."""
@@ -23,3 +32,56 @@ async def async_client():
         transport=ASGITransport(app=app), base_url="http://test"
     ) as client:
         yield client
+
+
+@pytest_asyncio.fixture
+def override_dependency():
+    """
+    Sustituye dependencias de la aplicación durante un test:
+    `override_dependency(get_redis_service, redis_service)`.
+    Las sustituciones se deshacen al terminar el test.
+    """
+
+    def override(dependency, value):
+        app.dependency_overrides[dependency] = lambda: value
+
+    yield override
+    app.dependency_overrides.clear()
+
+
+@pytest_asyncio.fixture
+async def serve_site():
+    """
+    Levanta una aplicación aiohttp en un puerto local y devuelve su URL base:
+    `base_url = await serve_site(web_app)`. Se detiene al terminar el test.
+    """
+    servers = []
+
+    async def serve(web_app):
+        server = TestServer(web_app)
+        await server.start_server()
+        servers.append(server)
+        return str(server.make_url("/"))
+
+    yield serve
+    for server in servers:
+        await server.close()
+
+
+@pytest_asyncio.fixture
+def fake_pipeline():
+    """
+    Crea pipelines de Redis simulados que registran los comandos encolados:
+    `pipe = fake_pipeline(*results)`. Cada `execute` devuelve el siguiente
+    valor de `results`.
+    """
+
+    def make(*results):
+        pipe = MagicMock()
+        pipe.__aenter__ = AsyncMock(return_value=pipe)
+        pipe.__aexit__ = AsyncMock(return_value=None)
+        pipe.watch = AsyncMock()
+        pipe.execute = AsyncMock(side_effect=list(results))
+        return pipe
+
+    return make
@@ -1,9 +1,26 @@
+import json
+
 import pytest
-from unittest.mock import patch
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.endpoints.books import STREAM_ERROR_DETAIL
+from app.models.schemas import Book, CrawlStatus, JobStatus
+from app.services.cache_service import VersionCache, get_catalog_version_cache
+from app.services.job_service import get_crawl_jobs
+from app.services.redis_service import get_redis_service
+from app.services.startup_service import StartupScrape, get_startup_scrape
 
 pytest_plugins = ('pytest_asyncio',)
 
 
+async def iterate_books(*books, error=None):
+    """Imita `RedisService.iter_books`, opcionalmente fallando al final"""
+    for book in books:
+        yield book
+    if error:
+        raise error
+
+
 # Test para el endpoint /api/v1/books sin filtro de categoría
 @pytest.mark.asyncio
 async def test_get_all_books(async_client):
@@ -153,3 +170,144 @@ async def test_book_structure_search(async_client):
             assert isinstance(book["price"], (int, float))
             assert isinstance(book["category"], str)
             assert book["price"] > 0
+
+
+# Test para validar error 422 cuando el cursor de paginación no es válido
+@pytest.mark.asyncio
+async def test_get_books_invalid_cursor(async_client):
+    response = await async_client.get("/api/v1/books?limit=10&cursor=no-valido")
+
+    assert response.status_code == 422
+
+
+# Test para validar error 422 cuando el orden solicitado no existe
+@pytest.mark.asyncio
+async def test_get_books_invalid_sort(async_client):
+    response = await async_client.get("/api/v1/books?sort=title")
+
+    assert response.status_code == 422
+
+
+# Test para el endpoint /api/v1/books en modo streaming (NDJSON)
+@pytest.mark.asyncio
+async def test_get_books_stream(async_client, override_dependency):
+    redis_service = MagicMock()
+    redis_service.iter_books = lambda category: iterate_books(
+        Book(id="1", title="Barato", price=5.0, category="Poetry"),
+        Book(id="2", title="Caro", price=50.0, category="Poetry"),
+    )
+    override_dependency(get_redis_service, redis_service)
+
+    response = await async_client.get(
+        "/api/v1/books?max_price=20", headers={"Accept": "application/x-ndjson"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["id"] for line in lines] == ["1"]
+
+
+# Test para validar que un error de Redis a mitad del stream se señala con un
+# registro de error final
+@pytest.mark.asyncio
+async def test_get_books_stream_reports_error(async_client, override_dependency):
+    redis_service = MagicMock()
+    redis_service.iter_books = lambda category: iterate_books(
+        Book(id="1", title="Libro", price=5.0, category="Poetry"),
+        error=ConnectionError("Redis caído"),
+    )
+    override_dependency(get_redis_service, redis_service)
+
+    response = await async_client.get("/api/v1/books?stream=true")
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0]["id"] == "1"
+    assert lines[-1] == {"error": STREAM_ERROR_DETAIL}
+
+
+# Test para validar que el streaming no admite paginación ni orden
+@pytest.mark.asyncio
+async def test_get_books_stream_rejects_pagination(async_client):
+    response = await async_client.get("/api/v1/books?stream=true&limit=10")
+
+    assert response.status_code == 422
+
+
+# Test para validar el 503 con Retry-After mientras se carga el catálogo inicial
+@pytest.mark.asyncio
+async def test_get_books_warming_returns_503(async_client, override_dependency):
+    redis_service = MagicMock()
+    redis_service.get_catalog_version = AsyncMock(return_value=0)
+    override_dependency(get_redis_service, redis_service)
+    override_dependency(get_catalog_version_cache, VersionCache(ttl=0))
+    override_dependency(get_startup_scrape, StartupScrape(redis_service))
+
+    response = await async_client.get("/api/v1/books")
+
+    assert response.status_code == 503
+    assert "retry-after" in response.headers
+
+
+# Test para validar que el streaming también responde 503 mientras se carga el
+# catálogo inicial y marca como no cacheable un stream parcial
+@pytest.mark.asyncio
+async def test_get_books_stream_while_warming(async_client, override_dependency):
+    redis_service = MagicMock()
+    redis_service.get_catalog_version = AsyncMock(return_value=0)
+    redis_service.iter_books = lambda category: iterate_books(
+        Book(id="1", title="Libro", price=5.0, category="Poetry")
+    )
+    override_dependency(get_redis_service, redis_service)
+    override_dependency(get_catalog_version_cache, VersionCache(ttl=0))
+    override_dependency(get_startup_scrape, StartupScrape(redis_service))
+
+    response = await async_client.get("/api/v1/books?stream=true")
+
+    assert response.status_code == 503
+    assert "retry-after" in response.headers
+
+    redis_service.get_catalog_version.return_value = 1
+    response = await async_client.get("/api/v1/books?stream=true")
+
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-store"
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == ["1"]
+
+
+# Test para validar que sin versión del catálogo la respuesta no se cachea
+@pytest.mark.asyncio
+async def test_get_books_without_version_is_not_cached(
+    async_client, override_dependency
+):
+    redis_service = MagicMock()
+    redis_service.get_catalog_version = AsyncMock(return_value=None)
+    redis_service.get_books = AsyncMock(return_value=[])
+    override_dependency(get_redis_service, redis_service)
+    override_dependency(get_catalog_version_cache, VersionCache(ttl=0))
+    override_dependency(get_startup_scrape, None)
+
+    response = await async_client.get("/api/v1/books")
+
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "public, max-age=0"
+
+
+# Test para validar que /init encola un job y responde sin esperar al crawl
+@pytest.mark.asyncio
+async def test_init_returns_job(async_client, override_dependency):
+    jobs = MagicMock()
+    jobs.submit = AsyncMock(
+        return_value=CrawlStatus(job_id="abc", status=JobStatus.pending)
+    )
+    jobs.get = AsyncMock(return_value=None)
+    override_dependency(get_crawl_jobs, jobs)
+
+    response = await async_client.post("/api/v1/init")
+
+    assert response.status_code == 202
+    assert response.json()["job_id"] == "abc"
+    assert response.headers["location"].endswith("/api/v1/init/jobs/abc")
+
+    response = await async_client.get("/api/v1/init/jobs/otro")
+    assert response.status_code == 404
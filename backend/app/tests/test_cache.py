@@ -0,0 +1,104 @@
+import time
+
+import pytest
+from unittest.mock import AsyncMock
+
+from app.models.schemas import Book, BookList
+from app.services.cache_service import (
+    RenderedResponse,
+    ResponseCache,
+    VersionCache,
+    etag_matches,
+)
+
+pytest_plugins = ("pytest_asyncio",)
+
+
+# Test para validar que la caché devuelve los valores guardados
+def test_cache_get_set():
+    cache = ResponseCache(max_size=2, ttl=60)
+    key = cache.make_key("books", 1, category="Science")
+
+    assert cache.get(key) is None
+    cache.set(key, "libros")
+    assert cache.get(key) == "libros"
+
+
+# Test para validar que las claves se normalizan
+def test_cache_key_normalization():
+    key_a = ResponseCache.make_key("books", 1, category="Science", limit=None)
+    key_b = ResponseCache.make_key("books", 1, category="science")
+
+    assert key_a == key_b
+    assert key_a != ResponseCache.make_key("books", 2, category="science")
+
+
+# Test para validar que el cursor distingue mayúsculas en la clave
+def test_cache_key_keeps_cursor_case():
+    key_a = ResponseCache.make_key("books", 1, limit=20, cursor="MjA=")
+    key_b = ResponseCache.make_key("books", 1, limit=20, cursor="mja=")
+
+    assert key_a != key_b
+    assert ResponseCache.make_etag(key_a) != ResponseCache.make_etag(key_b)
+
+
+# Test para validar el desalojo del elemento menos usado
+def test_cache_lru_eviction():
+    cache = ResponseCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+# Test para validar que las entradas expiran tras el TTL
+def test_cache_ttl_expiration():
+    cache = ResponseCache(max_size=2, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+# Test para validar que la respuesta renderizada tiene un ETag estable
+def test_rendered_response_etag():
+    books = BookList(books=[Book(id="1", title="Libro", price=10.0, category="Poetry")])
+    rendered = RenderedResponse.render(books)
+
+    assert rendered.body == books.model_dump_json().encode()
+    assert rendered.etag == RenderedResponse.render(books).etag
+    assert rendered.etag.startswith('"') and rendered.etag.endswith('"')
+
+
+# Test para validar la comparación con la cabecera If-None-Match
+def test_etag_matches():
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"a"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"a"')
+
+
+# Test para validar que la versión del catálogo se reutiliza sin leer Redis
+@pytest.mark.asyncio
+async def test_version_cache_reuses_value():
+    cache = VersionCache(ttl=60)
+    load = AsyncMock(return_value=7)
+
+    assert await cache.get(load) == 7
+    assert await cache.get(load) == 7
+    load.assert_awaited_once()
+
+
+# Test para validar que los errores de Redis no se cachean
+@pytest.mark.asyncio
+async def test_version_cache_skips_errors():
+    cache = VersionCache(ttl=60)
+    load = AsyncMock(side_effect=[None, 3])
+
+    assert await cache.get(load) is None
+    assert await cache.get(load) == 3
@@ -1,9 +1,27 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
 import pytest
-from unittest.mock import patch
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.models.schemas import Headline, HeadlineList
+from app.scraping.scrape_hn_http import parse_stories
+from app.services.headlines_service import (
+    HEADLINES_REFRESH_LOCK,
+    HeadlinesStore,
+    get_headlines_store,
+)
 
 pytest_plugins = ('pytest_asyncio',)
 
 
+def make_snapshot() -> HeadlineList:
+    return HeadlineList(
+        headlines=[Headline(title="Titular", url="https://example.com", score=1)],
+        as_of=datetime.now(timezone.utc),
+    )
+
+
 # Test para el endpoint /api/v1/headlines
 @pytest.mark.asyncio
 async def test_get_headlines(async_client):
@@ -34,3 +52,149 @@ async def test_get_headlines(async_client):
             assert "title" in response.json()["headlines"][0]
             assert "url" in response.json()["headlines"][0]
             assert "score" in response.json()["headlines"][0]
+
+
+# Test para validar que se sirve la instantánea guardada sin hacer scraping
+@pytest.mark.asyncio
+async def test_headlines_store_serves_snapshot():
+    snapshot = make_snapshot()
+    redis_service = MagicMock()
+    redis_service.get_headlines_snapshot = AsyncMock(return_value=snapshot)
+
+    with patch("app.services.headlines_service.get_headlines_service") as factory:
+        store = HeadlinesStore(redis_service, refresh_interval=300)
+        result = await store.get_headlines()
+
+        assert result == snapshot
+        factory.assert_not_called()
+
+
+# Test para validar que sin refresco periódico una instantánea reciente no
+# lanza un scraping en cada petición
+@pytest.mark.asyncio
+async def test_headlines_store_without_periodic_refresh_keeps_fresh_snapshot():
+    snapshot = make_snapshot()
+    redis_service = MagicMock()
+    redis_service.get_headlines_snapshot = AsyncMock(return_value=snapshot)
+    store = HeadlinesStore(redis_service, refresh_interval=0, stale_after=300)
+    store.refresh_in_background = MagicMock()
+
+    assert await store.get_headlines() == snapshot
+    store.refresh_in_background.assert_not_called()
+
+    snapshot.as_of -= timedelta(seconds=301)
+    assert store.is_stale(snapshot)
+
+
+# Test para validar el 304 con If-None-Match sin volver a leer Redis
+@pytest.mark.asyncio
+async def test_headlines_not_modified(async_client, override_dependency):
+    snapshot = make_snapshot()
+    redis_service = MagicMock()
+    redis_service.get_headlines_snapshot = AsyncMock(return_value=snapshot)
+    store = HeadlinesStore(redis_service, refresh_interval=300, snapshot_cache_ttl=60)
+    override_dependency(get_headlines_store, store)
+
+    response = await async_client.get("/api/v1/headlines")
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"].startswith("public, max-age=")
+
+    response = await async_client.get(
+        "/api/v1/headlines", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    redis_service.get_headlines_snapshot.assert_awaited_once()
+
+
+# Test para validar que el lease del refresco se renueva mientras dura el
+# scraping y se libera al terminar
+@pytest.mark.asyncio
+async def test_headlines_refresh_renews_lease():
+    redis_service = MagicMock()
+    redis_service.acquire_lease = AsyncMock(return_value=3)
+    redis_service.renew_lease = AsyncMock(return_value=True)
+    redis_service.release_lock = AsyncMock(return_value=True)
+    redis_service.store_headlines_snapshot = AsyncMock(return_value=True)
+    store = HeadlinesStore(redis_service, lock_ttl=0.03)
+
+    async def slow_fetch():
+        await asyncio.sleep(0.1)
+        return make_snapshot().headlines
+
+    with patch("app.services.headlines_service.get_headlines_service") as factory:
+        factory.return_value.fetch_top_stories = slow_fetch
+        snapshot = await store.refresh()
+
+    assert snapshot.headlines[0].title == "Titular"
+    assert redis_service.renew_lease.await_count >= 2
+    redis_service.renew_lease.assert_awaited_with(HEADLINES_REFRESH_LOCK, 3, 0.03)
+    redis_service.release_lock.assert_awaited_once_with(HEADLINES_REFRESH_LOCK, 3)
+
+
+# Test para validar que sin lease se espera al refresco de otro worker
+@pytest.mark.asyncio
+async def test_headlines_refresh_waits_for_other_worker():
+    snapshot = make_snapshot()
+    redis_service = MagicMock()
+    redis_service.acquire_lease = AsyncMock(return_value=None)
+    redis_service.wait_for_unlock = AsyncMock(return_value=True)
+    redis_service.get_headlines_snapshot = AsyncMock(return_value=snapshot)
+    store = HeadlinesStore(redis_service, lock_ttl=30)
+
+    with patch("app.services.headlines_service.get_headlines_service") as factory:
+        assert await store.refresh() == snapshot
+        factory.assert_not_called()
+
+    redis_service.wait_for_unlock.assert_awaited_once_with(
+        HEADLINES_REFRESH_LOCK, timeout=30
+    )
+
+
+# Test para validar que stop cancela el refresco en curso
+@pytest.mark.asyncio
+async def test_headlines_store_stop_cancels_refresh():
+    redis_service = MagicMock()
+    redis_service.acquire_lease = AsyncMock(return_value=3)
+    redis_service.renew_lease = AsyncMock(return_value=True)
+    redis_service.release_lock = AsyncMock(return_value=True)
+    store = HeadlinesStore(redis_service)
+
+    async def hanging_fetch():
+        await asyncio.sleep(10)
+
+    with patch("app.services.headlines_service.get_headlines_service") as factory:
+        factory.return_value.fetch_top_stories = hanging_fetch
+        task = store.refresh_in_background()
+        await asyncio.sleep(0.01)
+        await store.stop()
+
+    assert task.cancelled()
+    redis_service.release_lock.assert_awaited_once_with(HEADLINES_REFRESH_LOCK, 3)
+
+
+# Test para validar el parseo del HTML de Hacker News sin navegador
+def test_parse_stories_from_html():
+    html = """
+    <table>
+      <tr class="athing submission" id="1">
+        <td class="title"><span class="titleline">
+          <a href="https://example.com/framework">Nuevo framework de Python</a>
+        </span></td>
+      </tr>
+      <tr><td class="subtext"><span class="score" id="score_1">120 points</span></td></tr>
+      <tr class="athing submission" id="2">
+        <td class="title"><span class="titleline">
+          <a href="item?id=2">Ask HN: Tutorial de FastAPI</a>
+        </span></td>
+      </tr>
+      <tr><td class="subtext"></td></tr>
+    </table>
+    """
+    stories = parse_stories(html, base_url="https://news.ycombinator.com/")
+
+    assert len(stories) == 2
+    assert stories[0].title == "Nuevo framework de Python"
+    assert stories[0].url == "https://example.com/framework"
+    assert stories[0].score == 120
+    assert stories[1].url == "https://news.ycombinator.com/item?id=2"
+    assert stories[1].score == 0
@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+import redis.asyncio as redis
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.models.schemas import CrawlStatus, JobStatus
+from app.services.job_service import CrawlJobs
+from app.services.redis_service import LeaseLostError
+from app.services.scrape_service import (
+    BOOK_CRAWL_LOCK,
+    publish_progress,
+    run_book_crawl,
+)
+
+pytest_plugins = ("pytest_asyncio",)
+
+
+def mock_redis_service(token):
+    redis_service = MagicMock()
+    redis_service.acquire_lease = AsyncMock(return_value=token)
+    redis_service.save_job = AsyncMock()
+    redis_service.release_lock = AsyncMock()
+    redis_service.get_job = AsyncMock(return_value=None)
+    return redis_service
+
+
+# Test para validar que submit adquiere el lease y lo pasa al crawl del job
+@pytest.mark.asyncio
+async def test_submit_runs_crawl_with_acquired_lease():
+    redis_service = mock_redis_service(token=7)
+    jobs = CrawlJobs(redis_service)
+
+    with patch(
+        "app.services.job_service.run_book_crawl", AsyncMock(return_value=[])
+    ) as run_book_crawl:
+        job = await jobs.submit(incremental=True)
+        await asyncio.gather(*jobs._tasks)
+
+    assert job.status == JobStatus.pending
+    redis_service.save_job.assert_awaited_once_with(job)
+    run_book_crawl.assert_awaited_once_with(
+        redis_service, incremental=True, job_id=job.job_id, token=7
+    )
+
+
+# Test para validar que si el lease está tomado se devuelve el crawl en curso
+@pytest.mark.asyncio
+async def test_submit_returns_running_crawl_when_lease_is_taken():
+    running = CrawlStatus(job_id="abc", status=JobStatus.running)
+    redis_service = mock_redis_service(token=None)
+    redis_service.get_crawl_status = AsyncMock(return_value=running)
+    jobs = CrawlJobs(redis_service)
+
+    assert await jobs.submit() == running
+    redis_service.acquire_lease.assert_awaited_once()
+    assert redis_service.acquire_lease.await_args.args[0] == BOOK_CRAWL_LOCK
+    redis_service.save_job.assert_not_awaited()
+    assert not jobs._tasks
+
+
+# Test para validar que el progreso se publica hasta que se pierde el lease
+@pytest.mark.asyncio
+async def test_publish_progress_until_lease_is_lost():
+    scraper = MagicMock()
+    scraper.progress.side_effect = [{"pages_fetched": 1}, {"pages_fetched": 2}]
+    redis_service = MagicMock()
+    redis_service.set_crawl_status = AsyncMock(side_effect=[None, LeaseLostError()])
+    status = CrawlStatus(job_id="abc", status=JobStatus.running)
+
+    await asyncio.wait_for(
+        publish_progress(redis_service, scraper, status, interval=0), 1
+    )
+
+    assert redis_service.set_crawl_status.await_count == 2
+    assert status.progress.pages_fetched == 2
+
+
+# Test para validar que el lease se libera aunque falle el estado final
+@pytest.mark.asyncio
+async def test_run_book_crawl_releases_lease_when_final_status_fails():
+    redis_service = mock_redis_service(token=7)
+    fenced_service = MagicMock()
+    fenced_service.set_crawl_status = AsyncMock(
+        side_effect=[None, redis.WatchError()]
+    )
+    redis_service.fenced.return_value = fenced_service
+    scraper = MagicMock()
+    scraper.scrape_books = AsyncMock(return_value=[])
+    scraper.progress.return_value = {"pages_fetched": 3}
+
+    with patch(
+        "app.services.scrape_service.build_book_scraper", return_value=scraper
+    ):
+        assert await run_book_crawl(redis_service) == []
+
+    final_status = fenced_service.set_crawl_status.await_args.args[0]
+    assert final_status.status == JobStatus.done
+    redis_service.release_lock.assert_awaited_once_with(BOOK_CRAWL_LOCK, 7)
+
+
+# Test para validar que el job se da por terminado al acabar los listados,
+# antes de esperar al enriquecimiento, y que el lease se libera al final
+@pytest.mark.asyncio
+async def test_run_book_crawl_finishes_job_before_enrichment_drains():
+    redis_service = mock_redis_service(token=7)
+    written = []
+    fenced_service = MagicMock()
+    fenced_service.set_crawl_status = AsyncMock(
+        side_effect=lambda status: written.append(status.status)
+    )
+    redis_service.fenced.return_value = fenced_service
+    scraper = MagicMock()
+    scraper.progress.return_value = {"pages_fetched": 3}
+    statuses_at_drain = []
+
+    async def scrape_books():
+        await scraper.on_listing_done([])
+        # Enriquecimiento pendiente: el job ya figura como terminado
+        statuses_at_drain.extend(written)
+        redis_service.release_lock.assert_not_awaited()
+        return []
+
+    scraper.scrape_books = scrape_books
+    with patch(
+        "app.services.scrape_service.build_book_scraper", return_value=scraper
+    ):
+        assert await run_book_crawl(redis_service) == []
+
+    assert statuses_at_drain == [JobStatus.running, JobStatus.done]
+    assert written[-1] == JobStatus.done
+    redis_service.release_lock.assert_awaited_once_with(BOOK_CRAWL_LOCK, 7)
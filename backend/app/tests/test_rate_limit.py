@@ -0,0 +1,98 @@
+import pytest
+import pytest_asyncio
+from limits import parse
+from limits.storage import MemoryStorage
+from limits.strategies import STRATEGIES
+from unittest.mock import AsyncMock, MagicMock
+
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.core.rate_limit import (
+    limiter,
+    rate_limit_exceeded_handler,
+    rate_limit_rejections,
+    route_path,
+)
+from app.main import app
+from app.models.schemas import CrawlStatus, JobStatus
+from app.services.job_service import get_crawl_jobs
+
+pytest_plugins = ("pytest_asyncio",)
+
+
+@pytest_asyncio.fixture
+def memory_limiter(monkeypatch):
+    """Activa el rate limiter con contadores en memoria durante el test"""
+    storage = MemoryStorage()
+    monkeypatch.setattr(limiter, "_storage", storage)
+    monkeypatch.setattr(
+        limiter, "_limiter", STRATEGIES[settings.RATE_LIMIT_STRATEGY](storage)
+    )
+    monkeypatch.setattr(limiter, "_storage_dead", False)
+    monkeypatch.setattr(limiter, "enabled", True)
+    yield limiter
+
+
+def make_request(path: str) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "app": app,
+            "method": "GET",
+            "path": path,
+            "query_string": b"",
+            "headers": [],
+            "state": {"view_rate_limit": None},
+        }
+    )
+
+
+# Test para validar que los rechazos se agrupan por plantilla de ruta
+def test_route_path_uses_route_template():
+    request = make_request("/api/v1/init/jobs/abc")
+
+    assert route_path(request) == "/api/v1/init/jobs/{job_id}"
+
+
+# Test para validar que cada 429 se cuenta en las métricas
+def test_rate_limit_rejection_is_counted():
+    request = make_request("/api/v1/books")
+    before = rate_limit_rejections().get("/api/v1/books", 0)
+
+    response = rate_limit_exceeded_handler(request, MagicMock(detail="1 per 1 minute"))
+
+    assert response.status_code == 429
+    assert rate_limit_rejections()["/api/v1/books"] == before + 1
+
+
+# Test para validar que /init se limita antes que /books y /health nunca
+@pytest.mark.asyncio
+async def test_scraping_routes_are_limited_first(
+    async_client, override_dependency, memory_limiter
+):
+    jobs = MagicMock()
+    jobs.submit = AsyncMock(
+        return_value=CrawlStatus(job_id="abc", status=JobStatus.pending)
+    )
+    override_dependency(get_crawl_jobs, jobs)
+    scraping_limit = parse(settings.RATE_LIMIT_SCRAPING).amount
+    attempts = scraping_limit + 1
+
+    init_statuses = [
+        (await async_client.post("/api/v1/init")).status_code
+        for _ in range(attempts)
+    ]
+    books_statuses = [
+        (await async_client.get("/api/v1/books")).status_code
+        for _ in range(attempts)
+    ]
+    health_statuses = [
+        (await async_client.get("/health")).status_code
+        for _ in range(parse(settings.RATE_LIMIT).amount + 1)
+    ]
+
+    assert init_statuses[:scraping_limit] == [202] * scraping_limit
+    assert init_statuses[-1] == 429
+    assert 429 not in books_statuses
+    assert 429 not in health_statuses
@@ -1,5 +1,30 @@
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
 import pytest
-from app.services.redis_service import RedisService
+import redis.asyncio as redis
+from fastapi import FastAPI
+from unittest.mock import AsyncMock, MagicMock
+
+import app.main as main
+import manage
+from app.core.config import settings
+from app.models.schemas import Book, BookQuery, BookSort, CrawlStatus, JobStatus
+from app.services.redis_service import (
+    ALL_BOOKS_KEY,
+    CATALOG_VERSION_KEY,
+    RedisService,
+    Subscriber,
+    category_key,
+    create_redis_pool,
+    decode_cursor,
+    encode_cursor,
+    get_redis_service,
+    paginate_books,
+    price_key,
+)
+from app.services.scrape_service import BOOK_CRAWL_LOCK, run_book_crawl
 
 pytest_plugins = ("pytest_asyncio",)
 
@@ -12,3 +37,481 @@ async def test_redis_connection():
     # Probar la conexión
     is_connected = await redis_service.ping()
     assert is_connected == True
+
+
+# Test para validar la lectura de libros en formato JSON con un único MGET
+@pytest.mark.asyncio
+async def test_get_books_by_ids_json_format():
+    redis_service = RedisService(storage_format="json")
+    redis_service.redis_client.mget = AsyncMock(
+        return_value=[
+            '{"id": "1", "title": "Libro", "price": 10.5, "category": "Poetry"}',
+            None,
+        ]
+    )
+
+    books = await redis_service.get_books_by_ids(["1", "2"])
+
+    redis_service.redis_client.mget.assert_awaited_once_with(
+        ["book_json:1", "book_json:2"]
+    )
+    assert len(books) == 1
+    assert books[0].title == "Libro"
+    assert books[0].price == 10.5
+
+
+# Test para validar que un valor JSON ilegible se omite sin vaciar la lectura
+@pytest.mark.asyncio
+async def test_get_books_skips_unreadable_json_book():
+    redis_service = RedisService(storage_format="json")
+    redis_service.redis_client.smembers = AsyncMock(return_value=["1", "2"])
+    redis_service.redis_client.mget = AsyncMock(
+        return_value=[
+            '{"id": "1", "title": "Libro", "price": 10.5, "category": "Poetry"}',
+            "{no es json",
+        ]
+    )
+
+    books = await redis_service.get_books()
+
+    assert [book.id for book in books] == ["1"]
+
+
+# Test para validar que la migración valida los libros y no borra los inválidos
+@pytest.mark.asyncio
+async def test_migrate_book_storage_skips_invalid_books(fake_pipeline):
+    async def scan_iter(match, count):
+        for key in ("book_json:1", "book_json:2"):
+            yield key
+
+    pipe = fake_pipeline(None)
+    redis_service = RedisService(storage_format="json")
+    redis_service.redis_client = MagicMock()
+    redis_service.redis_client.scan_iter = scan_iter
+    redis_service.redis_client.mget = AsyncMock(
+        return_value=[
+            '{"id": "1", "title": "Libro", "price": 10.5, "category": "Poetry"}',
+            '{"id": "2", "title": "Sin precio"}',
+        ]
+    )
+    redis_service.redis_client.pipeline.return_value = pipe
+    redis_service.redis_client.incr = AsyncMock()
+
+    assert await redis_service.migrate_book_storage("hash") == 1
+
+    pipe.hset.assert_called_once()
+    assert pipe.hset.call_args.args[0] == "book:1"
+    pipe.delete.assert_called_once_with("book_json:1")
+
+
+# Test para validar que los hashes de libros se leen con un pipeline por lote
+@pytest.mark.asyncio
+async def test_get_books_by_ids_pipelines_hash_reads_in_batches(fake_pipeline):
+    pipes = [
+        fake_pipeline(
+            [
+                {"title": "Libro 1", "price": "10.5", "category": "Poetry"},
+                {"title": "Libro 2", "price": "8", "category": "Poetry"},
+            ]
+        ),
+        fake_pipeline([{}]),
+    ]
+    redis_service = RedisService(storage_format="hash")
+    redis_service.redis_client = MagicMock()
+    redis_service.redis_client.pipeline.side_effect = pipes
+
+    books = await redis_service.get_books_by_ids(["1", "2", "3"], batch_size=2)
+
+    redis_service.redis_client.pipeline.assert_called_with(transaction=False)
+    assert [call.args for call in pipes[0].hgetall.call_args_list] == [
+        ("book:1",),
+        ("book:2",),
+    ]
+    pipes[1].hgetall.assert_called_once_with("book:3")
+    for pipe in pipes:
+        pipe.execute.assert_awaited_once()
+    # Un round trip por lote, no uno por libro; los libros que faltan se omiten
+    assert [(book.id, book.price) for book in books] == [("1", 10.5), ("2", 8.0)]
+
+
+# Test para validar que el tamaño de lote por defecto sale de la configuración
+@pytest.mark.asyncio
+async def test_get_books_by_ids_uses_configured_batch_size(monkeypatch):
+    monkeypatch.setattr(settings, "REDIS_BATCH_SIZE", 2)
+    redis_service = RedisService(storage_format="json")
+    redis_service.redis_client.mget = AsyncMock(return_value=[])
+
+    await redis_service.get_books_by_ids(["1", "2", "3"])
+
+    mget = redis_service.redis_client.mget
+    assert [call.args[0] for call in mget.await_args_list] == [
+        ["book_json:1", "book_json:2"],
+        ["book_json:3"],
+    ]
+
+
+# Test para validar que guardar un libro mantiene el índice global del catálogo
+@pytest.mark.asyncio
+async def test_store_books_maintains_catalog_index(fake_pipeline):
+    pipe = fake_pipeline(None)
+    redis_service = RedisService(storage_format="hash")
+    redis_service.redis_client = MagicMock()
+    redis_service.redis_client.pipeline.return_value = pipe
+
+    book = Book(id="1", title="Libro", price=10.5, category="Poetry")
+    assert await redis_service.store_books([book]) == 1
+
+    redis_service.redis_client.pipeline.assert_called_once_with(transaction=True)
+    pipe.hset.assert_called_once_with(
+        "book:1", mapping=book.model_dump(exclude_none=True)
+    )
+    pipe.sadd.assert_any_call(ALL_BOOKS_KEY, "1")
+    pipe.sadd.assert_any_call(category_key("Poetry"), "1")
+    pipe.zadd.assert_any_call(price_key(), {"1": 10.5})
+    pipe.incr.assert_called_once_with(CATALOG_VERSION_KEY)
+    pipe.execute.assert_awaited_once()
+
+
+# Test para validar que el listado completo lee el índice y no usa KEYS
+@pytest.mark.asyncio
+async def test_get_books_reads_catalog_index(fake_pipeline):
+    redis_service = RedisService(storage_format="hash")
+    redis_service.redis_client = MagicMock()
+    redis_service.redis_client.smembers = AsyncMock(return_value={"1"})
+    redis_service.redis_client.pipeline.return_value = fake_pipeline(
+        [{"title": "Libro", "price": "10.5", "category": "Poetry"}]
+    )
+
+    books = await redis_service.get_books()
+
+    redis_service.redis_client.smembers.assert_awaited_once_with(ALL_BOOKS_KEY)
+    redis_service.redis_client.keys.assert_not_called()
+    assert [book.id for book in books] == ["1"]
+
+
+# Test para validar que rebuild_indexes recorre los libros con SCAN y
+# reconstruye los índices en pipelines
+@pytest.mark.asyncio
+async def test_rebuild_indexes_from_existing_books(fake_pipeline):
+    async def scan_iter(match, count):
+        assert match == "book:*"
+        for key in ("book:1", "book:2"):
+            yield key
+
+    read_pipe = fake_pipeline([("Poetry", "Libro", "10.5"), (None, None, None)])
+    write_pipe = fake_pipeline(None)
+    redis_service = RedisService(storage_format="hash")
+    redis_service.redis_client = MagicMock()
+    redis_service.redis_client.scan_iter = scan_iter
+    redis_service.redis_client.pipeline.side_effect = [read_pipe, write_pipe]
+    redis_service.redis_client.incr = AsyncMock()
+
+    assert await redis_service.rebuild_indexes() == 2
+
+    redis_service.redis_client.keys.assert_not_called()
+    read_pipe.hmget.assert_any_call("book:1", "category", "title", "price")
+    write_pipe.sadd.assert_any_call(ALL_BOOKS_KEY, "1", "2")
+    write_pipe.sadd.assert_any_call(category_key("Poetry"), "1")
+    write_pipe.zadd.assert_any_call(price_key(), {"1": 10.5})
+    write_pipe.zadd.assert_any_call(price_key("Poetry"), {"1": 10.5})
+    write_pipe.execute.assert_awaited_once()
+    redis_service.redis_client.incr.assert_awaited_once_with(CATALOG_VERSION_KEY)
+
+
+# Test para validar el comando `manage.py rebuild-indexes`
+@pytest.mark.asyncio
+async def test_manage_rebuild_indexes(monkeypatch, capsys):
+    redis_service = MagicMock()
+    redis_service.rebuild_indexes = AsyncMock(return_value=2)
+    redis_service.close = AsyncMock()
+    monkeypatch.setattr(manage, "RedisService", MagicMock(return_value=redis_service))
+
+    await manage.COMMANDS["rebuild-indexes"]()
+
+    redis_service.rebuild_indexes.assert_awaited_once()
+    redis_service.close.assert_awaited_once()
+    assert "2 libros" in capsys.readouterr().out
+
+
+# Test para validar que la combinación de campos en formato JSON se repite si
+# otro cliente escribe el libro durante la transacción
+@pytest.mark.asyncio
+async def test_store_books_json_retries_concurrent_update(fake_pipeline):
+    stored = Book(id="1", title="Libro", price=10.5, category="Poetry", upc="abc")
+    pipe = fake_pipeline(redis.WatchError(), None)
+    pipe.mget = AsyncMock(return_value=[stored.model_dump_json()])
+
+    redis_service = RedisService(storage_format="json")
+    redis_service.redis_client = MagicMock()
+    redis_service.redis_client.pipeline.return_value = pipe
+
+    book = Book(id="1", title="Libro", price=12.0, category="Poetry")
+    assert await redis_service.store_books([book]) == 1
+
+    assert pipe.execute.await_count == 2
+    pipe.watch.assert_awaited_with("book_json:1")
+    written = Book.model_validate_json(pipe.set.call_args.args[1])
+    assert written.price == 12.0
+    assert written.upc == "abc"
+
+
+# Test para validar que el pool de conexiones usa la configuración
+def test_create_redis_pool_uses_settings(monkeypatch):
+    monkeypatch.setattr(settings, "REDIS_MAX_CONNECTIONS", 7)
+    monkeypatch.setattr(settings, "REDIS_SOCKET_TIMEOUT", 1.5)
+
+    pool = create_redis_pool()
+
+    assert pool.max_connections == 7
+    assert pool.connection_kwargs["socket_timeout"] == 1.5
+    assert pool.connection_kwargs["decode_responses"] is True
+
+
+# Test para validar que las peticiones comparten el pool de la aplicación y
+# que cerrar su servicio no lo cierra
+@pytest.mark.asyncio
+async def test_get_redis_service_shares_app_pool():
+    request = SimpleNamespace(app=FastAPI())
+
+    first = get_redis_service(request)
+    second = get_redis_service(request)
+
+    assert first.pool is second.pool is request.app.state.redis_pool
+    assert first.subscriber is second.subscriber
+    first.pool.aclose = AsyncMock()
+    await first.close()
+    first.pool.aclose.assert_not_awaited()
+
+
+# Test para validar que el lifespan crea un único pool para todos los servicios
+# y lo cierra al apagar la aplicación
+@pytest.mark.asyncio
+async def test_lifespan_creates_and_closes_shared_pool(monkeypatch):
+    monkeypatch.setattr(settings, "HEADLINES_REFRESH_INTERVAL", 0)
+    monkeypatch.setattr(settings, "BOOK_REFRESH_INTERVAL", 0)
+    startup_scrape = MagicMock(stop=AsyncMock())
+    monkeypatch.setattr(main, "StartupScrape", MagicMock(return_value=startup_scrape))
+    test_app = FastAPI()
+
+    async with main.lifespan(test_app):
+        pool = test_app.state.redis_pool
+        pool.aclose = AsyncMock()
+        assert test_app.state.crawl_jobs.redis_service.pool is pool
+        assert test_app.state.headlines_store.redis_service.pool is pool
+        assert get_redis_service(SimpleNamespace(app=test_app)).pool is pool
+
+    pool.aclose.assert_awaited_once()
+
+
+# Test para validar que el estado del crawl se reescribe si la renovación del
+# lease invalida el WATCH
+@pytest.mark.asyncio
+async def test_set_crawl_status_retries_watch_error(fake_pipeline):
+    pipe = fake_pipeline(redis.WatchError(), None)
+    pipe.get = AsyncMock(return_value="3")
+    redis_service = RedisService().fenced(BOOK_CRAWL_LOCK, 3)
+    redis_service.redis_client = MagicMock()
+    redis_service.redis_client.pipeline.return_value = pipe
+
+    await redis_service.set_crawl_status(
+        CrawlStatus(job_id="abc", status=JobStatus.running)
+    )
+
+    assert pipe.execute.await_count == 2
+
+
+# Test para validar que el cursor guarda el precio y el ID del último libro
+def test_cursor_roundtrip():
+    assert decode_cursor(encode_cursor(12.5, "abc")) == (12.5, "abc")
+    assert decode_cursor(None) is None
+    with pytest.raises(ValueError):
+        decode_cursor("no-valido")
+
+
+# Test para validar que la página siguiente continúa tras los empates de precio
+# y después con una cota exclusiva sobre el precio
+@pytest.mark.asyncio
+async def test_query_books_resumes_from_keyset_cursor():
+    redis_service = RedisService()
+    redis_service.redis_client.zrange = AsyncMock(
+        side_effect=[
+            [("a", 10.0), ("b", 10.0), ("c", 10.0)],
+            [("d", 11.0), ("e", 12.0)],
+        ]
+    )
+    redis_service.get_books_by_ids = AsyncMock(side_effect=lambda ids: ids)
+
+    books, next_cursor = await redis_service.query_books(
+        None, BookQuery(limit=2, cursor=encode_cursor(10.0, "a"))
+    )
+
+    assert books == ["b", "c"]
+    assert decode_cursor(next_cursor) == (10.0, "c")
+    assert redis_service.redis_client.zrange.await_args_list[1].args[1:] == (
+        "(10.0",
+        "+inf",
+    )
+    assert redis_service.redis_client.zrange.await_args_list[1].kwargs["num"] == 1
+
+
+# Test para validar que un error de Redis devuelve una página vacía
+@pytest.mark.asyncio
+async def test_query_books_handles_redis_errors():
+    redis_service = RedisService()
+    redis_service.redis_client.zrange = AsyncMock(side_effect=ConnectionError())
+
+    assert await redis_service.query_books(None, BookQuery(limit=2)) == ([], None)
+
+
+# Test para validar la paginación en memoria con cursor en orden descendente
+def test_paginate_books_descending_cursor():
+    books = [
+        Book(id=book_id, title=book_id, price=price, category="Poetry")
+        for book_id, price in [("a", 10.0), ("b", 10.0), ("c", 9.0), ("d", 8.0)]
+    ]
+    query = BookQuery(limit=2, sort=BookSort.price_desc)
+
+    first, cursor = paginate_books(books, query)
+    second, last = paginate_books(
+        books, BookQuery(limit=2, sort=BookSort.price_desc, cursor=cursor)
+    )
+
+    assert [book.id for book in first] == ["b", "a"]
+    assert [book.id for book in second] == ["c", "d"]
+    assert last is None
+
+
+# Test para validar que se rechaza un formato de almacenamiento desconocido
+def test_unknown_storage_format():
+    with pytest.raises(ValueError):
+        RedisService(storage_format="xml")
+
+
+# Test para validar que solo un worker hace el crawl y los demás esperan
+@pytest.mark.asyncio
+async def test_run_book_crawl_waits_when_lock_is_taken():
+    redis_service = MagicMock()
+    redis_service.acquire_lease = AsyncMock(return_value=None)
+    redis_service.wait_for_unlock = AsyncMock(return_value=True)
+
+    assert await run_book_crawl(redis_service) is None
+    redis_service.wait_for_unlock.assert_awaited_once_with(BOOK_CRAWL_LOCK)
+
+
+# Test para validar que una escritura con un lease perdido no se aplica
+@pytest.mark.asyncio
+async def test_fenced_store_books_rejects_lost_lease():
+    pipe = MagicMock()
+    pipe.__aenter__ = AsyncMock(return_value=pipe)
+    pipe.__aexit__ = AsyncMock(return_value=None)
+    pipe.watch = AsyncMock()
+    pipe.get = AsyncMock(return_value="8")
+    pipe.execute = AsyncMock()
+
+    redis_service = RedisService().fenced("books:crawl", 7)
+    redis_service.redis_client = MagicMock()
+    redis_service.redis_client.pipeline.return_value = pipe
+
+    book = Book(id="1", title="Libro", price=10.5, category="Poetry")
+    assert await redis_service.store_books([book]) == 0
+    pipe.watch.assert_awaited_once_with("lock:books:crawl")
+    pipe.execute.assert_not_awaited()
+
+
+class FakePubSub:
+    """PubSub en memoria: entrega los mensajes publicados con `publish`"""
+
+    def __init__(self):
+        self.messages = asyncio.Queue()
+        self.subscribe = AsyncMock()
+        self.unsubscribe = AsyncMock()
+        self.aclose = AsyncMock()
+
+    def publish(self, channel, data):
+        self.messages.put_nowait({"type": "message", "channel": channel, "data": data})
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=None):
+        try:
+            return await asyncio.wait_for(self.messages.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+def fake_listener(*messages):
+    """Suscriptor falso cuyo canal ya contiene `messages`"""
+
+    @asynccontextmanager
+    async def listen(channel):
+        queue = asyncio.Queue()
+        for message in messages:
+            queue.put_nowait(message)
+        yield queue
+
+    subscriber = MagicMock()
+    subscriber.listen = listen
+    return subscriber
+
+
+# Test para validar que varios oyentes de un canal comparten una suscripción
+@pytest.mark.asyncio
+async def test_subscriber_fans_out_one_subscription():
+    pubsub = FakePubSub()
+    redis_client = MagicMock()
+    redis_client.pubsub.return_value = pubsub
+    subscriber = Subscriber(redis_client)
+
+    async with subscriber.listen("canal") as first:
+        async with subscriber.listen("canal") as second:
+            pubsub.publish("canal", "hola")
+            assert await asyncio.wait_for(first.get(), 1) == "hola"
+            assert await asyncio.wait_for(second.get(), 1) == "hola"
+            assert subscriber.listener_count() == 2
+    await subscriber.close()
+
+    redis_client.pubsub.assert_called_once()
+    pubsub.subscribe.assert_awaited_once_with("canal")
+    pubsub.unsubscribe.assert_awaited_once_with("canal")
+    assert subscriber.listener_count() == 0
+
+
+# Test para validar que el stream de un job termina cuando el job acaba
+@pytest.mark.asyncio
+async def test_iter_job_updates_stops_when_job_finishes():
+    running = CrawlStatus(job_id="abc", status=JobStatus.running)
+    done = CrawlStatus(job_id="abc", status=JobStatus.done)
+    redis_service = RedisService(
+        subscriber=fake_listener(running.model_dump_json(), done.model_dump_json())
+    )
+    redis_service.get_job = AsyncMock(return_value=running)
+
+    updates = [job.status async for job in redis_service.iter_job_updates("abc")]
+
+    assert updates == [JobStatus.running, JobStatus.running, JobStatus.done]
+
+
+# Test para validar que sin mensajes se vuelve a leer el estado guardado
+@pytest.mark.asyncio
+async def test_iter_job_updates_rereads_state_on_keepalive():
+    redis_service = RedisService(subscriber=fake_listener())
+    redis_service.get_job = AsyncMock(
+        side_effect=[
+            CrawlStatus(job_id="abc", status=JobStatus.running),
+            CrawlStatus(job_id="abc", status=JobStatus.failed),
+        ]
+    )
+
+    updates = [
+        job.status
+        async for job in redis_service.iter_job_updates("abc", keepalive=0.01)
+    ]
+
+    assert updates == [JobStatus.running, JobStatus.failed]
+
+
+# Test para validar que la espera de un lock se despierta con la notificación
+@pytest.mark.asyncio
+async def test_wait_for_unlock_wakes_on_release():
+    redis_service = RedisService(subscriber=fake_listener("token"))
+    redis_service.is_locked = AsyncMock(side_effect=[True, False])
+
+    assert await redis_service.wait_for_unlock("books:crawl", timeout=5) is True
@@ -0,0 +1,586 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+import pytest
+from aiohttp import web
+from unittest.mock import AsyncMock, MagicMock
+
+from app.models.schemas import Book
+from app.scraping.parsers import (
+    extract_price_value,
+    parse_categories_page,
+    parse_detail_page,
+    parse_listing_page,
+)
+from app.scraping.detail_enricher import BookDetailEnricher
+from app.scraping.rate_control import AdaptiveHostScheduler, parse_retry_after
+from app.scraping.scrape_books import BookScraper
+from app.scraping.write_buffer import BookWriteBuffer
+
+pytest_plugins = ("pytest_asyncio",)
+
+LISTING_HTML = """
+<article class="product_pod">
+  <div class="image_container"><img src="../../media/a.jpg"/></div>
+  <h3><a href="../../../a_1/index.html" title="A Light in the Attic">A Light...</a></h3>
+  <p class="price_color">£51.77</p>
+</article>
+<article class="product_pod">
+  <div class="image_container"><img src="../../media/b.jpg"/></div>
+  <h3><a href="../../../b_2/index.html" title="Sharp Objects">Sharp...</a></h3>
+  <p class="price_color">£12.50</p>
+</article>
+<ul class="pager">
+  <li class="current">Page 1 of 3</li>
+  <li class="next"><a href="page-2.html">next</a></li>
+</ul>
+"""
+
+
+# Test para validar la conversión de precios
+def test_extract_price_value():
+    assert extract_price_value("£12.99") == 12.99
+    assert extract_price_value("sin precio") == 0.0
+
+
+# Test para validar el parseo de una página de listado
+def test_parse_listing_page():
+    result = parse_listing_page(
+        LISTING_HTML,
+        category="Mystery",
+        page_url="http://books.toscrape.com/catalogue/category/books/mystery_3/index.html",
+        base_url="http://books.toscrape.com/",
+        price_limit=20.0,
+    )
+
+    assert [book.title for book in result["books"]] == ["Sharp Objects"]
+    assert result["books"][0].price == 12.50
+    assert result["books"][0].category == "Mystery"
+    assert result["next_url"] == (
+        "http://books.toscrape.com/catalogue/category/books/mystery_3/page-2.html"
+    )
+    assert result["page_urls"] == [
+        "http://books.toscrape.com/catalogue/category/books/mystery_3/page-2.html",
+        "http://books.toscrape.com/catalogue/category/books/mystery_3/page-3.html",
+    ]
+
+
+# Test para validar el parseo de las categorías de la página principal
+def test_parse_categories_page():
+    html = """
+    <div class="side_categories"><ul><li><a href="books_1/index.html">Books</a>
+      <ul><li><a href="catalogue/category/books/travel_2/index.html"> Travel </a></li></ul>
+    </li></ul></div>
+    """
+    categories = parse_categories_page(html, "http://books.toscrape.com/")
+
+    assert categories == [
+        {
+            "name": "Travel",
+            "url": "http://books.toscrape.com/catalogue/category/books/travel_2/index.html",
+        }
+    ]
+
+
+# Test para validar el parseo de la página de detalle de un libro
+def test_parse_detail_page():
+    html = """
+    <div class="product_main">
+      <p class="instock availability">In stock (22 available)</p>
+      <p class="star-rating Three"></p>
+    </div>
+    <div id="product_description"><h2>Product Description</h2></div>
+    <p>It's hard to imagine a world without A Light in the Attic.</p>
+    <table class="table table-striped">
+      <tr><th>UPC</th><td>a897fe39b1053632</td></tr>
+      <tr><th>Availability</th><td>In stock (22 available)</td></tr>
+    </table>
+    """
+    details = parse_detail_page(html)
+
+    assert details == {
+        "upc": "a897fe39b1053632",
+        "availability": "In stock (22 available)",
+        "stock": 22,
+        "rating": 3,
+        "description": "It's hard to imagine a world without A Light in the Attic.",
+    }
+
+
+# Test para validar que un libro sin cambios (304) no se vuelve a parsear ni guardar
+@pytest.mark.asyncio
+async def test_detail_enricher_skips_unchanged_pages():
+    redis_service = MagicMock()
+    redis_service.get_page_state = AsyncMock(return_value={"etag": '"v1"'})
+    fetch_page = AsyncMock(return_value={"status": 304, "html": None})
+    parse_detail = AsyncMock()
+    store_books = AsyncMock()
+    enricher = BookDetailEnricher(
+        fetch_page, parse_detail, store_books, redis_service=redis_service
+    )
+    book = Book(
+        id="1",
+        title="Libro",
+        price=10.0,
+        category="Poetry",
+        detail_url="http://books.toscrape.com/catalogue/libro_1/index.html",
+    )
+
+    assert await enricher.enrich(book) is False
+    fetch_page.assert_awaited_once_with(book.detail_url, {"If-None-Match": '"v1"'})
+    parse_detail.assert_not_awaited()
+    store_books.assert_not_awaited()
+    assert enricher.unchanged == 1
+
+
+# Test para validar que el buffer agrupa escrituras y ejecuta los callbacks
+@pytest.mark.asyncio
+async def test_write_buffer_flushes_by_size():
+    redis_service = MagicMock()
+    redis_service.store_books = AsyncMock(side_effect=lambda books: len(books))
+    on_flushed = AsyncMock()
+    buffer = BookWriteBuffer(redis_service, flush_size=3, flush_interval=60)
+
+    books = [
+        Book(id=str(i), title=f"Libro {i}", price=10.0, category="Poetry")
+        for i in range(4)
+    ]
+    await buffer.add(books[:2], on_flushed)
+    redis_service.store_books.assert_not_called()
+
+    await buffer.add(books[2:])
+    redis_service.store_books.assert_awaited_once_with(books)
+    on_flushed.assert_awaited_once_with(True)
+    assert buffer.books_stored == 4
+
+
+# Test para validar que un lote que falla dos veces se descarta avisando del fallo
+@pytest.mark.asyncio
+async def test_write_buffer_reports_failure_to_callbacks():
+    redis_service = MagicMock()
+    redis_service.store_books = AsyncMock(return_value=0)
+    on_flushed = AsyncMock()
+    buffer = BookWriteBuffer(redis_service, flush_size=10, flush_interval=60)
+
+    await buffer.add(
+        [Book(id="1", title="Libro", price=10.0, category="Poetry")], on_flushed
+    )
+    await buffer.close()
+
+    assert redis_service.store_books.await_count == 2
+    on_flushed.assert_awaited_once_with(False)
+    assert buffer.books_failed == 1
+    assert buffer.books_stored == 0
+
+
+# Test para validar que un lote fallido se reintenta antes que el siguiente
+@pytest.mark.asyncio
+async def test_write_buffer_retries_failed_batch():
+    redis_service = MagicMock()
+    redis_service.store_books = AsyncMock(side_effect=[0, 1, 1])
+    calls = []
+    buffer = BookWriteBuffer(redis_service, flush_size=1, flush_interval=60)
+
+    first = Book(id="1", title="Libro 1", price=10.0, category="Poetry")
+    second = Book(id="2", title="Libro 2", price=10.0, category="Poetry")
+
+    async def on_first(stored):
+        calls.append(("1", stored))
+
+    async def on_second(stored):
+        calls.append(("2", stored))
+
+    await buffer.add([first], on_first)
+    assert calls == []
+
+    await buffer.add([second], on_second)
+    await buffer.close()
+
+    written = [call.args[0] for call in redis_service.store_books.await_args_list]
+    assert written == [[first], [first], [second]]
+    assert calls == [("1", True), ("2", True)]
+    assert buffer.books_stored == 2
+    assert buffer.books_failed == 0
+
+
+# Test para validar que un 429 reduce la concurrencia y respeta Retry-After
+@pytest.mark.asyncio
+async def test_scheduler_backs_off_on_throttling():
+    scheduler = AdaptiveHostScheduler(initial_concurrency=8, min_concurrency=2)
+
+    async with scheduler.slot("http://example.com/page-1.html") as slot:
+        slot.record(429, "30")
+
+    stats = scheduler.stats()["example.com"]
+    assert stats["concurrency_limit"] == 4
+    assert stats["throttled"] == 1
+    assert stats["blocked_for"] > 25
+
+
+# Test para validar que la concurrencia crece sin superar el techo
+@pytest.mark.asyncio
+async def test_scheduler_grows_up_to_ceiling():
+    scheduler = AdaptiveHostScheduler(
+        initial_concurrency=1, max_concurrency=3, target_latency=10
+    )
+
+    for _ in range(50):
+        async with scheduler.slot("http://example.com/") as slot:
+            slot.record(200)
+
+    assert scheduler.stats()["example.com"]["concurrency_limit"] == 3
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("5") == 5.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("no es una fecha") is None
+    assert parse_retry_after(None) is None
+
+
+# Test para validar que la parada cancela las peticiones en curso y evita las nuevas
+@pytest.mark.asyncio
+async def test_stop_crawl_cancels_inflight_requests(tmp_path):
+    scraper = BookScraper("http://example.com/", logs_dir=str(tmp_path))
+    started = asyncio.Event()
+
+    async def slow_request(*args):
+        started.set()
+        await asyncio.sleep(10)
+
+    scraper.request_page = slow_request
+    fetch = asyncio.create_task(scraper.fetch_html("http://example.com/1", None))
+    await started.wait()
+    scraper.stop_crawl()
+
+    assert await fetch is None
+    assert await scraper.fetch_html("http://example.com/2", None) is None
+    assert scraper.requests_avoided == 2
+
+
+# Test para validar que una página limitada (429) se reintenta tras Retry-After
+@pytest.mark.asyncio
+async def test_request_page_retries_throttled_page(tmp_path, serve_site):
+    responses = [web.Response(status=429, headers={"Retry-After": "0"})]
+
+    async def page(request):
+        if responses:
+            return responses.pop(0)
+        return web.Response(text="<html>ok</html>", content_type="text/html")
+
+    web_app = web.Application()
+    web_app.router.add_get("/page-1.html", page)
+    base_url = await serve_site(web_app)
+    scraper = BookScraper(base_url, logs_dir=str(tmp_path), retry_backoff=0)
+
+    async with aiohttp.ClientSession() as session:
+        result = await scraper.fetch_html(f"{base_url}page-1.html", session)
+
+    assert result["status"] == 200
+    assert result["html"] == "<html>ok</html>"
+    assert scraper.retries == 1
+    assert scraper.fetch_errors == 0
+    assert scraper.scheduler.stats()[base_url.split("/")[2]]["throttled"] == 1
+
+
+# Test para validar que las páginas de detalle usan su propio planificador y
+# sus propios contadores
+@pytest.mark.asyncio
+async def test_request_page_detail_uses_own_scheduler(tmp_path, serve_site):
+    responses = [web.Response(status=429, headers={"Retry-After": "0"})]
+
+    async def page(request):
+        if responses:
+            return responses.pop(0)
+        return web.Response(text="<html>ok</html>", content_type="text/html")
+
+    web_app = web.Application()
+    web_app.router.add_get("/libro_1/index.html", page)
+    base_url = await serve_site(web_app)
+    scraper = BookScraper(base_url, logs_dir=str(tmp_path), retry_backoff=0)
+
+    async with aiohttp.ClientSession() as session:
+        result = await scraper.request_page(
+            f"{base_url}libro_1/index.html", session, detail=True
+        )
+
+    assert result["status"] == 200
+    assert (scraper.pages_fetched, scraper.retries) == (0, 0)
+    assert (scraper.detail_pages_fetched, scraper.detail_retries) == (1, 1)
+    assert scraper.scheduler.stats() == {}
+    assert scraper.detail_scheduler.stats()[base_url.split("/")[2]]["throttled"] == 1
+
+
+# Test para validar que los reintentos están acotados
+@pytest.mark.asyncio
+async def test_request_page_gives_up_after_max_retries(tmp_path, serve_site):
+    async def page(request):
+        return web.Response(status=503)
+
+    web_app = web.Application()
+    web_app.router.add_get("/page-1.html", page)
+    base_url = await serve_site(web_app)
+    scraper = BookScraper(
+        base_url, logs_dir=str(tmp_path), max_retries=2, retry_backoff=0
+    )
+
+    async with aiohttp.ClientSession() as session:
+        assert await scraper.fetch_html(f"{base_url}page-1.html", session) is None
+
+    assert scraper.retries == 2
+    assert scraper.fetch_errors == 1
+
+
+# Test para validar que progress() lee los contadores del buffer sin modificar
+# los del scraper
+def test_progress_reads_write_buffer_counters(tmp_path):
+    scraper = BookScraper("http://example.com/", logs_dir=str(tmp_path))
+    scraper.pages_fetched = 4
+    scraper.fetch_errors = 2
+    scraper.retries = 3
+    scraper.write_buffer = MagicMock(books_stored=5, books_failed=1)
+
+    progress = scraper.progress()
+
+    assert progress["pages_fetched"] == 4
+    assert progress["books_stored"] == 5
+    assert progress["errors"] == 3
+    assert progress["retries"] == 3
+    assert scraper.books_stored == 0
+    assert scraper.books_failed == 0
+
+
+class FakeCrawlStore:
+    """Estado del crawl en memoria con la interfaz que usa el scraper"""
+
+    def __init__(self):
+        self.page_states = {}
+        self.checkpoint = {}
+        self.stored = []
+
+    async def store_books(self, books):
+        self.stored.extend(books)
+        return len(books)
+
+    async def get_page_state(self, url):
+        return dict(self.page_states.get(url, {}))
+
+    async def set_page_state(self, url, state):
+        self.page_states[url] = {k: v for k, v in state.items() if v is not None}
+
+    async def get_crawl_checkpoint(self):
+        return dict(self.checkpoint)
+
+    async def set_crawl_checkpoint(self, category_url, next_url):
+        self.checkpoint[category_url] = next_url or ""
+
+    async def clear_crawl_checkpoint(self):
+        self.checkpoint.clear()
+
+
+def make_catalog_site(send_etags=True):
+    """
+    Sitio con dos categorías (Poetry con dos páginas y Travel con una) que
+    responde 304 a If-None-Match si `send_etags`. Devuelve la aplicación y
+    la lista de peticiones (ruta, estado) que recibe.
+    """
+    requests = []
+    pages = {
+        "poetry_1/index.html": (["Poema", "Oda"], "page-2.html"),
+        "poetry_1/page-2.html": (["Soneto"], None),
+        "travel_2/index.html": (["Viaje"], None),
+    }
+
+    def listing(titles, next_page):
+        pods = "".join(
+            f'<article class="product_pod"><div class="image_container">'
+            f'<img src="../../media/{title}.jpg"/></div>'
+            f'<h3><a href="../../../{title}_1/index.html" title="{title}">'
+            f"{title}</a></h3>"
+            f'<p class="price_color">£10.00</p></article>'
+            for title in titles
+        )
+        pager = ""
+        if next_page:
+            pager = f'<li class="next"><a href="{next_page}">next</a></li>'
+        return f"<html>{pods}<ul class='pager'>{pager}</ul></html>"
+
+    async def index(request):
+        requests.append((request.path, 200))
+        links = "".join(
+            f'<li><a href="catalogue/category/books/{slug}/index.html">'
+            f"{name}</a></li>"
+            for slug, name in [("poetry_1", "Poetry"), ("travel_2", "Travel")]
+        )
+        html = (
+            '<div class="side_categories"><ul><li><a>Books</a>'
+            f"<ul>{links}</ul></li></ul></div>"
+        )
+        return web.Response(text=html, content_type="text/html")
+
+    async def category_page(request):
+        path = f"{request.match_info['slug']}/{request.match_info['page']}"
+        body = listing(*pages[path])
+        etag = f'"{hash(body)}"'
+        if send_etags and request.headers.get("If-None-Match") == etag:
+            requests.append((request.path, 304))
+            return web.Response(status=304, headers={"ETag": etag})
+        requests.append((request.path, 200))
+        headers = {"ETag": etag} if send_etags else {}
+        return web.Response(text=body, content_type="text/html", headers=headers)
+
+    web_app = web.Application()
+    web_app.router.add_get("/", index)
+    web_app.router.add_get("/catalogue/category/books/{slug}/{page}", category_page)
+    return web_app, requests
+
+
+def make_incremental_scraper(base_url, store, tmp_path):
+    return BookScraper(
+        base_url,
+        redis_service=store,
+        logs_dir=str(tmp_path),
+        incremental=True,
+        parse_executor="inline",
+        write_flush_interval=0.01,
+    )
+
+
+# Test para validar que un crawl incremental omite las páginas que responden 304
+@pytest.mark.asyncio
+async def test_incremental_crawl_skips_not_modified_pages(tmp_path, serve_site):
+    web_app, requests = make_catalog_site()
+    base_url = await serve_site(web_app)
+    store = FakeCrawlStore()
+
+    first = await make_incremental_scraper(base_url, store, tmp_path).scrape_books()
+    requests.clear()
+    store.stored.clear()
+    scraper = make_incremental_scraper(base_url, store, tmp_path)
+    second = await scraper.scrape_books()
+
+    assert sorted(book.title for book in first) == ["Oda", "Poema", "Soneto", "Viaje"]
+    assert second == []
+    assert store.stored == []
+    assert sorted(status for _, status in requests) == [200, 304, 304, 304]
+    assert scraper.total_books_collected == 4
+    assert store.checkpoint == {}
+
+
+# Test para validar que sin validadores HTTP se omiten las páginas con el mismo
+# contenido que en el crawl anterior
+@pytest.mark.asyncio
+async def test_incremental_crawl_skips_unchanged_content(tmp_path, serve_site):
+    web_app, requests = make_catalog_site(send_etags=False)
+    base_url = await serve_site(web_app)
+    store = FakeCrawlStore()
+
+    await make_incremental_scraper(base_url, store, tmp_path).scrape_books()
+    store.stored.clear()
+    second = await make_incremental_scraper(base_url, store, tmp_path).scrape_books()
+
+    assert second == []
+    assert store.stored == []
+    assert all(status == 200 for _, status in requests)
+
+
+# Test para validar que un crawl interrumpido se reanuda desde su checkpoint
+@pytest.mark.asyncio
+async def test_incremental_crawl_resumes_from_checkpoint(tmp_path, serve_site):
+    web_app, requests = make_catalog_site()
+    base_url = await serve_site(web_app)
+    category_url = f"{base_url}catalogue/category/books"
+    store = FakeCrawlStore()
+    # La categoría Travel terminó y Poetry quedó pendiente en su página 2
+    store.checkpoint = {
+        f"{category_url}/poetry_1/index.html": f"{category_url}/poetry_1/page-2.html",
+        f"{category_url}/travel_2/index.html": "",
+    }
+
+    books = await make_incremental_scraper(base_url, store, tmp_path).scrape_books()
+
+    assert [book.title for book in books] == ["Soneto"]
+    assert [path for path, _ in requests] == [
+        "/",
+        "/catalogue/category/books/poetry_1/page-2.html",
+    ]
+    assert store.checkpoint == {}
+
+
+# Test para validar que un crawl detenido antes de terminar conserva su checkpoint
+@pytest.mark.asyncio
+async def test_stopped_crawl_keeps_checkpoint(tmp_path, serve_site):
+    web_app, _ = make_catalog_site()
+    base_url = await serve_site(web_app)
+    category_url = f"{base_url}catalogue/category/books"
+    store = FakeCrawlStore()
+    scraper = make_incremental_scraper(base_url, store, tmp_path)
+    scraper.max_books = 2
+    scraper.workers = 1
+
+    books = await scraper.scrape_books()
+
+    assert [book.title for book in books] == ["Poema", "Oda"]
+    assert store.checkpoint == {
+        f"{category_url}/poetry_1/index.html": f"{category_url}/poetry_1/page-2.html"
+    }
+
+
+# Test para validar que el crawl de listados se da por terminado sin esperar
+# a que se vacíe la cola de enriquecimiento
+@pytest.mark.asyncio
+async def test_listing_done_before_enrichment_drains(tmp_path, serve_site):
+    web_app, requests = make_catalog_site()
+    details_released = asyncio.Event()
+
+    async def detail_page(request):
+        await details_released.wait()
+        return web.Response(text="<html></html>", content_type="text/html")
+
+    web_app.router.add_get("/catalogue/{book}/index.html", detail_page)
+    base_url = await serve_site(web_app)
+    store = FakeCrawlStore()
+    scraper = BookScraper(
+        base_url,
+        redis_service=store,
+        logs_dir=str(tmp_path),
+        parse_executor="inline",
+        write_flush_interval=0.01,
+        enrich_details=True,
+    )
+    listing_progress = []
+
+    async def on_listing_done(books):
+        listing_progress.append((len(books), scraper.detail_progress()["enriched"]))
+        details_released.set()
+
+    scraper.on_listing_done = on_listing_done
+    books = await scraper.scrape_books()
+
+    assert listing_progress == [(4, 0)]
+    progress = scraper.progress()
+    assert progress["details"]["enriched"] == 4
+    assert progress["details"]["pages_fetched"] == 4
+    # Las páginas de detalle no cuentan como páginas de listado
+    assert progress["pages_fetched"] == 4
+    assert len(books) == 4
+
+
+# Test para validar que un pool de parseo compartido se usa y no se cierra
+@pytest.mark.asyncio
+async def test_scrape_books_reuses_shared_parse_pool(tmp_path, serve_site):
+    web_app, _ = make_catalog_site()
+    base_url = await serve_site(web_app)
+    parse_pool = MagicMock(wraps=ThreadPoolExecutor(max_workers=1))
+
+    for _ in range(2):
+        scraper = BookScraper(
+            base_url, logs_dir=str(tmp_path), parse_pool=parse_pool
+        )
+        assert len(await scraper.scrape_books()) == 4
+        assert scraper.parse_pool is None
+
+    assert parse_pool.submit.call_count == 8
+    parse_pool.shutdown.assert_not_called()
+    parse_pool.shutdown()
@@ -0,0 +1,154 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.models.schemas import Book
+from app.services.redis_service import (
+    SEARCH_NGRAM_SIZE,
+    RedisService,
+    category_key,
+    search_key,
+    title_ngrams,
+)
+
+pytest_plugins = ("pytest_asyncio",)
+
+
+def search_service(*books):
+    """
+    Servicio en formato JSON cuyo índice devuelve los IDs de `books` para
+    cualquier intersección y cuyo MGET devuelve esos mismos libros.
+    """
+    redis_service = RedisService(storage_format="json")
+    redis_service.redis_client = MagicMock()
+    redis_service.redis_client.sinter = AsyncMock(
+        return_value={book.id for book in books}
+    )
+    redis_service.redis_client.mget = AsyncMock(
+        return_value=[book.model_dump_json() for book in books]
+    )
+    return redis_service
+
+
+def sinter_keys(redis_service):
+    return sorted(redis_service.redis_client.sinter.await_args.args[0])
+
+
+# Test para validar que se generan todos los n-gramas en minúsculas
+def test_title_ngrams_all_sizes():
+    grams = title_ngrams("Abc")
+
+    assert grams == {"a", "b", "c", "ab", "bc", "abc"}
+
+
+# Test para validar que cualquier subcadena de una búsqueda corta está indexada
+def test_title_ngrams_cover_short_substrings():
+    title = "A Light in the Attic"
+    grams = title_ngrams(title)
+
+    for size in range(1, SEARCH_NGRAM_SIZE + 1):
+        for start in range(len(title) - size + 1):
+            assert title.lower()[start : start + size] in grams
+
+
+# Test para validar que los trigramas de una consulta larga están en el título
+def test_title_ngrams_query_trigrams_subset():
+    title_grams = title_ngrams("Tipping the Velvet")
+    query_grams = title_ngrams("ing the v", sizes=[SEARCH_NGRAM_SIZE])
+
+    assert query_grams <= title_grams
+
+
+# Test para validar que guardar un libro indexa los n-gramas de su título
+@pytest.mark.asyncio
+async def test_store_books_writes_search_index(fake_pipeline):
+    pipe = fake_pipeline(None)
+    redis_service = RedisService(storage_format="hash")
+    redis_service.redis_client = MagicMock()
+    redis_service.redis_client.pipeline.return_value = pipe
+
+    await redis_service.store_books(
+        [Book(id="1", title="Abc", price=10.0, category="Poetry")]
+    )
+
+    for gram in title_ngrams("Abc"):
+        pipe.sadd.assert_any_call(search_key(gram), "1")
+
+
+# Test para validar que rebuild_indexes recrea el índice de n-gramas
+@pytest.mark.asyncio
+async def test_rebuild_indexes_recreates_search_index(fake_pipeline):
+    async def scan_iter(match, count):
+        yield "book:1"
+
+    write_pipe = fake_pipeline(None)
+    redis_service = RedisService(storage_format="hash")
+    redis_service.redis_client = MagicMock()
+    redis_service.redis_client.scan_iter = scan_iter
+    redis_service.redis_client.pipeline.side_effect = [
+        fake_pipeline([("Poetry", "Abc", "10.0")]),
+        write_pipe,
+    ]
+    redis_service.redis_client.incr = AsyncMock()
+
+    await redis_service.rebuild_indexes()
+
+    for gram in title_ngrams("Abc"):
+        write_pipe.sadd.assert_any_call(search_key(gram), "1")
+
+
+# Test para validar que una consulta corta usa su propio n-grama
+@pytest.mark.asyncio
+async def test_search_books_short_query():
+    book = Book(id="1", title="A Light in the Attic", price=10.0, category="Poetry")
+    redis_service = search_service(book)
+
+    books = await redis_service.search_books("Li")
+
+    assert sinter_keys(redis_service) == [search_key("li")]
+    assert books == [book]
+
+
+# Test para validar que una consulta larga intersecta sus trigramas sin
+# distinguir mayúsculas
+@pytest.mark.asyncio
+async def test_search_books_intersects_trigrams_case_insensitive():
+    book = Book(id="1", title="A Light in the Attic", price=10.0, category="Poetry")
+    redis_service = search_service(book)
+
+    books = await redis_service.search_books("LIGHT")
+
+    assert sinter_keys(redis_service) == sorted(
+        search_key(gram) for gram in ["lig", "igh", "ght"]
+    )
+    assert books == [book]
+
+
+# Test para validar que los candidatos sin la subcadena completa se descartan
+@pytest.mark.asyncio
+async def test_search_books_confirms_substring():
+    # Contiene los trigramas "abc" y "bcd" pero no "abcd"
+    book = Book(id="1", title="abc bcd", price=10.0, category="Poetry")
+    redis_service = search_service(book)
+
+    assert await redis_service.search_books("abcd") == []
+
+
+# Test para validar que un n-grama sin libros devuelve una lista vacía
+@pytest.mark.asyncio
+async def test_search_books_no_match():
+    redis_service = search_service()
+
+    assert await redis_service.search_books("xyz") == []
+    redis_service.redis_client.mget.assert_not_awaited()
+
+
+# Test para validar que la búsqueda por título se intersecta con la categoría
+@pytest.mark.asyncio
+async def test_search_books_with_category():
+    book = Book(id="1", title="A Light in the Attic", price=10.0, category="Poetry")
+    redis_service = search_service(book)
+
+    books = await redis_service.search_books("light", category="Poetry")
+
+    assert category_key("Poetry") in sinter_keys(redis_service)
+    assert books == [book]
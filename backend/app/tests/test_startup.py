@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.main import app
+from app.models.schemas import Book, JobStatus
+from app.services.startup_service import StartupScrape
+
+pytest_plugins = ("pytest_asyncio",)
+
+BOOKS = [Book(id="1", title="Libro", price=10.0, category="Poetry")]
+
+
+def make_redis_service(count_books):
+    redis_service = MagicMock()
+    redis_service.count_books = AsyncMock(side_effect=count_books)
+    return redis_service
+
+
+# Test para validar la transición pending -> running -> done del scraping inicial
+@pytest.mark.asyncio
+async def test_startup_scrape_runs_until_done():
+    crawling = asyncio.Event()
+    release = asyncio.Event()
+
+    async def crawl(redis_service):
+        crawling.set()
+        await release.wait()
+        return BOOKS
+
+    startup = StartupScrape(make_redis_service([0]))
+    assert startup.status == JobStatus.pending
+
+    with patch("app.services.startup_service.run_book_crawl", crawl):
+        task = startup.start()
+        await crawling.wait()
+        assert startup.status == JobStatus.running
+        assert not startup.is_ready
+
+        release.set()
+        await task
+
+    assert startup.status == JobStatus.done
+    assert startup.books_scraped == 1
+    assert startup.is_ready
+
+
+# Test para validar que un fallo se reintenta en lugar de quedarse en failed
+@pytest.mark.asyncio
+async def test_startup_scrape_retries_after_failure():
+    crawl = AsyncMock(side_effect=[RuntimeError("Redis no responde"), BOOKS])
+    startup = StartupScrape(make_redis_service([0, 0]), retry_backoff=0)
+
+    with patch("app.services.startup_service.run_book_crawl", crawl):
+        assert await startup.attempt() is False
+        assert startup.status == JobStatus.failed
+        assert startup.error == "Redis no responde"
+
+        await startup.run()
+
+    assert startup.status == JobStatus.done
+    assert startup.attempts == 2
+
+
+# Test para validar que el catálogo cargado por otra vía deja la API lista
+@pytest.mark.asyncio
+async def test_startup_scrape_ready_when_catalog_filled_elsewhere():
+    crawl = AsyncMock(side_effect=RuntimeError("crawl fallido"))
+    startup = StartupScrape(make_redis_service([0, 80]), retry_backoff=0)
+
+    with patch("app.services.startup_service.run_book_crawl", crawl):
+        await startup.run()
+
+    assert startup.status == JobStatus.done
+    crawl.assert_awaited_once()
+
+
+# Test para validar /health/ready mientras se carga el catálogo y al terminar
+@pytest.mark.asyncio
+async def test_health_ready(async_client):
+    startup = StartupScrape(make_redis_service([80]))
+    app.state.startup_scrape = startup
+    try:
+        response = await async_client.get("/health/ready")
+        assert response.status_code == 503
+        assert response.headers["retry-after"]
+        assert response.json()["startup"]["status"] == "pending"
+
+        await startup.attempt()
+
+        response = await async_client.get("/health/ready")
+        assert response.status_code == 200
+        assert response.json()["startup"]["status"] == "done"
+
+        # La liveness no depende del catálogo
+        assert (await async_client.get("/health")).status_code == 200
+    finally:
+        del app.state.startup_scrape
@@ -0,0 +1,148 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.scraping.scrape_hn import HackerNewsIntegration
+from app.scraping.webdriver_pool import WebDriverPool
+
+pytest_plugins = ("pytest_asyncio",)
+
+
+class FakeDriver:
+    """WebDriver falso: `title` falla si la sesión está rota"""
+
+    def __init__(self):
+        self.broken = False
+        self.quit_calls = 0
+
+    @property
+    def title(self):
+        if self.broken:
+            raise RuntimeError("session deleted")
+        return "Hacker News"
+
+    def quit(self):
+        self.quit_calls += 1
+
+
+def make_pool(**kwargs):
+    create_driver = AsyncMock(side_effect=lambda: FakeDriver())
+    return WebDriverPool(create_driver, **kwargs), create_driver
+
+
+# Test para validar que una sesión devuelta se reutiliza en el siguiente acquire
+@pytest.mark.asyncio
+async def test_pool_reuses_released_driver():
+    pool, create_driver = make_pool(max_size=2)
+
+    driver = await pool.acquire()
+    assert pool.stats() == {"max_size": 2, "idle": 0, "in_use": 1}
+    await pool.release(driver)
+    assert pool.stats() == {"max_size": 2, "idle": 1, "in_use": 0}
+
+    assert await pool.acquire() is driver
+    create_driver.assert_awaited_once()
+    await pool.close()
+
+
+# Test para validar que una sesión rota se descarta y se sustituye por otra
+@pytest.mark.asyncio
+async def test_pool_replaces_broken_driver():
+    pool, create_driver = make_pool()
+
+    driver = await pool.acquire()
+    await pool.release(driver)
+    driver.broken = True
+
+    replacement = await pool.acquire()
+
+    assert replacement is not driver
+    assert driver.quit_calls == 1
+    assert create_driver.await_count == 2
+    await pool.close()
+
+
+# Test para validar que se cierran las sesiones fallidas o muy usadas
+@pytest.mark.asyncio
+async def test_pool_discards_failed_and_worn_out_drivers():
+    pool, _ = make_pool(max_uses=1)
+
+    failed = await pool.acquire()
+    await pool.release(failed, reusable=False)
+    worn_out = await pool.acquire()
+    await pool.release(worn_out)
+
+    assert failed.quit_calls == 1
+    assert worn_out.quit_calls == 1
+    assert pool.stats()["idle"] == 0
+    await pool.close()
+
+
+# Test para validar que acquire espera cuando todas las sesiones están prestadas
+@pytest.mark.asyncio
+async def test_pool_waits_when_exhausted():
+    pool, _ = make_pool(max_size=1)
+
+    driver = await pool.acquire()
+    waiting = asyncio.create_task(pool.acquire())
+    await asyncio.sleep(0.01)
+    assert not waiting.done()
+
+    await pool.release(driver)
+    assert await asyncio.wait_for(waiting, 1) is driver
+    await pool.close()
+
+
+# Test para validar que close cierra las sesiones libres y las prestadas al
+# devolverse, y rechaza nuevos acquire
+@pytest.mark.asyncio
+async def test_pool_close():
+    pool, _ = make_pool()
+    idle = await pool.acquire()
+    borrowed = await pool.acquire()
+    await pool.release(idle)
+
+    await pool.close()
+
+    assert idle.quit_calls == 1
+    assert borrowed.quit_calls == 0
+    await pool.release(borrowed)
+    assert borrowed.quit_calls == 1
+    with pytest.raises(RuntimeError):
+        await pool.acquire()
+
+
+def make_integration(tmp_path, driver):
+    """HackerNewsIntegration con un pool simulado cuya página ya está cargada"""
+    pool = MagicMock()
+    pool.release = AsyncMock()
+    integration = HackerNewsIntegration(logs_dir=str(tmp_path), driver_pool=pool)
+    integration._load_page = AsyncMock(return_value=driver)
+    return integration, pool
+
+
+# Test para validar que una sesión que falla al procesar una página se retira
+# del pool en lugar de reutilizarse
+@pytest.mark.asyncio
+async def test_process_page_retires_failed_driver(tmp_path):
+    driver = MagicMock()
+    driver.execute_script.side_effect = RuntimeError("script timeout")
+    integration, pool = make_integration(tmp_path, driver)
+
+    with pytest.raises(RuntimeError):
+        await integration._process_page("https://news.ycombinator.com", 1)
+
+    pool.release.assert_awaited_once_with(driver, reusable=False)
+
+
+# Test para validar que una sesión que procesa la página se devuelve al pool
+@pytest.mark.asyncio
+async def test_process_page_returns_healthy_driver(tmp_path):
+    driver = MagicMock()
+    driver.execute_script.return_value = []
+    integration, pool = make_integration(tmp_path, driver)
+
+    assert await integration._process_page("https://news.ycombinator.com", 1) == []
+
+    pool.release.assert_awaited_once_with(driver, reusable=True)
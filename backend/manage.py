@@ -0,0 +1,63 @@
+import argparse
+import asyncio
+
+from app.services.redis_service import BOOK_STORAGE_FORMATS, RedisService
+from app.services.scrape_service import run_book_crawl
+
+
+async def rebuild_indexes():
+    redis_service = RedisService()
+    try:
+        total = await redis_service.rebuild_indexes()
+        print(f"Índices reconstruidos para {total} libros")
+    finally:
+        await redis_service.close()
+
+
+async def refresh_books():
+    redis_service = RedisService()
+    try:
+        books = await run_book_crawl(redis_service, incremental=True, wait=False)
+        if books is None:
+            print("Ya hay un crawl en curso; consulta su estado en /api/v1/init/status")
+            return
+        print(f"Crawl incremental completado: {len(books)} libros nuevos o modificados")
+    finally:
+        await redis_service.close()
+
+
+async def migrate_storage(target_format: str):
+    redis_service = RedisService()
+    try:
+        total = await redis_service.migrate_book_storage(target_format)
+        print(
+            f"{total} libros migrados al formato '{target_format}'. "
+            f"Configura BOOK_STORAGE_FORMAT={target_format} antes de reiniciar la API"
+        )
+    finally:
+        await redis_service.close()
+
+
+COMMANDS = {
+    "rebuild-indexes": rebuild_indexes,
+    "refresh-books": refresh_books,
+    "migrate-storage": migrate_storage,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Comandos de mantenimiento")
+    parser.add_argument("command", choices=COMMANDS.keys())
+    parser.add_argument(
+        "storage_format",
+        nargs="?",
+        choices=BOOK_STORAGE_FORMATS,
+        help="Formato de destino para migrate-storage",
+    )
+    args = parser.parse_args()
+    if args.command == "migrate-storage":
+        if not args.storage_format:
+            parser.error("migrate-storage necesita el formato de destino")
+        asyncio.run(migrate_storage(args.storage_format))
+    else:
+        asyncio.run(COMMANDS[args.command]())